@@ -0,0 +1,36 @@
+"""
+Общие помощники бенчмарков: синтетический сигнал и чтение WAV
+"""
+import os
+import sys
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from src.resample import resample  # noqa: E402
+
+SAMPLE_RATE = config.SAMPLE_RATE
+
+
+def make_signal(seconds: float) -> np.ndarray:
+    """Синтетика: гармонические «слоги» на фоне шума"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    voiced = np.sin(2 * np.pi * 2 * t) > 0
+    tone = np.sin(2 * np.pi * 150 * t) + 0.5 * np.sin(2 * np.pi * 450 * t)
+    signal = tone * voiced * 6000 + rng.normal(0, 300, len(t))
+    return signal.astype(np.int16)
+
+
+def load_wav(path: str) -> np.ndarray:
+    """16-bit WAV -> моно int16 в SAMPLE_RATE"""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise SystemExit(f"{path}: нужен 16-bit PCM")
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if wf.getnchannels() > 1:
+            samples = samples.reshape(-1, wf.getnchannels())[:, 0]
+        return resample(samples, wf.getframerate(), SAMPLE_RATE)
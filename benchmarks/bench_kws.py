@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: движки wake word — Vosk против ONNX KWS
+
+Для каждого движка прогоняет аудио через путь IDLE (блоки low_latency ->
+VAD -> detect) и печатает CPU на час аудио, задержку вызова detect()
+(p50/p95/max, мс) и, если задан --keyword-at, задержку срабатывания
+от конца ключевого слова. Отдельно меряется только log-mel фронтенд —
+его стоимость не зависит от модели.
+
+Запуск: python benchmarks/bench_kws.py [--wav clip.wav --keyword-at 1.2]
+        [--kws-model models/kws/alyosha.onnx]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from bench_common import load_wav, make_signal  # noqa: E402
+from src.audio_frame import AudioFrame  # noqa: E402
+from src.features import LogMelFrontend  # noqa: E402
+from src.kws import OnnxWakeWordDetector  # noqa: E402
+from src.vad import VoiceActivityDetector  # noqa: E402
+from src.wake_word import WakeWordDetector  # noqa: E402
+
+SAMPLE_RATE = config.SAMPLE_RATE
+
+
+def bench_frontend(signal: np.ndarray, block: int) -> float:
+    """CPU секунд на час аудио только для log-mel"""
+    frontend = LogMelFrontend(SAMPLE_RATE, n_mels=config.KWS_N_MELS)
+    start = time.process_time()
+    for i in range(0, len(signal) - block + 1, block):
+        frontend.push(signal[i:i + block])
+    return (time.process_time() - start) / (len(signal) / SAMPLE_RATE) * 3600
+
+
+def run(detector, signal: np.ndarray, block: int, keyword_end: float = None) -> dict:
+    """Один проход через detect() с замером CPU и задержки вызовов"""
+    vad = VoiceActivityDetector()
+    calls = []
+    detections = []
+    cpu_start = time.process_time()
+    for seq, i in enumerate(range(0, len(signal) - block + 1, block)):
+        frame = AudioFrame(signal[i:i + block], i / SAMPLE_RATE, seq, SAMPLE_RATE)
+        frame.vad = vad.process(frame)
+        start = time.perf_counter()
+        if detector.detect(frame):
+            detections.append((i + block) / SAMPLE_RATE)
+        calls.append(time.perf_counter() - start)
+    cpu = time.process_time() - cpu_start
+
+    calls_ms = np.array(calls) * 1000
+    result = {
+        "cpu_s_per_hour": cpu / (len(signal) / SAMPLE_RATE) * 3600,
+        "p50_ms": float(np.percentile(calls_ms, 50)),
+        "p95_ms": float(np.percentile(calls_ms, 95)),
+        "max_ms": float(calls_ms.max()),
+        "detections": len(detections),
+        "delay_ms": None,
+    }
+    if keyword_end is not None:
+        after = [t for t in detections if t >= keyword_end]
+        if after:
+            result["delay_ms"] = (after[0] - keyword_end) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wav", help="запись (16-bit WAV)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="длина синтетики")
+    parser.add_argument("--keyword-at", type=float, help="конец ключевого слова в записи, сек")
+    parser.add_argument("--kws-model", default=str(config.KWS_MODEL_PATH))
+    args = parser.parse_args()
+
+    signal = load_wav(args.wav) if args.wav else make_signal(args.seconds)
+    block = config.CAPTURE_PROFILES["low_latency"]
+    print(f"audio: {len(signal) / SAMPLE_RATE:.1f}s, block {block} samples")
+    print(f"log-mel frontend: {bench_frontend(signal, block):.2f} CPU s/h")
+
+    engines = {
+        "vosk": WakeWordDetector(),
+        "onnx": OnnxWakeWordDetector(model_path=args.kws_model),
+    }
+    print(f"{'engine':<8}{'CPU s/h':>10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'wakes':>7}{'delay ms':>10}")
+    for name, detector in engines.items():
+        if not detector.load():
+            print(f"{name:<8}  (model not available)")
+            continue
+        r = run(detector, signal, block, args.keyword_at)
+        delay = f"{r['delay_ms']:.0f}" if r["delay_ms"] is not None else "-"
+        print(
+            f"{name:<8}{r['cpu_s_per_hour']:>10.1f}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}"
+            f"{r['max_ms']:>9.2f}{r['detections']:>7}{delay:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
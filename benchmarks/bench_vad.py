@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: стоимость VAD на секунду аудио
+
+Сравнивает текущий VoiceActivityDetector (memoryview, без копий) с
+прежней реализацией на bytes-буфере для разных размеров блока и кадра.
+
+Запуск: python benchmarks/bench_vad.py [--seconds 60]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import webrtcvad
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import make_signal  # noqa: E402
+from src.vad import VoiceActivityDetector  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+class LegacyVAD:
+    """Прежняя реализация: bytes += chunk, срез буфера на каждый кадр"""
+
+    def __init__(self, frame_ms=30):
+        self.vad = webrtcvad.Vad(1)
+        self.samples_per_frame = SAMPLE_RATE * frame_ms // 1000
+        self.buffer = b""
+
+    def process(self, chunk: np.ndarray):
+        self.buffer += chunk.tobytes()
+        frame_size_bytes = self.samples_per_frame * 2
+        result = False
+        while len(self.buffer) >= frame_size_bytes:
+            frame = self.buffer[:frame_size_bytes]
+            self.buffer = self.buffer[frame_size_bytes:]
+            if self.vad.is_speech(frame, SAMPLE_RATE):
+                result = True
+        return result
+
+
+def bench(make_detector, signal: np.ndarray, block: int, repeats: int) -> float:
+    """Микросекунды CPU на секунду аудио (лучший из повторов)"""
+    best = float("inf")
+    for _ in range(repeats):
+        detector = make_detector()
+        start = time.process_time()
+        for i in range(0, len(signal) - block + 1, block):
+            detector.process(signal[i:i + block])
+        best = min(best, time.process_time() - start)
+    return best / (len(signal) / SAMPLE_RATE) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    signal = make_signal(args.seconds)
+    print(f"{'impl':<8}{'frame':>7}{'block':>8}{'us/s audio':>13}")
+    for frame_ms in VoiceActivityDetector.FRAME_SIZES_MS:
+        for block_ms in (30, 250, 1000):
+            block = SAMPLE_RATE * block_ms // 1000
+            for name, make_detector in (
+                ("legacy", lambda: LegacyVAD(frame_ms)),
+                ("current", lambda: VoiceActivityDetector(frame_ms=frame_ms)),
+            ):
+                cost = bench(make_detector, signal, block, args.repeats)
+                print(f"{name:<8}{frame_ms:>5}ms{block_ms:>6}ms{cost:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU фонового прослушивания wake word по режимам Vosk
+
+Прогоняет аудио через тот же путь, что и Assistant в IDLE
+(блоки low_latency -> VAD -> WakeWordDetector.detect), для режимов
+"grammar" и "open" и пересчитывает CPU в секунды на час аудио.
+
+Дополнительно сравнивает сброс распознавателя после срабатывания:
+пересоздание KaldiRecognizer против Reset().
+
+Без --wav используется синтетика (гармонические «слоги» на шуме), которую
+VAD пропускает как речь — худший случай для фонового прослушивания.
+
+Запуск: python benchmarks/bench_wake.py [--wav background.wav] [--seconds 60]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from bench_common import load_wav, make_signal  # noqa: E402
+from src.audio_frame import AudioFrame  # noqa: E402
+from src.vad import VoiceActivityDetector  # noqa: E402
+from src.wake_word import WakeWordDetector  # noqa: E402
+
+SAMPLE_RATE = config.SAMPLE_RATE
+
+
+def run(mode: str, signal: np.ndarray, block: int) -> dict:
+    """Один проход; CPU процесса (Vosk декодирует в вызывающем потоке)"""
+    detector = WakeWordDetector(mode=mode)
+    load_start = time.perf_counter()
+    if not detector.load():
+        raise SystemExit(f"Vosk model not found: {config.VOSK_MODEL_PATH}")
+    load_s = time.perf_counter() - load_start
+
+    vad = VoiceActivityDetector()
+    detections = 0
+    start = time.process_time()
+    for seq, i in enumerate(range(0, len(signal) - block + 1, block)):
+        frame = AudioFrame(signal[i:i + block], i / SAMPLE_RATE, seq, SAMPLE_RATE)
+        frame.vad = vad.process(frame)
+        if detector.detect(frame):
+            detections += 1
+    cpu = time.process_time() - start
+
+    audio_s = len(signal) / SAMPLE_RATE
+    return {
+        "mode": mode,
+        "load_s": load_s,
+        "cpu_s_per_hour": cpu / audio_s * 3600,
+        "rtf": cpu / audio_s,
+        "detections": detections,
+        "detector": detector,
+    }
+
+
+def bench_reset(detector: WakeWordDetector, count: int) -> tuple:
+    """Миллисекунды на сброс: пересоздание распознавателя против Reset()"""
+    start = time.perf_counter()
+    for _ in range(count):
+        detector._create_recognizer()
+    rebuild = (time.perf_counter() - start) / count * 1000
+
+    start = time.perf_counter()
+    for _ in range(count):
+        detector.recognizer.Reset()
+    reset = (time.perf_counter() - start) / count * 1000
+    return rebuild, reset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wav", help="фоновая запись (16-bit WAV)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="длина синтетики")
+    parser.add_argument("--modes", default=",".join(WakeWordDetector.MODES))
+    parser.add_argument("--resets", type=int, default=20, help="повторов в замере сброса")
+    args = parser.parse_args()
+
+    signal = load_wav(args.wav) if args.wav else make_signal(args.seconds)
+    block = config.CAPTURE_PROFILES["low_latency"]
+
+    print(f"audio: {len(signal) / SAMPLE_RATE:.1f}s, block {block} samples")
+    print(
+        f"{'mode':<9}{'load s':>8}{'CPU s/h':>10}{'RTF':>8}{'wakes':>7}"
+        f"{'decodes':>9}{'partials':>10}{'errors':>8}{'rebuild ms':>12}{'Reset ms':>10}"
+    )
+    for mode in args.modes.split(","):
+        r = run(mode.strip(), signal, block)
+        stats = r["detector"].get_stats()
+        rebuild, reset = bench_reset(r["detector"], args.resets)
+        print(
+            f"{r['mode']:<9}{r['load_s']:>8.2f}{r['cpu_s_per_hour']:>10.1f}"
+            f"{r['rtf']:>8.4f}{r['detections']:>7}"
+            f"{stats['decoder_calls']:>9}{stats['partial_checks']:>10}{stats['errors']:>8}"
+            f"{rebuild:>12.2f}{reset:>10.3f}"
+        )
+        if stats["errors"]:
+            print(f"  {r['mode']}: detect() raised {stats['errors']} times, row measures the error path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Wake word benchmark: ложные срабатывания, пропуски, задержка и CPU
+
+Записи из размеченного корпуса прогоняются быстрее реального времени через
+тот же код, что и живой микрофон: PortAudio callback AudioStream -> кольцо
+-> process_pending() (ресемплинг, AudioFrame) -> VAD -> detect(), как
+Assistant в состоянии IDLE. После срабатывания детектор не получает аудио
+--lockout секунд (ассистент в это время слушает команду).
+
+Манифест — JSON-список или JSONL, пути относительно файла манифеста:
+    {"audio": "clips/001.flac", "keywords": [{"start": 1.20, "end": 1.65}]}
+Записи без keywords — негативы (только ложные срабатывания).
+
+Конфигурации — переопределения config через запятую, например:
+    --config WAKE_MODE=grammar --config WAKE_MODE=open,WAKE_MATCH_THRESHOLD=0.8
+    --config WAKE_ENGINE=onnx,KWS_THRESHOLD=0.7
+
+Запуск: python benchmarks/wake_benchmark.py corpus/manifest.json
+        [--config ...] [--device-rate 48000] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from src.audio import AudioStream, decode_audio  # noqa: E402
+from src.vad import VoiceActivityDetector  # noqa: E402
+from src.wake_word import create_wake_detector  # noqa: E402
+
+DEFAULT_CONFIGS = ("WAKE_MODE=grammar", "WAKE_MODE=open")
+
+
+def load_manifest(path: Path) -> list[dict]:
+    """Прочитать манифест (JSON-список или JSONL)"""
+    text = path.read_text(encoding="utf-8").strip()
+    entries = json.loads(text) if text.startswith("[") else [
+        json.loads(line) for line in text.splitlines() if line.strip()
+    ]
+    for entry in entries:
+        entry["path"] = (path.parent / entry["audio"]).resolve()
+        entry.setdefault("keywords", [])
+    return entries
+
+
+def parse_overrides(spec: str) -> dict:
+    """"KEY=VALUE,KEY=VALUE" -> {KEY: value}; значения как JSON, иначе строка"""
+    overrides = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, value = item.partition("=")
+        if not hasattr(config, key):
+            raise SystemExit(f"Unknown config key: {key}")
+        try:
+            overrides[key] = json.loads(value)
+        except json.JSONDecodeError:
+            overrides[key] = value
+    return overrides
+
+
+class WakeRun:
+    """Потребитель AudioStream для одного файла: VAD -> detect, как в IDLE"""
+
+    def __init__(self, detector, lockout: float):
+        self.detector = detector
+        self.vad = VoiceActivityDetector()
+        self.lockout_samples = int(lockout * config.SAMPLE_RATE)
+        self.position = 0  # samples at SAMPLE_RATE consumed so far
+        self.locked_until = 0
+        self.detections = []  # seconds, end of the triggering frame
+
+    def __call__(self, frame, level):
+        self.position += len(frame.samples)
+        frame.vad = self.vad.process(frame)
+        if self.position <= self.locked_until:
+            return
+        if self.detector.detect(frame):
+            self.detections.append(self.position / config.SAMPLE_RATE)
+            self.locked_until = self.position + self.lockout_samples
+
+
+def stream_file(entry: dict, detector, device_rate: int, lockout: float) -> dict:
+    """Прогнать один файл через AudioStream; CPU только на обработку"""
+    path = entry["path"]
+    audio = decode_audio(path.read_bytes(), path.suffix.lstrip(".").lower(), device_rate)
+    pcm = np.clip(audio * 32768.0, -32768, 32767).astype(np.int16)
+
+    detector.reset()
+    consumer = WakeRun(detector, lockout)
+    stream = AudioStream(consumer, device_rate=device_rate)
+    stream._running = True  # consumer side only: no PortAudio stream, no worker thread
+    block = stream._capture_block
+
+    start = time.process_time()
+    for i in range(0, len(pcm) - block + 1, block):
+        stream._audio_callback(pcm[i:i + block, None], block, None, None)
+        stream.process_pending()
+    cpu = time.process_time() - start
+
+    return {
+        "audio": entry["audio"],
+        "duration": len(pcm) / device_rate,
+        "capture_profile": stream.profile,
+        "cpu": cpu,
+        "keywords": entry["keywords"],
+        "detections": consumer.detections,
+    }
+
+
+def score(files: list[dict], tolerance: float) -> dict:
+    """Сопоставить срабатывания с разметкой"""
+    latencies, false_accepts, misses, total_keywords = [], 0, 0, 0
+    for result in files:
+        pending = sorted(result["detections"])
+        for keyword in result["keywords"]:
+            total_keywords += 1
+            hit = next(
+                (t for t in pending if keyword["start"] <= t <= keyword["end"] + tolerance), None
+            )
+            if hit is None:
+                misses += 1
+            else:
+                pending.remove(hit)
+                latencies.append((hit - keyword["end"]) * 1000)
+        false_accepts += len(pending)
+        result["false_accepts"] = len(pending)
+
+    hours = sum(r["duration"] for r in files) / 3600
+    cpu = sum(r["cpu"] for r in files)
+    latency = None
+    if latencies:
+        values = np.array(latencies)
+        latency = {
+            "mean": float(values.mean()),
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "max": float(values.max()),
+        }
+    return {
+        "audio_hours": hours,
+        "keywords": total_keywords,
+        "hits": total_keywords - misses,
+        "misses": misses,
+        "miss_rate": misses / total_keywords if total_keywords else None,
+        "false_accepts": false_accepts,
+        "false_accepts_per_hour": false_accepts / hours if hours else None,
+        "latency_ms": latency,
+        "cpu_s_per_audio_hour": cpu / hours if hours else None,
+        "realtime_factor": cpu / (hours * 3600) if hours else None,
+    }
+
+
+def run_config(spec: str, entries: list[dict], args) -> dict:
+    """Одна конфигурация: переопределить config, загрузить детектор, прогнать корпус"""
+    overrides = parse_overrides(spec)
+    saved = {key: getattr(config, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    try:
+        detector = create_wake_detector()
+        load_start = time.perf_counter()
+        if not detector.load():
+            return {"config": spec, "overrides": overrides, "error": "detector failed to load"}
+        load_s = time.perf_counter() - load_start
+
+        files = [stream_file(entry, detector, args.device_rate, args.lockout) for entry in entries]
+        summary = score(files, args.tolerance)
+        stats = detector.get_stats() if hasattr(detector, "get_stats") else {}
+        # Profile the streams actually ran with (overrides applied, unknown names fall back)
+        capture_profile = files[0]["capture_profile"] if files else config.CAPTURE_PROFILE
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
+
+    if stats.get("errors"):
+        # detect() swallows exceptions: CPU and accuracy of an error path mean nothing
+        return {"config": spec, "overrides": overrides, "detector_stats": stats,
+                "error": f"detector raised {stats['errors']} errors, results invalid"}
+    return {
+        "config": spec,
+        "overrides": overrides,
+        "engine": stats.get("engine"),
+        "capture_profile": capture_profile,
+        "load_s": load_s,
+        **summary,
+        "detector_stats": stats,
+        "files": files if args.per_file else None,
+    }
+
+
+def _cell(value, spec: str) -> str:
+    """Ячейка таблицы: число по формату или «-», если метрики нет"""
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("manifest", type=Path)
+    parser.add_argument("--config", action="append", help="переопределения config (можно несколько)")
+    parser.add_argument("--device-rate", type=int, default=config.SAMPLE_RATE,
+                        help="частота «микрофона» (48000 — с ресемплингом, как на ноутбуке)")
+    parser.add_argument("--lockout", type=float, default=2.0, help="пауза детектора после срабатывания, сек")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="срабатывание засчитывается до end + tolerance, сек")
+    parser.add_argument("--per-file", action="store_true", help="включить результаты по файлам")
+    parser.add_argument("--output", type=Path, help="JSON с результатами")
+    args = parser.parse_args()
+
+    entries = load_manifest(args.manifest)
+    results = [run_config(spec, entries, args) for spec in (args.config or DEFAULT_CONFIGS)]
+
+    print(f"{'config':<40}{'miss':>7}{'FA/h':>8}{'lat p50':>9}{'lat p95':>9}{'CPU s/h':>10}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['config']:<40}  {r['error']}")
+            continue
+        latency = r["latency_ms"] or {}
+        print(
+            f"{r['config']:<40}{_cell(r['miss_rate'], '.1%'):>7}"
+            f"{_cell(r['false_accepts_per_hour'], '.2f'):>8}"
+            f"{_cell(latency.get('p50'), '.0f'):>9}{_cell(latency.get('p95'), '.0f'):>9}"
+            f"{_cell(r['cpu_s_per_audio_hour'], '.1f'):>10}"
+        )
+
+    if args.output:
+        report = {
+            "manifest": str(args.manifest),
+            "device_rate": args.device_rate,
+            "lockout": args.lockout,
+            "tolerance": args.tolerance,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Results: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
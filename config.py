@@ -39,11 +39,71 @@ VOSK_MODEL_PATH = MODELS_DIR / "vosk-model-small-ru-0.22"
 
 # Wake word
 WAKE_WORD = "алёша"
+# "grammar": decoder restricted to the wake variants + [unk] (keyword spotting)
+# "open": full-vocabulary decoding with text matching
+WAKE_MODE = os.getenv("WAKE_MODE", "grammar")
+WAKE_MIN_CONFIDENCE = float(os.getenv("WAKE_MIN_CONFIDENCE", "0.6"))  # grammar mode word conf
+# Fuzzy wake matching: phonetic similarity (0..1) a non-listed word needs.
+# 0.8 also admits one-phoneme slips of the 5-letter wake word ("алиса"!)
+WAKE_MATCH_THRESHOLD = float(os.getenv("WAKE_MATCH_THRESHOLD", "0.85"))
+# Open mode: how often partial hypotheses are fetched and parsed (audio time)
+WAKE_PARTIAL_INTERVAL_MS = int(os.getenv("WAKE_PARTIAL_INTERVAL_MS", "200"))
+
+# Wake engine: "vosk" (Kaldi ASR) or "onnx" (small keyword-spotting model,
+# CPU onnxruntime); Vosk is used as fallback if the ONNX model can't load
+WAKE_ENGINE = os.getenv("WAKE_ENGINE", "vosk")
+KWS_MODEL_PATH = Path(os.getenv("KWS_MODEL_PATH", str(MODELS_DIR / "kws" / "alyosha.onnx")))
+KWS_THRESHOLD = float(os.getenv("KWS_THRESHOLD", "0.8"))  # smoothed keyword posterior
+KWS_KEYWORD_INDEX = 1  # output class of the keyword (0 = background)
+KWS_N_MELS = 40
+KWS_WINDOW_MS = 1000  # feature context per inference (if the model input is dynamic)
+# after a wake the window is cleared and must refill before scoring again
+KWS_HOP_MS = 80  # model is scored every hop
+KWS_SMOOTH_HOPS = 3  # moving average over the last scores
 
 # Audio settings
 SAMPLE_RATE = 16000
 CHANNELS = 1
 CHUNK_SIZE = 4000
+# Capture ring between the PortAudio callback and the consumer thread
+AUDIO_RING_SECONDS = 4.0
+AUDIO_RING_HISTORY_SECONDS = 8.0  # consumed audio kept: pre-roll and the command after a wake word
+# Open the mic at the device's native rate and decimate to SAMPLE_RATE in-process
+CAPTURE_AT_DEVICE_RATE = os.getenv("CAPTURE_AT_DEVICE_RATE", "1") == "1"
+
+# Playback: one persistent output stream; stop() takes effect within one block
+PLAYBACK_BLOCK_MS = 10
+
+# Voice activity detection (WebRTC)
+VAD_FRAME_MS = 30  # 10, 20 or 30
+VAD_ONSET_FRAMES = 2  # consecutive speech frames to enter speech
+VAD_HANGOVER_MS = 300  # speech held after the last voiced frame
+
+# Capture profiles: PortAudio block size in samples
+# low_latency: one VAD frame per block (barge-in/endpoint react within ~30 ms)
+# throughput: large blocks, least per-block Python overhead
+CAPTURE_PROFILES = {
+    "low_latency": SAMPLE_RATE * VAD_FRAME_MS // 1000,
+    "throughput": CHUNK_SIZE,
+}
+CAPTURE_PROFILE = os.getenv("CAPTURE_PROFILE", "low_latency")
+
+# Consumers that need bigger pieces aggregate small blocks
+VOSK_FEED_MS = 100  # audio per Vosk AcceptWaveform call
+LIVE_SEND_MS = 100  # audio per Gemini Live message
+
+# Recording
+MAX_RECORDING_SECONDS = 8.0  # hard cap for one voice request
+PRE_ROLL_SECONDS = float(os.getenv("PRE_ROLL_SECONDS", "0.3"))  # audio kept from before recording starts
+
+# Endpointing (end of utterance from the VAD frame mask)
+ENDPOINT_LEADING_TIMEOUT = 3.0  # give up if no speech starts within this time
+ENDPOINT_TRAILING_SILENCE = float(os.getenv("ENDPOINT_TRAILING_SILENCE", "0.5"))
+ENDPOINT_MIN_SPEECH = 0.09  # shorter bursts (clicks) do not start an utterance
+
+# Live mode: only stream speech (plus a hangover) to Gemini
+LIVE_VAD_GATING = os.getenv("LIVE_VAD_GATING", "1") == "1"
+LIVE_GATE_HANGOVER_SECONDS = 1.0
 BEEP_SOUND = SOUNDS_DIR / "beep.wav"
 
 # UI settings
@@ -61,6 +121,19 @@ MAX_MEMORY_MESSAGES = 500
 # TTS Engine: "auto" (Piper offline, ElevenLabs if API key), "piper", "elevenlabs"
 TTS_ENGINE = os.getenv("TTS_ENGINE", "auto")
 
+# Sentence-pipelined TTS: the first chunk plays while the next ones synthesize
+TTS_PIPELINE = os.getenv("TTS_PIPELINE", "1") == "1"
+TTS_FIRST_CHUNK_CHARS = 80  # short first chunk = early first audio
+TTS_CHUNK_CHARS = 250
+TTS_MIN_CHUNK_CHARS = 10  # shorter pieces are merged with the next one
+
+# Synthesized phrases cache (confirmations, errors, greetings repeat a lot)
+TTS_CACHE = os.getenv("TTS_CACHE", "1") == "1"
+TTS_CACHE_DIR = DATA_DIR / "tts_cache"
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DISK_MB = int(os.getenv("TTS_CACHE_DISK_MB", "256"))
+TTS_CACHE_MAPPED_ENTRIES = 64  # open memmaps of disk hits, not counted in the memory budget
+
 # Piper TTS (free, offline)
 PIPER_VOICE = os.getenv("PIPER_VOICE", "ru_RU-dmitri-medium")  # dmitri or irina
 PIPER_MODEL_PATH = MODELS_DIR / "piper" / f"{PIPER_VOICE}.onnx"
@@ -68,6 +141,52 @@ PIPER_CONFIG_PATH = MODELS_DIR / "piper" / f"{PIPER_VOICE}.onnx.json"
 
 # Whisper STT model size: "tiny", "small", "medium", "large-v3"
 WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "small")
+STT_READY_TIMEOUT = 120.0  # max wait for Whisper when a wake fires during startup
+
+# Two-stage STT: the draft model decodes first, WHISPER_MODEL_SIZE re-decodes
+# only when a draft segment is unsure. "" = single model
+WHISPER_DRAFT_MODEL_SIZE = os.getenv("WHISPER_DRAFT_MODEL_SIZE", "tiny")
+STT_DRAFT_MIN_LOGPROB = float(os.getenv("STT_DRAFT_MIN_LOGPROB", "-0.5"))  # segment avg_logprob below -> re-decode
+STT_DRAFT_MAX_NO_SPEECH = float(os.getenv("STT_DRAFT_MAX_NO_SPEECH", "0.5"))  # segment no_speech_prob above -> re-decode
+
+# STT autotune (src/stt_autotune.py): on first run, time a reference clip across
+# model sizes, cpu_threads and compute types in the background while the
+# assistant is idle; result in STT_TUNING_FILE, applied from the next start.
+# WHISPER_MODEL_SIZE set in the environment pins the size
+STT_AUTOTUNE = os.getenv("STT_AUTOTUNE", "1") == "1"
+WHISPER_MODEL_SIZE_PINNED = "WHISPER_MODEL_SIZE" in os.environ
+STT_TUNING_FILE = DATA_DIR / "stt_tuning.json"
+STT_TUNING_CLIP = Path(os.getenv("STT_TUNING_CLIP", str(DATA_DIR / "stt_reference.wav")))
+STT_TUNING_TARGET_RTF = float(os.getenv("STT_TUNING_TARGET_RTF", "0.3"))  # decode time / audio time
+STT_TUNING_SIZES = ("tiny", "base", "small", "medium")  # only already downloaded ones are tried
+STT_TUNING_COMPUTE_TYPES = ("int8", "int8_float32")
+STT_TUNING_MAX_SECONDS = 180.0  # calibration time budget, pauses not counted
+
+# Streaming STT: decode the growing recording while the user speaks,
+# commit words two consecutive windows agree on (LocalAgreement)
+STREAMING_STT = os.getenv("STREAMING_STT", "1") == "1"
+STREAMING_STT_INTERVAL = 1.0  # seconds of new audio between window decodes
+STREAMING_STT_MIN_AUDIO = 1.0  # first window needs at least this much audio
+STREAMING_STT_MARGIN = 0.2  # window starts this much before the last committed word end
+
+# Vosk fast path: a short command Vosk decoded with high word confidence
+# is used as is, Whisper is skipped (src/vosk_fastpath.py)
+VOSK_FAST_PATH = os.getenv("VOSK_FAST_PATH", "1") == "1"
+VOSK_FAST_MIN_CONF = float(os.getenv("VOSK_FAST_MIN_CONF", "0.9"))  # every word at least this
+VOSK_FAST_MIN_WORDS = 1
+VOSK_FAST_MAX_WORDS = 6  # longer requests go to Whisper
+
+# Before Whisper: cut the recording to the VAD speech span (endpointer times)
+# plus this padding; after Whisper: drop hallucinated or silent transcripts
+SPEECH_TRIM_PADDING = 0.25  # seconds kept around the speech
+TRANSCRIPT_MAX_NO_SPEECH = float(os.getenv("TRANSCRIPT_MAX_NO_SPEECH", "0.8"))
+TRANSCRIPT_SOUND_WORD_NO_SPEECH = 0.4  # bare "музыка"/"тишина" is junk only above this
+
+# Log-mel for Whisper computed block by block during recording (features.WhisperLogMel)
+WHISPER_STREAM_FEATURES = os.getenv("WHISPER_STREAM_FEATURES", "1") == "1"
+WHISPER_TRIM_SILENCE = os.getenv("WHISPER_TRIM_SILENCE", "1") == "1"  # cut silent edges before encoding
+WHISPER_TRIM_DB = 45.0  # frames this far below the loudest one count as silence
+WHISPER_TRIM_MARGIN = 0.3  # seconds kept around the speech when trimming
 
 
 def validate_config() -> tuple[bool, list[str]]:
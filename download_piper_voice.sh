@@ -37,4 +37,4 @@ echo ""
 echo "✓ Piper voice downloaded successfully!"
 echo "  Model: $MODELS_DIR/${VOICE}.onnx"
 echo ""
-echo "Now install piper: pip install piper-tts"
+echo "Now install piper: pip install 'piper-tts>=1.3.0'"
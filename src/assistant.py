@@ -8,18 +8,35 @@ import time
 import logging
 import asyncio
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import Enum, auto
 from PyQt6.QtCore import QObject, pyqtSignal
 
+import config
+
 from .llm import LLM
 from .live_client import GeminiLiveClient
-from .wake_word import WakeWordDetector
+from .wake_word import create_wake_detector
+from .vad import VoiceActivityDetector
+from .endpointer import Endpointer, EndpointEvent
 from .stt import STT
+from .streaming_stt import StreamingTranscriber
+from .vosk_fastpath import VoskCommand, VoskFastPath
+from .transcript_filter import TranscriptFilter
+from .tts_pipeline import SpeechPipeline
 from .tts import TTS
+from .tts_cache import TTSCache
 from .memory import Memory
 from .personal_memory import PersonalMemory
 from .executor import CommandExecutor
-from .audio import AudioStream, AudioRecorder, AudioPlayer, StreamPlayer
+from .audio import (
+    AudioStream,
+    AudioRecorder,
+    AudioPlayer,
+    StreamPlayer,
+    get_engine,
+)
+from .audio_frame import AudioFrame
 # Tools, SystemControl, config removed as unused in imports (Tools/SystemControl moved to tools_def/executor logic, or re-verify usage)
 # Wait, check providing code if they are used deeper.
 # Looking at previous _process_request, executor is used. Tools class was used in _execute_tool which is now deleted.
@@ -55,6 +72,9 @@ class Assistant(QObject):
     model_changed = pyqtSignal(str, str)  # mode (Auto/Manual), model_name
     barge_in_occurred = pyqtSignal()  # TTS was interrupted
     wake_word_detected = pyqtSignal()  # Wake word "Алёша" heard
+    model_loaded = pyqtSignal(str, float, bool)  # name, seconds, success
+    wake_ready = pyqtSignal()  # Vosk loaded: wake word can run before Whisper is ready
+    partial_transcript = pyqtSignal(str)  # live caption while the user is speaking
 
     def __init__(self):
         super().__init__()
@@ -65,7 +85,8 @@ class Assistant(QObject):
         self.llm = LLM()
         self.live_client = GeminiLiveClient()  # Native WebSocket Client
         self.live_loop = None  # AsyncIO Loop for Real-time thread
-        self.wake_word = WakeWordDetector()
+        self.wake_word = create_wake_detector()  # Vosk or ONNX KWS (config.WAKE_ENGINE)
+        self.vad = VoiceActivityDetector()
         self.stt = STT()
         self.tts = TTS()
         self.memory = Memory()
@@ -75,42 +96,101 @@ class Assistant(QObject):
         # Audio components
         self.audio_stream = None
         self.audio_recorder = AudioRecorder()
+        self.playback = get_engine()  # shared output stream (lazily opened)
+        self.current_playback = None  # PcmSource of the reply being spoken
+        self.tts_cache = TTSCache() if config.TTS_CACHE else None
+        self.speech = SpeechPipeline(self.tts, self.playback, self.tts_cache)
         self.audio_player = AudioPlayer()
         self.stream_player = StreamPlayer()
 
         # Recording state
         self.is_recording = False
-        self.silence_start = None
-        self.max_silence = 2.0  # seconds
-        self.min_recording = 0.5  # seconds
+        self.endpointer = Endpointer()  # pluggable: reset() + process(VadDecision)
+        self.last_endpoint = None  # EndpointEvent of the last recording
+        self.beep_on_listen = True  # False when the command follows the wake word in one breath
+        self.streaming_stt = None  # StreamingTranscriber of the current recording
+        self.fast_path = VoskFastPath()  # Vosk transcript of the command, skips Whisper if confident
+        self._whisper_rtf = None  # measured Whisper seconds per audio second (saved-latency estimate)
+        self.last_stt_report = None  # {"path", "reason", "audio", "stt_time", "saved"}
+        self.transcript_filter = TranscriptFilter()
+        self._endpoint_offset = 0  # recording samples before the endpointer's first frame (pre-roll)
+        self._llm_latency = None  # running first-call LLM latency, what a dropped transcript saves
+        self.pipeline_stats = {
+            "trimmed_seconds": 0.0,  # silence cut by the VAD span before STT
+            "vad_skipped": 0,  # recordings without speech, not transcribed
+            "dropped_llm_saved": 0.0,  # LLM time not spent on dropped transcripts
+        }
         self.recording_start = 0
         self.speaking_start = 0
-        self.noise_floor = 0.1  # Initial noise floor assumption
         self.input_mode = "text"  # "text" or "voice" - controls TTS output
+        self.live_last_speech = 0.0  # timestamp of last speech frame sent to Live
+        self._live_pending = bytearray()
+        self._live_send_bytes = int(config.SAMPLE_RATE * config.LIVE_SEND_MS / 1000) * 2
 
         # Threading
         self._running = False
         self._lock = threading.Lock()
+        self._stt_ready = threading.Event()  # set once Whisper finished loading
 
     def load_models(self) -> tuple[bool, list[str]]:
-        """Загрузить все модели"""
-        errors = []
+        """
+        Загрузить все модели параллельно
 
-        # Load wake word detector
-        if not self.wake_word.load():
-            errors.append("Не удалось загрузить модель Vosk")
+        Wake word включается, как только готов его движок (сигнал wake_ready),
+        не дожидаясь Whisper. Время загрузки каждой модели уходит в UI
+        через model_loaded.
+        """
+        errors = []
+        wake_name = self.wake_word.name
+        loaders = {
+            wake_name: (self.wake_word.load, f"Не удалось загрузить модель {wake_name}"),
+            "Whisper": (self.stt.load, "Не удалось загрузить модель Whisper"),
+            # TTS is optional: load() always returns True, just logs if disabled
+            "TTS": (self.tts.load, None),
+        }
+
+        with ThreadPoolExecutor(
+            max_workers=len(loaders), thread_name_prefix="ModelLoader"
+        ) as pool:
+            futures = {
+                pool.submit(self._timed_load, loader): name
+                for name, (loader, _) in loaders.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                ok, elapsed = future.result()
+                logger.info(f"Model {name} loaded in {elapsed:.2f}s (ok={ok})")
+                self.model_loaded.emit(name, elapsed, ok)
+
+                if name == "Whisper":
+                    self._stt_ready.set()  # release queued recordings either way
+                elif name == wake_name and ok:
+                    self.wake_ready.emit()
+
+                error = loaders[name][1]
+                if not ok and error:
+                    errors.append(error)
 
-        # Load STT
-        if not self.stt.load():
-            errors.append("Не удалось загрузить модель Whisper")
+        return len(errors) == 0, errors
 
-        # Load TTS (optional, not critical)
-        self.tts.load()  # Always returns True now, just logs if disabled
+    @staticmethod
+    def _timed_load(loader) -> tuple[bool, float]:
+        start = time.perf_counter()
+        try:
+            ok = bool(loader())
+        except Exception as e:
+            logger.error(f"Model load error: {e}")
+            ok = False
+        return ok, time.perf_counter() - start
 
-        return len(errors) == 0, errors
+    @property
+    def is_running(self) -> bool:
+        return self._running
 
     def start(self):
         """Запустить ассистента"""
+        if self._running:
+            return
         self._running = True
 
         # Start audio stream
@@ -119,12 +199,22 @@ class Assistant(QObject):
 
         self._set_state(AssistantState.IDLE)
 
+    def set_capture_profile(self, profile: str):
+        """Переключить профиль захвата (low_latency / throughput)"""
+        if self.audio_stream:
+            self.audio_stream.set_profile(profile)
+        else:
+            config.CAPTURE_PROFILE = profile
+
     def stop(self):
         """Остановить ассистента"""
         self._running = False
 
         if self.audio_stream:
             self.audio_stream.stop()
+        if self.streaming_stt:
+            self.streaming_stt.cancel()
+        self.fast_path.cancel()
 
         self.audio_player.stop()
 
@@ -168,6 +258,10 @@ class Assistant(QObject):
         """Изменить состояние"""
         with self._lock:
             self.state = state
+        if state in (AssistantState.IDLE, AssistantState.ERROR):
+            self.stt.idle.set()
+        else:
+            self.stt.idle.clear()  # STT calibration pauses until the request is done
         self.state_changed.emit(state)
 
     def set_forced_model(self, mode: str):
@@ -190,6 +284,7 @@ class Assistant(QObject):
         try:
             self._set_state(AssistantState.REALTIME_SESSION)
             self.message_received.emit("system", "Запуск режима Live... ⚡")
+            self._live_pending.clear()
 
             # Setup callbacks
             self.live_client.on_audio_data = self._on_live_audio
@@ -268,8 +363,8 @@ class Assistant(QObject):
         if self.stream_player:
             self.stream_player.write(pcm_data)
 
-    def _audio_callback(self, audio_chunk: np.ndarray, level: float):
-        """Callback для обработки аудио"""
+    def _audio_callback(self, frame: AudioFrame, level: float):
+        """Callback для обработки аудио (поток-потребитель AudioStream)"""
         if not self._running:
             return
 
@@ -278,38 +373,43 @@ class Assistant(QObject):
 
         current_state = self.state
 
+        # VAD runs exactly once per block; the decision travels with the frame
+        frame.vad = self.vad.process(frame)
+
         # === REAL-TIME MODE ===
         if current_state == AssistantState.REALTIME_SESSION:
-            # Send everything directly to Gemini
-            # Convert float32 back to int16 PCM bytes
-            pcm_int16 = (audio_chunk * 32767).astype(np.int16).tobytes()
+            # Gate silence: send speech plus a short hangover so the server
+            # still sees the pause that ends the turn
+            if config.LIVE_VAD_GATING:
+                if frame.vad.is_speech:
+                    self.live_last_speech = frame.timestamp
+                elif frame.timestamp - self.live_last_speech > config.LIVE_GATE_HANGOVER_SECONDS:
+                    return
+
+            # Send directly to Gemini (frame is already int16 PCM),
+            # aggregating small capture blocks into LIVE_SEND_MS messages
+            self._live_pending += frame.bytes
+            if len(self._live_pending) < self._live_send_bytes:
+                return
+            pcm = bytes(self._live_pending)
+            self._live_pending.clear()
 
             # Fire and forget (async send)
             if self.live_loop and self.live_loop.is_running():
                 asyncio.run_coroutine_threadsafe(
-                    self.live_client.send_audio(pcm_int16), self.live_loop
+                    self.live_client.send_audio(pcm), self.live_loop
                 )
             return
         # ======================
 
-        # Check VAD lazily
-
-        is_speech = False
-        if getattr(self, "wake_word", None) and getattr(self.wake_word, "vad", None):
-            is_speech = self.wake_word.vad.is_speech(audio_chunk)
-        elif getattr(self, "vad", None):
-            is_speech = self.vad.is_speech(audio_chunk)
-        else:
-            from src.vad import VoiceActivityDetector
-
-            self.vad = VoiceActivityDetector()
-            is_speech = self.vad.is_speech(audio_chunk)
+        is_speech = frame.vad.is_speech
 
         if current_state == AssistantState.IDLE:
             # Check for wake word
-            if self.wake_word.detect(audio_chunk):
+            if self.wake_word.detect(frame):
                 self.wake_word_detected.emit()  # Notify UI for pulsation effect
-                self._start_listening()
+                # "Алёша, выключи звук": the command may already be in the ring
+                self._start_listening(carry=self._audio_after_wake(frame))
 
         elif current_state == AssistantState.SPEAKING:
             # Barge-in logic (VAD based)
@@ -323,82 +423,245 @@ class Assistant(QObject):
                 self._start_listening()
 
         elif current_state == AssistantState.LISTENING:
-            self.audio_recorder.add_chunk(audio_chunk)
-            current_level = self.audio_recorder.get_audio_level(audio_chunk)
+            self.audio_recorder.add_chunk(frame)
+            if self.audio_recorder.is_recording:
+                self.fast_path.feed(frame.samples)
+
+            # Endpointing on VAD frame boundaries
+            event = self.endpointer.process(frame.vad)
+            if event is None and self.audio_recorder.is_full:
+                # Safety net: recorder capacity is the hard cap
+                event = self.endpointer.finish(EndpointEvent.MAX_LENGTH)
+
+            if event:
+                self.last_endpoint = event
+                logger.info(f"End of utterance: {event}")
+                self._stop_listening()
 
-            # Adaptive Noise Cancellation Logic 2026 (faster adaptation)
-            # Update noise floor (adapt quickly to environment)
-            self.noise_floor = self.noise_floor * 0.95 + current_level * 0.05
+    def _audio_after_wake(self, frame: AudioFrame) -> np.ndarray | None:
+        """Аудио после конца wake word (уже в кольце истории), если известно"""
+        detection = self.wake_word.last_detection or {}
+        end = detection.get("end_position")
+        if end is None or frame.position is None or not self.audio_stream:
+            return None
+        count = frame.position + len(frame) - end
+        if count <= 0:
+            return None
+        return self.audio_stream.history.tail(count)
+
+    def _start_listening(self, carry: np.ndarray = None):
+        """
+        Начать запись (voice mode - TTS enabled)
 
-            # Dynamic threshold: meaningful jump above floor
-            threshold = self.noise_floor + 0.12  # Lower threshold for faster detection
+        Args:
+            carry: Аудио, сказанное сразу после wake word; становится
+                началом записи и сразу проходит через endpointer
+        """
+        self.input_mode = "voice"
+        self.endpointer.reset()
+        event = None
+
+        if carry is not None and len(carry):
+            self.audio_recorder.start_recording(carry=carry)
+            self._endpoint_offset = 0
+            # Fresh VAD: the endpointer needs the raw mask of the carried audio
+            event = self.endpointer.process(VoiceActivityDetector().process(carry))
+            # Command already under way: no earcon over the user's speech
+            self.beep_on_listen = not self.endpointer.in_speech
+            logger.info(
+                f"Wake + command: {len(carry) / config.SAMPLE_RATE:.2f}s carried "
+                f"(speech={self.endpointer.in_speech})"
+            )
+        else:
+            # Pre-roll: keep the audio captured right before recording starts
+            pre_roll = None
+            if self.audio_stream:
+                pre_roll = self.audio_stream.history.tail(self.audio_recorder.pre_roll_samples)
+            self.audio_recorder.start_recording(pre_roll)
+            self._endpoint_offset = len(self.audio_recorder.audio_buffer)
+            self.beep_on_listen = True
 
-            # Debug (less frequent to avoid spam)
-            if time.time() % 3 < 0.2:
-                logger.debug(
-                    f"Lvl:{current_level:.2f} Floor:{self.noise_floor:.2f} Thr:{threshold:.2f}"
-                )
+        self.recording_start = time.time()
+        self.fast_path.start(self._vosk_model(), self.audio_recorder.audio_buffer)
+        self._start_streaming_stt()
+        self._set_state(AssistantState.LISTENING)
 
-            # Silence detection
-            if current_level < threshold:
-                if self.silence_start is None:
-                    self.silence_start = time.time()
-
-                # FAST silence detection: stop quickly once user stops speaking
-                duration = time.time() - self.recording_start
-                silence_duration = time.time() - self.silence_start
-
-                # Aggressive silence thresholds for 2026-level responsiveness
-                required_silence = 0.6 if duration < 2.0 else 0.4  # Was 1.5/0.8
-
-                if silence_duration > required_silence:
-                    if duration > self.min_recording:
-                        logger.info(
-                            f"Silence detected ({silence_duration:.1f}s), stopping."
-                        )
-                        self._stop_listening()
-            else:
-                self.silence_start = None
-
-            # Hard timeout 8s (was 10s)
-            if time.time() - self.recording_start > 8.0:
-                self._stop_listening()
+        if event:
+            # The whole command was spoken before the wake fired
+            self.last_endpoint = event
+            logger.info(f"End of utterance (carried): {event}")
+            self._stop_listening()
 
-    def _start_listening(self):
-        """Начать запись (voice mode - TTS enabled)"""
-        self.input_mode = "voice"
-        self._set_state(AssistantState.LISTENING)
-        self.audio_recorder.start_recording()
-        self.silence_start = None
-        self.recording_start = time.time()
+    def _vosk_model(self):
+        """Модель Vosk детектора wake word (для быстрого пути), если загружена"""
+        detector = self.wake_word
+        if getattr(detector, "using_fallback", False):
+            detector = detector.fallback
+        return getattr(detector, "model", None)
+
+    def _start_streaming_stt(self):
+        """Распознавать запись по ходу речи (если Whisper уже загружен)"""
+        if self.streaming_stt:
+            self.streaming_stt.cancel()
+        self.streaming_stt = None
+        if config.STREAMING_STT and self.stt.is_loaded:
+            self.streaming_stt = StreamingTranscriber(
+                self.stt, self.audio_recorder, on_partial=self.partial_transcript.emit
+            )
+            self.streaming_stt.start()
 
     def _stop_listening(self):
         """Остановить запись и обработать"""
         audio = self.audio_recorder.stop_recording()
+        features = self.audio_recorder.take_features()  # log-mel computed while recording
+        command = self.fast_path.finish()
+        streaming, self.streaming_stt = self.streaming_stt, None
+        # Manual stop has no endpoint event yet: close it to get the speech span
+        self.last_endpoint = self.endpointer.event or self.endpointer.finish(EndpointEvent.MANUAL)
+        # Streaming word times are relative to the recording start: keep it
+        audio, features = self._trim_to_speech(
+            audio, features, self.last_endpoint, keep_start=streaming is not None
+        )
         self._set_state(AssistantState.THINKING)
 
         # Process in background thread
-        threading.Thread(target=self._process_audio, args=(audio,), daemon=True).start()
+        threading.Thread(
+            target=self._process_audio, args=(audio, streaming, features, command), daemon=True
+        ).start()
+
+    def _trim_to_speech(
+        self, audio: np.ndarray, features: np.ndarray, event: EndpointEvent, keep_start: bool = False
+    ) -> tuple:
+        """
+        Оставить от записи речь по маске VAD (времена endpointer) с запасом
 
-    def _process_audio(self, audio: np.ndarray):
+        Returns:
+            (аудио, log-mel) — пустое аудио, если речи по VAD не было
+        """
+        if event.reason == EndpointEvent.NO_SPEECH:
+            self.pipeline_stats["vad_skipped"] += 1
+            logger.info("No speech by VAD: recording not transcribed")
+            return audio[:0], None
+        if event.speech_start is None:
+            return audio, features
+
+        sr = config.SAMPLE_RATE
+        hop = self.audio_recorder.mel.hop_length if self.audio_recorder.mel else 1
+        pad = config.SPEECH_TRIM_PADDING
+        start = 0 if keep_start else max(0, self._endpoint_offset + int((event.speech_start - pad) * sr))
+        start -= start % hop  # whole log-mel frames: the features stay aligned
+        end = min(len(audio), self._endpoint_offset + int((event.speech_end + pad) * sr))
+        if start == 0 and end == len(audio):
+            return audio, features
+
+        trimmed = audio[start:end]
+        if features is not None:
+            first = start // hop
+            features = features[:, first:first + len(trimmed) // hop + 1]
+        self.pipeline_stats["trimmed_seconds"] += (len(audio) - len(trimmed)) / sr
+        logger.info(
+            f"Trimmed to speech: {len(trimmed) / sr:.2f}s of {len(audio) / sr:.2f}s "
+            f"({self.pipeline_stats['trimmed_seconds']:.1f}s total)"
+        )
+        return trimmed, features
+
+    def _process_audio(
+        self,
+        audio: np.ndarray,
+        streaming: StreamingTranscriber = None,
+        features: np.ndarray = None,
+        command: VoskCommand = None,
+    ):
         """Обработать записанное аудио"""
         if len(audio) == 0:
+            if streaming:
+                streaming.cancel()
             self._set_state(AssistantState.IDLE)
             return
 
-        # Transcribe
-        text = self.stt.transcribe(audio)
+        if command and command.accepted:
+            # Vosk already has the short command with confident words: no Whisper pass
+            if streaming:
+                streaming.cancel()
+            self._report_stt("vosk", len(audio), 0.0, command)
+            text = command.text[:1].upper() + command.text[1:]
+            self.message_received.emit("user", text)
+            self._process_request(text)
+            return
+
+        # Wake fired before Whisper finished loading: queue until it is ready
+        if not self._stt_ready.is_set():
+            logger.info("Whisper still loading, recording queued")
+            self._stt_ready.wait(timeout=config.STT_READY_TIMEOUT)
+        if not self.stt.is_loaded:
+            self.error_occurred.emit("Распознавание речи недоступно")
+            self._set_state(AssistantState.IDLE)
+            return
+
+        # Transcribe: with streaming only the tail after the committed words is left
+        started = time.perf_counter()
+        if streaming:
+            text = streaming.finish(audio, features)
+        else:
+            text = self.stt.transcribe(audio, features=features)
+        self._report_stt("whisper", len(audio), time.perf_counter() - started, command)
 
         if not text.strip():
             self._set_state(AssistantState.IDLE)
             return
 
+        # Hallucinated outros and silence never reach the LLM. With committed
+        # streaming words the last decode covered only the tail: no_speech n/a
+        no_speech = None if streaming and streaming.committed else self.stt.last_no_speech_prob
+        text, dropped = self.transcript_filter.clean(text, no_speech)
+        if dropped:
+            if self._llm_latency:
+                self.pipeline_stats["dropped_llm_saved"] += self._llm_latency
+            logger.info(
+                f"Request dropped ({dropped}), ~{self._llm_latency or 0:.1f}s LLM saved; "
+                f"{self.transcript_filter.get_stats()['dropped']}"
+            )
+            self._set_state(AssistantState.IDLE)
+            return
+
         # Emit user message
         self.message_received.emit("user", text)
 
         # Process request
         self._process_request(text)
 
+    def _report_stt(self, path: str, samples: int, stt_time: float, command: VoskCommand = None):
+        """Записать, какой путь распознавания выбран и сколько времени сэкономлено"""
+        audio = samples / config.SAMPLE_RATE
+        saved = None
+        if path == "whisper":
+            # Running estimate of what a Whisper pass costs per second of audio
+            if audio > 0:
+                rtf = stt_time / audio
+                self._whisper_rtf = rtf if self._whisper_rtf is None else 0.8 * self._whisper_rtf + 0.2 * rtf
+        elif self._whisper_rtf is not None:
+            saved = self._whisper_rtf * audio
+        elif self.stt.tuning:
+            saved = self.stt.tuning["rtf"] * audio
+
+        self.last_stt_report = {
+            "path": path,
+            "reason": command.reason if command else None,
+            "audio": round(audio, 2),
+            "stt_time": round(stt_time, 3),
+            "saved": None if saved is None else round(saved, 3),
+        }
+        if path == "vosk":
+            saved_text = f"~{saved * 1000:.0f} ms saved" if saved is not None else "saved time unknown"
+            logger.info(
+                f"STT path: vosk ({len(command.words)} words, min conf {command.min_conf:.2f}), {saved_text}"
+            )
+        else:
+            logger.info(
+                f"STT path: whisper {stt_time * 1000:.0f} ms for {audio:.1f}s"
+                + (f" (vosk: {command.reason})" if command else "")
+            )
+
     def _process_request(self, text: str, image_path: str = ""):
         """
         Orchestrator Loop: The Brain of Alyosha
@@ -425,12 +688,16 @@ class Assistant(QObject):
                 # 1. THINK
                 # We ask the LLM what to do next
                 # We pass the full context (history + intermediate tool results)
+                llm_start = time.perf_counter()
                 response = self.llm.chat(
                     text,  # Original user query (or updated prompt if needed, but usually history handles it)
                     context,
                     current_image,
                     user_profile,
                 )
+                if step == 1:
+                    latency = time.perf_counter() - llm_start
+                    self._llm_latency = latency if self._llm_latency is None else 0.8 * self._llm_latency + 0.2 * latency
 
                 # Extract response parts
                 if not response.parts:
@@ -587,15 +854,23 @@ class Assistant(QObject):
         logger.info(f"Speaking: {text[:30]}...")
 
         try:
-            # Generate full audio (more reliable than streaming)
-            audio_bytes = self.tts.synthesize(text)
-
-            if audio_bytes:
-                # Play using ffplay (handles both WAV and MP3)
-                audio_format = self.tts.output_format  # "wav" or "mp3"
-                self._play_audio(audio_bytes, audio_format)
-            else:
-                logger.warning("No audio generated")
+            # Sentence by sentence: playback starts after the first one is synthesized
+            source = self.speech.start(text)
+            if source:
+                self.current_playback = source
+                # Returns as soon as the last chunk ends or stop_speaking() stops it
+                source.wait()
+                self.current_playback = None
+                stats = self.speech.last_stats
+                if not stats["spoken"] and not stats["cancelled"]:
+                    logger.warning("No audio generated")
+                else:
+                    first = stats["first_audio"]
+                    logger.info(
+                        f"TTS: {stats['spoken']}/{stats['chunks']} chunks ({stats['cached']} cached), "
+                        f"first audio {first * 1000:.0f} ms" if first is not None
+                        else "TTS: cancelled before first audio"
+                    )
 
         except Exception as e:
             logger.error(f"Speech error: {e}")
@@ -605,55 +880,9 @@ class Assistant(QObject):
 
     def stop_speaking(self):
         """Остановить речь"""
-        if hasattr(self, "current_playback_process") and self.current_playback_process:
-            try:
-                self.current_playback_process.terminate()
-                self.current_playback_process.wait(timeout=0.2)
-            except Exception:
-                self.current_playback_process.kill()
-            self.current_playback_process = None
+        playback = self.current_playback
+        if playback:
+            # Silenced within one output block of the playback engine
+            playback.stop()
+            self.current_playback = None
         self._set_state(AssistantState.IDLE)
-
-    def _play_audio(self, audio_bytes: bytes, audio_format: str = "wav"):
-        """Воспроизвести аудио (WAV или MP3, прерываемо)"""
-        try:
-            import tempfile
-            import subprocess
-
-            suffix = f".{audio_format}"
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
-                f.write(audio_bytes)
-                temp_path = f.name
-
-            # Use Popen instead of run to be non-blocking/interruptible
-            self.current_playback_process = subprocess.Popen(
-                ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", temp_path],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-
-            # Wait for finish loop (blocking this thread but checking for interruption)
-            while (
-                self.current_playback_process
-                and self.current_playback_process.poll() is None
-            ):
-                if self.state != AssistantState.SPEAKING:
-                    # External interruption
-                    if self.current_playback_process:
-                        self.current_playback_process.terminate()
-                    break
-                time.sleep(0.05)
-
-            self.current_playback_process = None
-
-            # Cleanup temp file
-            try:
-                import os
-
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            except OSError:
-                pass
-
-        except Exception as e:
-            logger.error(f"Playback error: {e}")
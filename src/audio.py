@@ -3,42 +3,139 @@ Alyosha Audio Utilities
 Запись и воспроизведение аудио
 """
 
+import io
+import logging
+import threading
+import time
+import wave
 import numpy as np
 import sounddevice as sd
 from collections import deque
 import config
-import subprocess
+from .ring_buffer import AudioRingBuffer
+from .audio_frame import AudioFrame
+from .features import WhisperLogMel
+from .resample import PolyphaseResampler, resample
+
+logger = logging.getLogger(__name__)
+
+
+def device_sample_rate(kind: str, fallback: int) -> int:
+    """
+    Родная частота устройства по умолчанию
+
+    Args:
+        kind: "input" или "output"
+        fallback: Частота, если устройство недоступно
+    """
+    try:
+        return int(sd.query_devices(kind=kind)["default_samplerate"])
+    except Exception as e:
+        logger.warning(f"Cannot query {kind} device rate: {e}")
+        return fallback
 
 
 class AudioRecorder:
-    """Запись аудио с микрофона"""
+    """
+    Запись аудио с микрофона
 
-    def __init__(self):
+    Пишет в один предвыделенный int16 буфер, размер которого ограничен
+    максимальной длительностью записи. Буферов два: представление,
+    возвращённое stop_recording(), остаётся валидным, пока следующая
+    запись заполняет другой буфер. Рядом по мере записи считается log-mel
+    для Whisper (WHISPER_STREAM_FEATURES), см. take_features().
+    """
+
+    def __init__(self, max_duration: float = None, pre_roll: float = None):
         self.sample_rate = config.SAMPLE_RATE
         self.channels = config.CHANNELS
         self.chunk_size = config.CHUNK_SIZE
         self.is_recording = False
-        self.audio_buffer = []
+        self.is_full = False
 
-    def start_recording(self):
-        """Начать запись"""
+        self.max_duration = max_duration or config.MAX_RECORDING_SECONDS
+        self.pre_roll = config.PRE_ROLL_SECONDS if pre_roll is None else pre_roll
+        self.pre_roll_samples = int(self.sample_rate * self.pre_roll)
+        self.max_samples = (
+            int(self.sample_rate * self.max_duration) + self.pre_roll_samples
+        )
+
+        self._buffers = [np.zeros(self.max_samples, dtype=np.int16) for _ in range(2)]
+        self._active = 0
+        self._length = 0
+        self.mel = WhisperLogMel(self.max_samples, self.sample_rate) if config.WHISPER_STREAM_FEATURES else None
+        self._mel_lock = threading.Lock()  # push (audio thread) vs take_features (UI stop)
+
+    @property
+    def audio_buffer(self) -> np.ndarray:
+        """Записанное на данный момент аудио (без копирования)"""
+        return self._buffers[self._active][: self._length]
+
+    @property
+    def duration(self) -> float:
+        """Длительность записи в секундах (включая pre-roll)"""
+        return self._length / self.sample_rate
+
+    def start_recording(self, pre_roll: np.ndarray = None, carry: np.ndarray = None):
+        """
+        Начать запись
+
+        Args:
+            pre_roll: Аудио, захваченное до начала записи (например,
+                хвост кольцевого буфера сразу после wake word)
+            carry: Уже захваченное начало фразы (команда, сказанная
+                сразу после wake word); берётся целиком вместо pre-roll
+        """
+        self._active ^= 1
+        self._length = 0
+        self.is_full = False
         self.is_recording = True
-        self.audio_buffer = []
+        if self.mel:
+            with self._mel_lock:
+                self.mel.reset()
+        if carry is not None:
+            self._append(carry)
+        elif pre_roll is not None and self.pre_roll_samples:
+            self._append(pre_roll[-self.pre_roll_samples :])
 
     def stop_recording(self) -> np.ndarray:
-        """Остановить запись и вернуть аудио"""
+        """Остановить запись и вернуть аудио (view на внутренний буфер)"""
         self.is_recording = False
-        if self.audio_buffer:
-            return np.concatenate(self.audio_buffer)
-        return np.array([], dtype=np.float32)
+        return self.audio_buffer
+
+    def take_features(self) -> np.ndarray | None:
+        """
+        Log-mel остановленной записи (копия, не зависит от следующей записи)
 
-    def add_chunk(self, chunk: np.ndarray):
+        Returns:
+            log10 mel (80, кадры) для STT.transcribe(features=...) или None
+        """
+        if not self.mel:
+            return None
+        with self._mel_lock:
+            return self.mel.finish()
+
+    def add_chunk(self, chunk: AudioFrame | np.ndarray):
         """Добавить чанк аудио в буфер"""
         if self.is_recording:
-            self.audio_buffer.append(chunk.copy())
-
-    def get_audio_level(self, chunk: np.ndarray) -> float:
+            self._append(getattr(chunk, "samples", chunk))
+
+    def _append(self, samples: np.ndarray):
+        n = min(len(samples), self.max_samples - self._length)
+        if n > 0:
+            buffer = self._buffers[self._active]
+            buffer[self._length : self._length + n] = samples[:n]
+            self._length += n
+            if self.mel:
+                with self._mel_lock:
+                    self.mel.push(samples[:n])
+        if self._length >= self.max_samples:
+            self.is_full = True
+
+    def get_audio_level(self, chunk: AudioFrame | np.ndarray) -> float:
         """Получить уровень громкости (0-1)"""
+        if isinstance(chunk, AudioFrame):
+            return chunk.level
         if len(chunk) == 0:
             return 0.0
         # RMS of int16
@@ -49,32 +146,289 @@ class AudioRecorder:
         return min(1.0, normalized_rms * 5.0)
 
 
+class PcmSource:
+    """
+    Источник звука в движке воспроизведения.
+
+    Либо готовый буфер (TTS, earcon), либо поток, который дописывается
+    через write() и завершается close(). Все данные — float32 на частоте
+    движка.
+    """
+
+    def __init__(self, samples: np.ndarray = None, name: str = ""):
+        self.name = name
+        self.done = threading.Event()
+        self.stopped = False
+        self._chunks = deque()
+        self._offset = 0  # read position inside the first chunk
+        self._closed = samples is not None
+        if samples is not None and len(samples):
+            self._chunks.append(samples)
+
+    def write(self, samples: np.ndarray):
+        """Дописать данные в потоковый источник"""
+        if not self._closed and len(samples):
+            self._chunks.append(samples)
+
+    def close(self):
+        """Конец потока: источник завершится, когда доиграет буфер"""
+        self._closed = True
+
+    def stop(self):
+        """Остановить (движок замолчит на следующем блоке вывода)"""
+        self.stopped = True
+        self.done.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Ждать окончания воспроизведения"""
+        return self.done.wait(timeout)
+
+    def mix_into(self, out: np.ndarray) -> bool:
+        """
+        Подмешать следующую порцию в out (вызывается из audio callback).
+
+        Returns:
+            True, если источник закончился
+        """
+        if self.stopped:
+            return True
+
+        filled = 0
+        frames = len(out)
+        while filled < frames and self._chunks:
+            chunk = self._chunks[0]
+            n = min(frames - filled, len(chunk) - self._offset)
+            out[filled:filled + n] += chunk[self._offset:self._offset + n]
+            filled += n
+            self._offset += n
+            if self._offset >= len(chunk):
+                self._chunks.popleft()
+                self._offset = 0
+
+        if self._closed and not self._chunks:
+            self.done.set()
+            return True
+        return False
+
+
+class PlaybackEngine:
+    """
+    Один постоянный sounddevice.OutputStream на всё приложение.
+
+    Callback смешивает все активные источники; stop() срабатывает в
+    пределах одного блока вывода. Используйте get_engine().
+    """
+
+    def __init__(self, sample_rate: int = None, blocksize: int = None):
+        self.sample_rate = sample_rate or device_sample_rate("output", 48000)
+        self.blocksize = blocksize or self.sample_rate * config.PLAYBACK_BLOCK_MS // 1000
+        self.stream = None
+        # Replaced, never mutated: the callback reads it without a lock. Finished
+        # sources only get done set in the callback and are pruned in _add
+        self._sources = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Открыть поток вывода (лениво при первом воспроизведении)"""
+        with self._lock:
+            if self.stream:
+                return
+            self.stream = sd.OutputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype=np.float32,
+                blocksize=self.blocksize,
+                callback=self._callback,
+            )
+            self.stream.start()
+        logger.info(f"Playback engine started ({self.sample_rate} Hz, {self.blocksize} frames)")
+
+    def close(self):
+        """Закрыть поток вывода"""
+        self.stop_all()
+        with self._lock:
+            stream, self.stream = self.stream, None
+        if stream:
+            # Outside the lock: stop() waits for the in-flight callback
+            stream.stop()
+            stream.close()
+
+    def play(self, samples: np.ndarray, sample_rate: int = None, name: str = "") -> PcmSource:
+        """
+        Поставить буфер в очередь микшера (не блокирует)
+
+        Args:
+            samples: Моно аудио (float32 -1..1 или int16)
+            sample_rate: Частота samples (по умолчанию — частота движка)
+        """
+        data = _to_float32(samples)
+        if sample_rate and sample_rate != self.sample_rate:
+            data = resample(data, sample_rate, self.sample_rate)
+        return self._add(PcmSource(data, name))
+
+    def open_source(self, name: str = "") -> PcmSource:
+        """Открыть потоковый источник float32 на частоте движка (write/close)"""
+        return self._add(PcmSource(None, name))
+
+    def open_stream(self, sample_rate: int, name: str = "") -> "PcmStream":
+        """Открыть потоковый источник PCM16 с частотой sample_rate"""
+        return self._add(PcmStream(sample_rate, self.sample_rate, name))
+
+    def stop_all(self):
+        """Остановить всё, что играет"""
+        for source in self._sources:
+            source.stop()
+
+    @property
+    def is_active(self) -> bool:
+        return any(not s.done.is_set() for s in self._sources)
+
+    def _add(self, source: PcmSource) -> PcmSource:
+        self.start()
+        with self._lock:
+            self._sources = [s for s in self._sources if not s.done.is_set()] + [source]
+        return source
+
+    def _callback(self, outdata, frames, time, status):
+        out = outdata[:, 0]
+        out.fill(0.0)
+
+        # No lock in the realtime callback: mix_into sets done on finished sources
+        for source in self._sources:
+            if not source.done.is_set():
+                source.mix_into(out)
+        np.clip(out, -1.0, 1.0, out=out)
+
+
+class PcmStream(PcmSource):
+    """Потоковый источник PCM16 с ресемплингом к частоте движка"""
+
+    def __init__(self, in_rate: int, out_rate: int, name: str = ""):
+        super().__init__(None, name)
+        self._resampler = PolyphaseResampler(in_rate, out_rate)
+        self._odd_byte = b""
+
+    def write_pcm(self, data: bytes):
+        """Дописать сырой PCM16 little endian"""
+        data = self._odd_byte + data
+        usable = len(data) & ~1
+        self._odd_byte = data[usable:]
+        samples = _to_float32(np.frombuffer(data[:usable], dtype=np.int16))
+        self.write(self._resampler.process(samples))
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> PlaybackEngine:
+    """Общий движок воспроизведения процесса"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaybackEngine()
+        return _engine
+
+
+def decode_audio(audio_bytes: bytes, audio_format: str, sample_rate: int) -> np.ndarray:
+    """
+    Декодировать WAV/MP3 в памяти (без временных файлов)
+
+    Args:
+        audio_bytes: Содержимое файла
+        audio_format: "wav" или "mp3"
+        sample_rate: Целевая частота
+
+    Returns:
+        Моно float32 на sample_rate
+    """
+    if audio_format == "wav":
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wf:
+            rate = wf.getframerate()
+            channels = wf.getnchannels()
+            if wf.getsampwidth() != 2:
+                raise ValueError("Only 16-bit WAV is supported")
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if channels > 1:
+            pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        data = _to_float32(pcm)
+        if rate != sample_rate:
+            data = resample(data, rate, sample_rate)
+        return data
+
+    # Compressed formats: PyAV (installed with faster-whisper) decodes in memory
+    from faster_whisper.audio import decode_audio as av_decode
+
+    return av_decode(io.BytesIO(audio_bytes), sampling_rate=sample_rate)
+
+
+def _to_float32(samples: np.ndarray) -> np.ndarray:
+    if samples.dtype == np.int16:
+        return np.multiply(samples, 1.0 / 32768.0, dtype=np.float32)
+    return samples.astype(np.float32, copy=False)
+
+
 class AudioPlayer:
-    """Воспроизведение аудио"""
+    """
+    Воспроизведение аудио через общий PlaybackEngine
+
+    Earcons синтезируются один раз на процесс и кэшируются.
+    """
+
+    _earcons = {}  # (name, sample_rate) -> float32
 
     def __init__(self):
-        self.sample_rate = 44100  # ElevenLabs default
+        self.engine = get_engine()
+        self.sample_rate = self.engine.sample_rate
 
     def play(self, audio_data: np.ndarray, sample_rate: int = None):
-        """Воспроизвести аудио"""
-        sr = sample_rate or self.sample_rate
-        sd.play(audio_data, sr)
-        sd.wait()
+        """Воспроизвести аудио (блокирует до конца)"""
+        self.engine.play(audio_data, sample_rate).wait()
 
     def play_bytes(self, audio_bytes: bytes, sample_rate: int = 44100):
-        """Воспроизвести аудио из bytes"""
-        audio_data = (
-            np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-        )
+        """Воспроизвести аудио из bytes (PCM16)"""
+        audio_data = np.frombuffer(audio_bytes, dtype=np.int16)
         self.play(audio_data, sample_rate)
 
     def stop(self):
         """Остановить воспроизведение"""
-        sd.stop()
+        self.engine.stop_all()
+
+    def _play_earcon(self, name: str):
+        """Воспроизвести earcon асинхронно (синтез только при первом вызове)"""
+        key = (name, self.sample_rate)
+        note = self._earcons.get(key)
+        if note is None:
+            note = getattr(self, f"_make_{name}")().astype(np.float32)
+            self._earcons[key] = note
+        self.engine.play(note, name=name)
 
     def play_beep(self):
         """Воспроизвести системный звук (бип)"""
-        # Generate 440Hz sine wave for 0.2s
+        self._play_earcon("beep")
+
+    def play_send_sound(self):
+        """Воспроизвести звук отправки сообщения (короткий свуш)"""
+        self._play_earcon("send_sound")
+
+    def play_receive_sound(self):
+        """Воспроизвести звук получения сообщения (нежный колокольчик)"""
+        self._play_earcon("receive_sound")
+
+    def play_click_sound(self):
+        """Тихий клик при нажатии на элементы интерфейса"""
+        self._play_earcon("click_sound")
+
+    def play_success_sound(self):
+        """Звук успешного выполнения (восходящий аккорд)"""
+        self._play_earcon("success_sound")
+
+    def play_error_sound(self):
+        """Звук ошибки (низкий гудок)"""
+        self._play_earcon("error_sound")
+
+    def _make_beep(self) -> np.ndarray:
+        # Generate 880Hz sine wave for 0.2s
         duration = 0.2
         frequency = 880  # Hz (High pitch beep)
         t = np.linspace(0, duration, int(self.sample_rate * duration), False)
@@ -83,12 +437,9 @@ class AudioPlayer:
         # Apply fade out to avoid clicking
         fade_out = np.linspace(1, 0, 1000)
         note[-1000:] *= fade_out
+        return note
 
-        # Play asynchronously
-        sd.play(note.astype(np.float32), self.sample_rate)
-
-    def play_send_sound(self):
-        """Воспроизвести звук отправки сообщения (короткий свуш)"""
+    def _make_send_sound(self) -> np.ndarray:
         duration = 0.1
         t = np.linspace(0, duration, int(self.sample_rate * duration), False)
 
@@ -99,12 +450,9 @@ class AudioPlayer:
 
         # Apply envelope (quick attack, slow decay)
         envelope = np.exp(-t * 20)
-        note *= envelope
+        return note * envelope
 
-        sd.play(note.astype(np.float32), self.sample_rate)
-
-    def play_receive_sound(self):
-        """Воспроизвести звук получения сообщения (нежный колокольчик)"""
+    def _make_receive_sound(self) -> np.ndarray:
         duration = 0.15
         t = np.linspace(0, duration, int(self.sample_rate * duration), False)
 
@@ -113,24 +461,18 @@ class AudioPlayer:
 
         # Apply decay envelope
         envelope = np.exp(-t * 15)
-        note *= envelope
+        return note * envelope
 
-        sd.play(note.astype(np.float32), self.sample_rate)
-
-    def play_click_sound(self):
-        """Тихий клик при нажатии на элементы интерфейса"""
+    def _make_click_sound(self) -> np.ndarray:
         duration = 0.03
         t = np.linspace(0, duration, int(self.sample_rate * duration), False)
 
         # Short tick: 1200 Hz
         note = np.sin(1200 * t * 2 * np.pi) * 0.08
         envelope = np.exp(-t * 80)
-        note *= envelope
-
-        sd.play(note.astype(np.float32), self.sample_rate)
+        return note * envelope
 
-    def play_success_sound(self):
-        """Звук успешного выполнения (восходящий аккорд)"""
+    def _make_success_sound(self) -> np.ndarray:
         duration = 0.25
         t = np.linspace(0, duration, int(self.sample_rate * duration), False)
 
@@ -141,12 +483,9 @@ class AudioPlayer:
             + np.sin(784 * t * 2 * np.pi) * 0.08
         )
         envelope = np.exp(-t * 8)
-        note *= envelope
-
-        sd.play(note.astype(np.float32), self.sample_rate)
+        return note * envelope
 
-    def play_error_sound(self):
-        """Звук ошибки (низкий гудок)"""
+    def _make_error_sound(self) -> np.ndarray:
         duration = 0.2
         t = np.linspace(0, duration, int(self.sample_rate * duration), False)
 
@@ -154,117 +493,188 @@ class AudioPlayer:
         note = np.sin(200 * t * 2 * np.pi) * 0.15
         note += np.sin(220 * t * 2 * np.pi) * 0.05  # Slight dissonance
         envelope = np.exp(-t * 10)
-        note *= envelope
-
-        sd.play(note.astype(np.float32), self.sample_rate)
+        return note * envelope
 
 
 class StreamPlayer:
-    """Потоковое воспроизведение аудио (MP3/PCM) через ffplay"""
+    """
+    Потоковое воспроизведение аудио (PCM/MP3) через общий PlaybackEngine
+
+    PCM ресемплируется к частоте устройства вывода по мере записи.
+    MP3 накапливается и декодируется в памяти при close_input().
+    Поддерживается только моно.
+    """
 
     def __init__(self, format="mp3", sample_rate=None, channels=1):
-        self.process = None
         self.format = format
         self.sample_rate = sample_rate
         self.channels = channels
+        self.source = None
+        self._mp3 = bytearray()
 
     def start(self):
-        """Запустить процесс плеера"""
+        """Открыть источник в движке воспроизведения"""
         self.stop()  # Ensure previous is stopped
+        self._mp3 = bytearray()
         try:
-            cmd = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"]
-
-            if self.format == "mp3":
-                cmd.insert(1, "mp3")
-                cmd.insert(1, "-f")
-            elif self.format == "pcm":
-                # PCM 16-bit little endian
-                cmd.insert(1, "s16le")
-                cmd.insert(1, "-f")
-                if self.sample_rate:
-                    cmd.insert(3, str(self.sample_rate))
-                    cmd.insert(3, "-ar")
-                cmd.insert(5, str(self.channels))
-                cmd.insert(5, "-ac")
-
-            self.process = subprocess.Popen(
-                cmd, stdin=subprocess.PIPE, stderr=None, stdout=subprocess.DEVNULL
-            )
-            print(f"[AUDIO] StreamPlayer started ({self.format})")
-        except FileNotFoundError:
-            print("ffplay not found. Please install ffmpeg.")
+            if self.format == "pcm":
+                engine = get_engine()
+                self.source = engine.open_stream(
+                    self.sample_rate or engine.sample_rate, name="stream"
+                )
+            logger.info(f"StreamPlayer started ({self.format})")
+        except Exception as e:
+            logger.error(f"StreamPlayer start failed: {e}")
 
     def write(self, data: bytes):
         """Записать данные в поток"""
-        if self.process and self.process.stdin:
-            try:
-                self.process.stdin.write(data)
-                self.process.stdin.flush()
-            except BrokenPipeError:
-                pass
-            except Exception as e:
-                print(f"Stream write error: {e}")
+        try:
+            if self.format == "pcm":
+                if self.source:
+                    self.source.write_pcm(data)
+            else:
+                self._mp3 += data
+        except Exception as e:
+            logger.error(f"Stream write error: {e}")
 
     def close_input(self):
         """Закрыть входной поток (EOF)"""
-        if self.process and self.process.stdin:
-            try:
-                self.process.stdin.close()
-            except Exception:
-                pass
+        try:
+            if self.format == "pcm":
+                if self.source:
+                    self.source.close()
+            elif self._mp3:
+                engine = get_engine()
+                audio = decode_audio(bytes(self._mp3), "mp3", engine.sample_rate)
+                self._mp3 = bytearray()
+                self.source = engine.play(audio, name="stream")
+        except Exception as e:
+            logger.error(f"Stream close error: {e}")
 
     def wait(self):
         """Ожидать завершения воспроизведения"""
-        if self.process:
-            try:
-                self.process.wait()
-            except Exception:
-                pass
+        if self.source:
+            self.source.wait()
 
     def stop(self):
         """Остановить воспроизведение"""
-        if self.process:
-            self.close_input()
-            try:
-                self.process.terminate()
-                self.process.wait(timeout=0.5)
-            except Exception:
-                self.process.kill()
-            self.process = None
+        if self.source:
+            self.source.stop()
+            self.source = None
 
 
 class AudioStream:
-    """Потоковый захват аудио для wake-word detection"""
-
-    def __init__(self, callback):
+    """
+    Потоковый захват аудио для wake-word detection
+
+    PortAudio callback только копирует сэмплы в кольцевой буфер.
+    VAD, Vosk и сигналы Qt работают в отдельном потоке-потребителе.
+
+    Микрофон открывается на родной частоте устройства; поток-потребитель
+    один раз понижает её до SAMPLE_RATE для VAD, Vosk и Whisper.
+    """
+
+    def __init__(self, callback, profile: str = None, device_rate: int = None):
+        """
+        Args:
+            callback: Обработчик (AudioFrame, средний уровень)
+            profile: Профиль захвата (config.CAPTURE_PROFILES)
+            device_rate: Частота входа; по умолчанию — родная частота
+                         микрофона (задаётся явно при подаче записей)
+        """
         self.sample_rate = config.SAMPLE_RATE
         self.channels = config.CHANNELS
-        self.chunk_size = config.CHUNK_SIZE
+        self.profile = profile or config.CAPTURE_PROFILE
+        if self.profile not in config.CAPTURE_PROFILES:
+            logger.warning(f"Unknown capture profile '{self.profile}', using throughput")
+            self.profile = "throughput"
+        self.chunk_size = config.CAPTURE_PROFILES[self.profile]
         self.callback = callback
         self.stream = None
         self.level_buffer = deque(maxlen=10)
 
+        # Device-native capture rate, decimated once in the consumer
+        if device_rate:
+            self.device_rate = int(device_rate)
+        elif config.CAPTURE_AT_DEVICE_RATE:
+            self.device_rate = device_sample_rate("input", self.sample_rate)
+        else:
+            self.device_rate = self.sample_rate
+        self.resampler = PolyphaseResampler(self.device_rate, self.sample_rate)
+        self._capture_block = self._device_block(self.chunk_size)
+
+        # Capture ring (device rate): callback -> consumer thread
+        self.ring = AudioRingBuffer(int(self.device_rate * config.AUDIO_RING_SECONDS))
+
+        # Already-consumed audio at SAMPLE_RATE (pre-roll for the recorder)
+        history = int(self.sample_rate * config.AUDIO_RING_HISTORY_SECONDS)
+        max_block = max(config.CAPTURE_PROFILES.values())
+        self.history = AudioRingBuffer(history + 2 * max_block, history=history)
+
+        self.input_overflows = 0  # PortAudio-level overflows (status flag)
+        self._data_ready = threading.Event()
+        self._worker = None
+        self._running = False
+        self._reported_overflows = 0
+        self._seq = 0
+
+    def _device_block(self, chunk_size: int) -> int:
+        """Размер блока на частоте устройства для блока chunk_size на SAMPLE_RATE"""
+        return round(chunk_size * self.device_rate / self.sample_rate)
+
     def _audio_callback(self, indata, frames, time, status):
-        """Callback для аудио потока"""
-        if status:
-            print(f"Audio status: {status}")
+        """Callback для аудио потока (только копирование в кольцо)"""
+        if status and status.input_overflow:
+            self.input_overflows += 1
 
-        # Calculate level for visualization
         audio = indata[:, 0] if len(indata.shape) > 1 else indata
-        rms = np.sqrt(np.mean(audio.astype(np.float32) ** 2))
-        level = rms / 32768.0
-        self.level_buffer.append(level)
+        self.ring.write(audio)
+        self._data_ready.set()
+
+    def _consume_loop(self):
+        """Рабочий поток: читает кольцо и вызывает обработчик"""
+        while self._running:
+            # Two block periods without a callback means capture stalled
+            stall_timeout = max(0.1, 2 * self.chunk_size / self.sample_rate)
+            if not self._data_ready.wait(timeout=stall_timeout):
+                # Counted as an underrun by the ring
+                block = self.ring.read(self._capture_block)
+                if block is None:
+                    continue
+                self._dispatch(block)
+            self._data_ready.clear()
+            self.process_pending()
+
+    def process_pending(self):
+        """Обработать все полные блоки, накопленные в кольце"""
+        while self._running and self.ring.available >= self._capture_block:
+            self._dispatch(self.ring.read(self._capture_block))
+
+        if self.ring.overflows != self._reported_overflows:
+            self._reported_overflows = self.ring.overflows
+            logger.warning(
+                f"Audio ring overflow: consumer is falling behind ({self.get_stats()})"
+            )
+
+    def _dispatch(self, block: np.ndarray):
+        # Capture time of the first sample: the block and everything still queued behind it
+        timestamp = time.monotonic() - (len(block) + self.ring.available) / self.device_rate
+
+        audio = self.resampler.process(block)
+        position = self.history.total_written
+        self.history.write(audio)
+        self.history.clear()  # everything written is "consumed": tail() sees it
 
-        # Debug: показать уровень каждые 50 чанков
-        if not hasattr(self, "_chunk_count"):
-            self._chunk_count = 0
-        self._chunk_count += 1
-        # Debug disabled in production
-        # if self._chunk_count % 50 == 0:
-        #     print(f"[AUDIO] Chunk #{self._chunk_count}, raw_rms: {rms:.0f}, level: {level:.4f}")
+        frame = AudioFrame(audio, timestamp, self._seq, self.sample_rate, position)
+        self._seq += 1
 
-        # Call user callback
-        self.callback(audio.copy(), self.get_average_level())
+        # Level for visualization
+        self.level_buffer.append(frame.rms)
+
+        try:
+            self.callback(frame, self.get_average_level())
+        except Exception as e:
+            logger.error(f"Audio consumer error: {e}")
 
     def get_average_level(self) -> float:
         """Получить усреднённый уровень громкости"""
@@ -273,22 +683,65 @@ class AudioStream:
         # Scale up slightly for visualization responsiveness
         return min(1.0, np.mean(self.level_buffer) * 5.0)
 
+    def get_stats(self) -> dict:
+        """Счётчики переполнений/недогрузки захвата"""
+        stats = self.ring.get_stats()
+        stats["input_overflows"] = self.input_overflows
+        return stats
+
+    def set_profile(self, profile: str):
+        """
+        Переключить профиль захвата на лету
+
+        Args:
+            profile: "low_latency" (блок = VAD-кадр) или "throughput"
+        """
+        if profile not in config.CAPTURE_PROFILES:
+            raise ValueError(f"Unknown capture profile: {profile}")
+        if profile == self.profile:
+            return
+
+        self.profile = profile
+        self.chunk_size = config.CAPTURE_PROFILES[profile]
+        self._capture_block = self._device_block(self.chunk_size)
+        logger.info(f"Capture profile: {profile} ({self.chunk_size} samples/block)")
+
+        # PortAudio block size is fixed per stream: reopen it
+        if self.stream:
+            self._close_stream()
+            self._open_stream()
+
     def start(self):
         """Запустить аудио поток"""
-        # Starting audio stream silently
+        self._running = True
+        self._worker = threading.Thread(
+            target=self._consume_loop, name="AudioConsumer", daemon=True
+        )
+        self._worker.start()
+        self._open_stream()
+
+    def _open_stream(self):
         self.stream = sd.InputStream(
-            samplerate=self.sample_rate,
+            samplerate=self.device_rate,
             channels=self.channels,
-            blocksize=self.chunk_size,
+            blocksize=self._capture_block,
             dtype=np.int16,
             callback=self._audio_callback,
         )
         self.stream.start()
-        # Audio stream started successfully
 
-    def stop(self):
-        """Остановить аудио поток"""
+    def _close_stream(self):
         if self.stream:
             self.stream.stop()
             self.stream.close()
             self.stream = None
+
+    def stop(self):
+        """Остановить аудио поток"""
+        self._close_stream()
+
+        self._running = False
+        self._data_ready.set()
+        if self._worker and self._worker is not threading.current_thread():
+            self._worker.join(timeout=1.0)
+        self._worker = None
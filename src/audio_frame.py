@@ -0,0 +1,73 @@
+"""
+Alyosha Audio Frame
+Один блок с микрофона, общий для всех потребителей
+"""
+import numpy as np
+
+
+class AudioFrame:
+    """
+    Блок аудио int16 с метаданными.
+
+    Создаётся один раз на блок захвата и передаётся в VAD, wake word,
+    запись, Live и индикатор уровня. Представления float32 и bytes
+    строятся лениво и не более одного раза.
+    """
+
+    __slots__ = (
+        "samples", "timestamp", "seq", "sample_rate", "position", "rms", "vad", "_float32", "_bytes",
+    )
+
+    def __init__(self, samples: np.ndarray, timestamp: float, seq: int, sample_rate: int, position: int = None):
+        """
+        Args:
+            samples: Моно сэмплы int16 (кадр владеет массивом)
+            timestamp: Время захвата первого сэмпла (time.monotonic())
+            seq: Порядковый номер блока
+            sample_rate: Частота дискретизации
+            position: Индекс первого сэмпла в потоке (history.total_written)
+        """
+        self.samples = samples
+        self.timestamp = timestamp
+        self.seq = seq
+        self.sample_rate = sample_rate
+        self.position = position
+        self.vad = None  # VadDecision, attached once by the audio consumer
+        self._float32 = None
+        self._bytes = None
+
+        # RMS normalized to 0..1 of int16 full scale (int64 accumulation, no temporaries)
+        n = len(samples)
+        if n:
+            energy = np.einsum("i,i->", samples, samples, dtype=np.int64)
+            self.rms = float(np.sqrt(energy / n)) / 32768.0
+        else:
+            self.rms = 0.0
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @property
+    def duration(self) -> float:
+        """Длительность блока в секундах"""
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def level(self) -> float:
+        """Уровень громкости для UI (0-1)"""
+        # Scale for sensitivity (silence is usually < 0.01 normalized)
+        return min(1.0, self.rms * 5.0)
+
+    @property
+    def float32(self) -> np.ndarray:
+        """Сэмплы в float32 (-1..1), кэшируется"""
+        if self._float32 is None:
+            self._float32 = np.multiply(self.samples, 1.0 / 32768.0, dtype=np.float32)
+        return self._float32
+
+    @property
+    def bytes(self) -> bytes:
+        """PCM 16-bit little endian, кэшируется"""
+        if self._bytes is None:
+            self._bytes = self.samples.tobytes()
+        return self._bytes
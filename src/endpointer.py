@@ -0,0 +1,125 @@
+"""
+Alyosha Endpointer
+Определение конца фразы по маске VAD
+"""
+import config
+
+
+class EndpointEvent:
+    """Событие конца высказывания (время — секунды от начала записи)"""
+
+    SPEECH_END = "speech_end"  # пауза после речи
+    NO_SPEECH = "no_speech"  # речь так и не началась
+    MAX_LENGTH = "max_length"  # превышена максимальная длина
+    MANUAL = "manual"  # запись остановлена кнопкой
+
+    __slots__ = ("reason", "speech_start", "speech_end", "detected_at")
+
+    def __init__(self, reason: str, speech_start, speech_end, detected_at: float):
+        self.reason = reason
+        self.speech_start = speech_start  # None if no speech
+        self.speech_end = speech_end  # None if no speech
+        self.detected_at = detected_at
+
+    def __repr__(self):
+        return (
+            f"EndpointEvent({self.reason}, speech={self.speech_start}-{self.speech_end}, "
+            f"at={self.detected_at:.2f}s)"
+        )
+
+
+class Endpointer:
+    """
+    VAD-driven endpointing.
+
+    Consumes the raw per-frame VAD mask of each block (VadDecision) and
+    decides on frame boundaries, independent of the capture block size.
+    Any object with the same reset()/process() interface can replace it
+    in Assistant.
+    """
+
+    def __init__(
+        self,
+        leading_timeout: float = None,
+        trailing_silence: float = None,
+        max_utterance: float = None,
+        min_speech: float = None,
+    ):
+        """
+        Args:
+            leading_timeout: Сколько ждать начала речи, сек
+            trailing_silence: Пауза после речи, завершающая фразу, сек
+            max_utterance: Максимальная длина записи, сек
+            min_speech: Минимум речи, чтобы считать фразу начавшейся, сек
+        """
+        self.leading_timeout = leading_timeout or config.ENDPOINT_LEADING_TIMEOUT
+        self.trailing_silence = trailing_silence or config.ENDPOINT_TRAILING_SILENCE
+        self.max_utterance = max_utterance or config.MAX_RECORDING_SECONDS
+        self.min_speech = min_speech if min_speech is not None else config.ENDPOINT_MIN_SPEECH
+        self.reset()
+
+    def reset(self):
+        """Начать новое высказывание"""
+        self._frames = 0
+        self._frame_s = 0.0
+        self._speech_start = None  # frame index
+        self._speech_end = None  # frame index (exclusive)
+        self._speech_frames = 0
+        self.event = None
+
+    @property
+    def in_speech(self) -> bool:
+        """Началась ли речь"""
+        return (
+            self._speech_start is not None
+            and self._speech_frames * self._frame_s >= self.min_speech
+        )
+
+    def process(self, decision) -> EndpointEvent | None:
+        """
+        Обработать решение VAD для очередного блока.
+
+        Returns:
+            EndpointEvent, когда высказывание закончилось, иначе None
+        """
+        if self.event:
+            return self.event
+
+        # Integer frame counting keeps event times exact
+        frame_s = self._frame_s = decision.frame_ms / 1000.0
+        for speech in decision.raw:
+            self._frames += 1
+
+            if speech:
+                if self._speech_start is None:
+                    self._speech_start = self._frames - 1
+                self._speech_end = self._frames
+                self._speech_frames += 1
+            elif self.in_speech:
+                if (self._frames - self._speech_end) * frame_s >= self.trailing_silence:
+                    return self.finish(EndpointEvent.SPEECH_END)
+            else:
+                # Too short to count as speech (click, cough): start over
+                self._speech_start = None
+                self._speech_frames = 0
+                if self._frames * frame_s >= self.leading_timeout:
+                    return self.finish(EndpointEvent.NO_SPEECH)
+
+            if self._frames * frame_s >= self.max_utterance:
+                return self.finish(EndpointEvent.MAX_LENGTH)
+
+        return None
+
+    def finish(self, reason: str) -> EndpointEvent:
+        """Завершить высказывание принудительно (например, буфер записи полон)"""
+        frame_s = self._frame_s
+        if self.in_speech:
+            self.event = EndpointEvent(
+                reason,
+                self._speech_start * frame_s,
+                self._speech_end * frame_s,
+                self._frames * frame_s,
+            )
+        else:
+            self.event = EndpointEvent(reason, None, None, self._frames * frame_s)
+        return self.event
@@ -0,0 +1,237 @@
+"""
+Alyosha Audio Features
+Потоковый log-mel фронтенд на numpy
+"""
+import numpy as np
+
+
+def hz_to_mel(freq):
+    """Шкала Slaney: линейная до 1 кГц, логарифмическая выше"""
+    freq = np.asarray(freq, dtype=np.float64)
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    return np.where(
+        freq >= min_log_hz,
+        min_log_mel + np.log(np.maximum(freq, min_log_hz) / min_log_hz) / logstep,
+        freq / f_sp,
+    )
+
+
+def mel_to_hz(mels):
+    """Обратное преобразование для hz_to_mel"""
+    mels = np.asarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    return np.where(
+        mels >= min_log_mel,
+        min_log_hz * np.exp(logstep * (mels - min_log_mel)),
+        f_sp * mels,
+    )
+
+
+def mel_filters(sample_rate: int, n_fft: int, n_mels: int, fmin: float = 0.0, fmax: float = None) -> np.ndarray:
+    """
+    Треугольный банк mel-фильтров (Slaney, нормировка по площади).
+
+    Returns:
+        Массив (n_mels, n_fft // 2 + 1) float32
+    """
+    fmax = fmax or sample_rate / 2.0
+    fft_freqs = np.linspace(0, sample_rate / 2.0, n_fft // 2 + 1)
+    mel_freqs = mel_to_hz(np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2))
+
+    widths = np.diff(mel_freqs)
+    ramps = mel_freqs[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_freqs[2:] - mel_freqs[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+
+class LogMelFrontend:
+    """
+    Инкрементальный log-mel.
+
+    Блоки любой длины накапливаются, каждые hop_length сэмплов выдаётся
+    новый кадр; окна без паддинга, поэтому результат не зависит от того,
+    как аудио порезано на блоки.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        n_fft: int = 512,
+        win_length: int = 400,
+        hop_length: int = 160,
+        n_mels: int = 40,
+        fmin: float = 20.0,
+        fmax: float = None,
+        log_floor: float = 1e-6,
+    ):
+        """
+        Args:
+            sample_rate: Частота входа
+            n_fft: Размер FFT (окно дополняется нулями до n_fft)
+            win_length: Длина окна Ханна, сэмплов (400 = 25 мс)
+            hop_length: Шаг кадра, сэмплов (160 = 10 мс)
+            n_mels: Число mel-полос
+            log_floor: Нижняя граница перед логарифмом
+        """
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.win_length = win_length
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.log_floor = log_floor
+        self.filters = mel_filters(sample_rate, n_fft, n_mels, fmin, fmax)
+        self.window = np.hanning(win_length + 1)[:-1].astype(np.float32)  # periodic
+        self.reset()
+
+    def reset(self):
+        """Сбросить недообработанный хвост"""
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self.frames = 0  # total frames produced
+
+    def power(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Добавить сэмплы и вернуть спектр мощности новых кадров.
+
+        Returns:
+            Массив (кадры, n_fft // 2 + 1) float32, возможно пустой
+        """
+        if samples.dtype == np.int16:
+            x = np.multiply(samples, 1.0 / 32768.0, dtype=np.float32)
+        else:
+            x = samples.astype(np.float32, copy=False)
+
+        buffer = np.concatenate((self._buffer, x)) if len(self._buffer) else x
+        count = 0 if len(buffer) < self.win_length else 1 + (len(buffer) - self.win_length) // self.hop_length
+        if not count:
+            self._buffer = buffer.copy()
+            return np.zeros((0, self.n_fft // 2 + 1), dtype=np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.win_length)[::self.hop_length][:count]
+        spectrum = np.fft.rfft(frames * self.window, n=self.n_fft)
+        self._buffer = buffer[count * self.hop_length:].copy()
+        self.frames += count
+        return (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Добавить сэмплы (int16 или float) и вернуть новые кадры.
+
+        Returns:
+            Массив (кадры, n_mels) float32 — натуральный лог мощности
+        """
+        mel = self.power(samples) @ self.filters.T
+        return np.log(np.maximum(mel, self.log_floor))
+
+
+class WhisperLogMel:
+    """
+    Потоковый log-mel в формате FeatureExtractor faster-whisper.
+
+    Кадры считаются по мере записи: окно 400, шаг 160, 80 полос, центрированные
+    кадры с отражением на краях, как в STFT Whisper. finish() досчитывает
+    последние кадры; нормализация (клэмп по глобальному максимуму) — в
+    whisper_normalize(), когда вся запись известна.
+    """
+
+    def __init__(self, max_samples: int, sample_rate: int = 16000, n_mels: int = 80):
+        """
+        Args:
+            max_samples: Максимальная длина записи (под неё выделяется матрица)
+            sample_rate: Частота входа
+            n_mels: Число mel-полос модели
+        """
+        self.frontend = LogMelFrontend(
+            sample_rate, n_fft=400, win_length=400, hop_length=160, n_mels=n_mels, fmin=0.0
+        )
+        self.hop_length = self.frontend.hop_length
+        self._pad = self.frontend.n_fft // 2
+        self._matrix = np.zeros((max_samples // self.hop_length + 2, n_mels), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Начать новую запись"""
+        self.frontend.reset()
+        self.samples = 0
+        self.frames = 0
+        self._head = np.zeros(0, dtype=np.float32)  # audio until the left reflect pad is known
+        self._tail = np.zeros(0, dtype=np.float32)  # last samples, for the right reflect pad
+        self._result = None
+
+    def push(self, samples: np.ndarray):
+        """Добавить сэмплы записи (int16 или float)"""
+        if samples.dtype == np.int16:
+            x = np.multiply(samples, 1.0 / 32768.0, dtype=np.float32)
+        else:
+            x = samples.astype(np.float32, copy=False)
+        if not len(x):
+            return
+        self.samples += len(x)
+        self._tail = np.concatenate((self._tail, x))[-(self._pad + 1):]
+
+        if self._head is not None:
+            self._head = np.concatenate((self._head, x))
+            if len(self._head) <= self._pad:
+                return
+            # np.pad(mode="reflect") at the start: x[pad], ..., x[1], then the audio
+            x = np.concatenate((self._head[self._pad:0:-1], self._head))
+            self._head = None
+        self._store(self.frontend.power(x))
+
+    def _store(self, power: np.ndarray):
+        count = min(len(power), len(self._matrix) - self.frames)
+        if count > 0:
+            mel = power[:count] @ self.frontend.filters.T
+            self._matrix[self.frames:self.frames + count] = np.log10(np.maximum(mel, 1e-10))
+            self.frames += count
+
+    def finish(self) -> np.ndarray | None:
+        """
+        Досчитать хвост и вернуть признаки всей записи.
+
+        Returns:
+            log10 mel (n_mels, len // 160 + 1) float32 без нормализации, или
+            None, если записи меньше одного окна
+        """
+        if self._result is not None or self._head is not None:
+            return self._result
+        # FeatureExtractor pads 160 zeros, then reflects the padded signal at the end
+        padded = np.concatenate((self._tail, np.zeros(self.hop_length, dtype=np.float32)))
+        ending = np.concatenate((padded[-self.hop_length:], padded[-2:-(self._pad + 2):-1]))
+        self._store(self.frontend.power(ending))
+        frames = min(self.frames, self.samples // self.hop_length + 1)
+        self._result = self._matrix[:frames].T.copy()
+        return self._result
+
+
+def whisper_normalize(log_spec: np.ndarray) -> np.ndarray:
+    """Нормализация Whisper: клэмп на 8 декад ниже максимума, (x + 4) / 4"""
+    return (np.maximum(log_spec, log_spec.max() - 8.0) + 4.0) / 4.0
+
+
+def speech_bounds(features: np.ndarray, floor_db: float, margin: int) -> tuple[int, int]:
+    """
+    Границы речи по нормализованным признакам Whisper
+
+    Args:
+        features: whisper_normalize(...) (n_mels, кадры)
+        floor_db: Кадры тише максимума больше чем на floor_db — тишина
+        margin: Кадров запаса с каждой стороны
+
+    Returns:
+        (первый, последний + 1) кадр; вся запись, если речь не найдена
+    """
+    level = features.max(axis=0)
+    # One normalized unit is 4 decades of power, i.e. 40 dB
+    loud = np.flatnonzero(level >= level.max() - floor_db / 40.0)
+    if not len(loud):
+        return 0, features.shape[1]
+    return max(0, loud[0] - margin), min(features.shape[1], loud[-1] + 1 + margin)
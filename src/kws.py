@@ -0,0 +1,225 @@
+"""
+Alyosha Neural Wake Word
+Keyword spotting: потоковый log-mel + маленькая ONNX модель на CPU
+
+Контракт модели:
+    вход  float32 [1, T, n_mels] или [1, 1, T, n_mels] — натуральный лог
+          мощности mel (features.LogMelFrontend: окно 25 мс, шаг 10 мс,
+          KWS_N_MELS полос); фиксированное T задаёт окно, иначе KWS_WINDOW_MS
+    выход [1, C] — логиты или вероятности, класс KWS_KEYWORD_INDEX — wake word,
+          либо [1, 1] — логит/вероятность wake word
+"""
+import logging
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+import config
+from .audio_frame import AudioFrame
+from .features import LogMelFrontend
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxWakeWordDetector:
+    """
+    Wake word на ONNX (onnxruntime, только CPU).
+
+    Тот же интерфейс, что у WakeWordDetector: load/detect/reset/is_loaded.
+    Признаки считаются на каждом блоке, модель — раз в KWS_HOP_MS и только
+    если в окне была речь по VAD. Если модель не загрузилась, все вызовы
+    уходят в fallback (Vosk).
+    """
+
+    name = "KWS"
+
+    def __init__(self, model_path=None, threshold: float = None, fallback=None):
+        """
+        Args:
+            model_path: Путь к .onnx (по умолчанию config.KWS_MODEL_PATH)
+            threshold: Порог сглаженной вероятности wake word
+            fallback: Детектор, который используется, если модель не загрузилась
+        """
+        self.model_path = Path(model_path or config.KWS_MODEL_PATH)
+        self.threshold = threshold if threshold is not None else config.KWS_THRESHOLD
+        self.fallback = fallback
+        self.session = None
+        self.is_loaded = False
+        self.using_fallback = False
+        self._last_detection = None
+        self.last_score = 0.0
+
+        self.frontend = LogMelFrontend(config.SAMPLE_RATE, n_mels=config.KWS_N_MELS)
+        frames_per_second = config.SAMPLE_RATE / self.frontend.hop_length
+        self._hop_frames = max(1, round(config.KWS_HOP_MS / 1000 * frames_per_second))
+        self._window_frames = max(1, round(config.KWS_WINDOW_MS / 1000 * frames_per_second))
+        self._floor = np.log(self.frontend.log_floor)
+        self._scores = deque(maxlen=config.KWS_SMOOTH_HOPS)
+        self._input_name = None
+        self._input_rank = 3
+
+        # Counters (get_stats)
+        self.frames = 0
+        self.inferences = 0
+        self.gated_hops = 0  # hops skipped because the window had no speech
+        self.resets = 0
+        self._clear()
+
+    @property
+    def last_detection(self) -> dict | None:
+        """{"keyword", "score", "threshold", "confidence", "source", "end_position"} последнего срабатывания"""
+        if self.using_fallback:
+            return self.fallback.last_detection
+        return self._last_detection
+
+    @last_detection.setter
+    def last_detection(self, detection: dict | None):
+        self._last_detection = detection
+
+    def load(self) -> bool:
+        """Загрузить ONNX модель; при ошибке — запасной детектор"""
+        try:
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            # One small model per hop: threading only adds wakeups
+            options.intra_op_num_threads = 1
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = ort.InferenceSession(
+                str(self.model_path), options, providers=["CPUExecutionProvider"]
+            )
+
+            model_input = self.session.get_inputs()[0]
+            self._input_name = model_input.name
+            self._input_rank = len(model_input.shape)
+            time_dim = model_input.shape[-2]
+            if isinstance(time_dim, int) and time_dim > 0:
+                self._window_frames = time_dim
+            self._clear()
+            self.is_loaded = True
+            return True
+        except Exception as e:
+            if self.fallback is None:
+                logger.error(f"Failed to load KWS model: {e}")
+                return False
+            logger.warning(f"KWS model unavailable ({e}), falling back to {self.fallback.name}")
+            self.using_fallback = self.is_loaded = self.fallback.load()
+            return self.is_loaded
+
+    def detect(self, audio_chunk: AudioFrame | np.ndarray) -> bool:
+        """
+        Проверить наличие wake word в аудио чанке
+
+        Args:
+            audio_chunk: AudioFrame или аудио данные (int16)
+
+        Returns:
+            True если wake word обнаружен
+        """
+        if not self.is_loaded:
+            return False
+        if self.using_fallback:
+            return self.fallback.detect(audio_chunk)
+
+        try:
+            self.frames += 1
+            if isinstance(audio_chunk, AudioFrame):
+                samples = audio_chunk.samples
+            else:
+                samples = audio_chunk
+
+            features = self.frontend.push(samples)
+            count = len(features)
+            if count:
+                window = self._window
+                if count >= len(window):
+                    window[:] = features[-len(window):]
+                else:
+                    window[:-count] = window[count:]
+                    window[-count:] = features
+                self._filled += count
+                self._since_hop += count
+
+            # VAD gating: the consumer's decision if attached, else always score
+            decision = getattr(audio_chunk, "vad", None)
+            if decision is None or decision.is_speech:
+                self._last_speech = self.frontend.frames
+
+            if self._since_hop < self._hop_frames or self._filled < len(self._window):
+                return False
+            self._since_hop = 0
+
+            if self.frontend.frames - self._last_speech > len(self._window):
+                # No speech anywhere in the window: nothing to spot
+                self.gated_hops += 1
+                self._scores.clear()
+                self.last_score = 0.0
+                return False
+
+            self._scores.append(self._score())
+            # Missing hops count as zero: one spike alone can't trigger
+            self.last_score = sum(self._scores) / self._scores.maxlen
+            if self.last_score >= self.threshold:
+                logger.info(f"Wake word detected (KWS): score={self.last_score:.2f}")
+                self.last_detection = {
+                    "keyword": config.WAKE_WORD, "score": self.last_score,
+                    "threshold": self.threshold, "confidence": self.last_score,
+                    "source": "kws",
+                    # The keyword has just ended: whatever follows this frame is the command
+                    "end_position": (
+                        audio_chunk.position + len(audio_chunk)
+                        if getattr(audio_chunk, "position", None) is not None else None
+                    ),
+                }
+                self.reset()
+                return True
+        except Exception as e:
+            logger.error(f"KWS detection error: {e}")
+
+        return False
+
+    def _score(self) -> float:
+        """Вероятность wake word для текущего окна"""
+        x = self._window[None]
+        if self._input_rank == 4:
+            x = x[:, None]
+        self.inferences += 1
+        out = np.asarray(self.session.run(None, {self._input_name: x})[0], dtype=np.float64).reshape(-1)
+
+        if out.size == 1:
+            value = float(out[0])
+            return value if 0.0 <= value <= 1.0 else 1.0 / (1.0 + np.exp(-value))
+        if out.min() < 0.0 or abs(out.sum() - 1.0) > 1e-3:
+            out = np.exp(out - out.max())
+            out /= out.sum()
+        return float(out[config.KWS_KEYWORD_INDEX])
+
+    def get_stats(self) -> dict:
+        """Счётчики нагрузки"""
+        if self.using_fallback:
+            return self.fallback.get_stats()
+        return {
+            "engine": self.name,
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "gated_hops": self.gated_hops,
+            "resets": self.resets,
+        }
+
+    def reset(self):
+        """Очистить окно признаков: после срабатывания оно заполняется заново"""
+        if self.using_fallback:
+            self.fallback.reset()
+            return
+        self._clear()
+        self.resets += 1
+
+    def _clear(self):
+        self.frontend.reset()
+        self._window = np.full((self._window_frames, self.frontend.n_mels), self._floor, dtype=np.float32)
+        self._filled = 0
+        self._since_hop = 0
+        self._last_speech = -self._window_frames - 1
+        self._scores.clear()
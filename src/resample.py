@@ -0,0 +1,112 @@
+"""
+Alyosha Resampler
+Потоковый полифазный ресемплер на numpy
+"""
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+# Zero crossings of the windowed sinc on each side of the centre
+ZERO_CROSSINGS = 16
+KAISER_BETA = 8.6
+ROLLOFF = 0.92  # cutoff as a fraction of the lower Nyquist frequency
+
+
+@lru_cache(maxsize=16)
+def _filter_bank(up: int, down: int) -> np.ndarray:
+    """
+    Полифазный банк фильтров для up/down (кэшируется на процесс).
+
+    Returns:
+        Массив (up, taps) float32; строка p — фаза p, отводы в порядке
+        от нового сэмпла к старому
+    """
+    factor = max(up, down)
+    taps = 2 * ZERO_CROSSINGS * factor // up + 1
+    length = taps * up
+
+    # Windowed-sinc low-pass at the upsampled rate
+    cutoff = ROLLOFF * 0.5 / factor  # cycles per upsampled sample
+    n = np.arange(length) - (length - 1) / 2.0
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, KAISER_BETA)
+    h *= up / h.sum()  # unity DC gain after zero stuffing
+
+    # bank[p, k] = h[p + k * up]
+    return np.ascontiguousarray(h.reshape(taps, up).T, dtype=np.float32)
+
+
+class PolyphaseResampler:
+    """
+    Ресемплер с состоянием между блоками.
+
+    Каждый выходной сэмпл — скалярное произведение одной фазы фильтра
+    на окно входа; все выходы блока считаются одним векторным einsum.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int):
+        g = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+        self.bank = _filter_bank(self.up, self.down)
+        self.taps = self.bank.shape[1]
+        # Newest-first tap order: flip once so windows can be taken oldest-first
+        self._bank_rev = np.ascontiguousarray(self.bank[:, ::-1])
+        self._offsets = np.arange(self.taps)
+        self.reset()
+
+    @property
+    def is_passthrough(self) -> bool:
+        return self.up == self.down
+
+    def reset(self):
+        """Сбросить состояние (историю и фазу)"""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._next = 0  # next output position, upsampled units, relative to block start
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Ресемплировать очередной блок.
+
+        Args:
+            samples: Моно сэмплы (int16 или float)
+
+        Returns:
+            Блок в out_rate того же dtype
+        """
+        if self.is_passthrough:
+            return samples
+
+        dtype = samples.dtype
+        if dtype == np.int16:
+            x = np.multiply(samples, 1.0 / 32768.0, dtype=np.float32)
+        else:
+            x = samples.astype(np.float32, copy=False)
+
+        n = len(x)
+        buffer = np.concatenate((self._history, x))
+
+        # Output positions that fall inside this block
+        end = n * self.up
+        count = max(0, -(-(end - self._next) // self.down))
+        pos = self._next + self.down * np.arange(count)
+        phase = pos % self.up
+        base = pos // self.up  # newest input sample index within x
+
+        # Window [base - taps + 1, base] in buffer coordinates = base .. base + taps - 1
+        windows = buffer[base[:, None] + self._offsets]
+        y = np.einsum("ij,ij->i", windows, self._bank_rev[phase])
+
+        self._next = int(self._next + self.down * count - end)
+        self._history = buffer[len(buffer) - (self.taps - 1):].copy()
+
+        if dtype == np.int16:
+            return np.clip(y * 32768.0, -32768, 32767).astype(np.int16)
+        return y.astype(dtype, copy=False)
+
+
+def resample(samples: np.ndarray, in_rate: int, out_rate: int) -> np.ndarray:
+    """Однократный ресемплинг целого сигнала"""
+    return PolyphaseResampler(in_rate, out_rate).process(samples)
@@ -0,0 +1,144 @@
+"""
+Alyosha Ring Buffer
+Кольцевой буфер аудио (один писатель / один читатель, без блокировок)
+"""
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Предвыделенный кольцевой буфер int16 для передачи аудио из
+    PortAudio callback в рабочий поток.
+
+    Рассчитан ровно на одного писателя (callback) и одного читателя
+    (consumer thread). Каждая сторона меняет только свою позицию,
+    поэтому блокировки не нужны: позиция публикуется после копирования
+    данных, а присваивание int атомарно под GIL.
+    """
+
+    def __init__(self, capacity: int, history: int = 0, dtype=np.int16):
+        """
+        Args:
+            capacity: Размер буфера в сэмплах
+            history: Сколько уже прочитанных сэмплов защищать от перезаписи
+                (доступны через tail())
+            dtype: Тип сэмплов
+        """
+        if history >= capacity:
+            raise ValueError("history must be smaller than capacity")
+
+        self.capacity = capacity
+        self.history = history
+        self._data = np.zeros(capacity, dtype=dtype)
+
+        # Monotonic positions: only the writer touches _write_pos,
+        # only the reader touches _read_pos
+        self._write_pos = 0
+        self._read_pos = 0
+
+        # Diagnostics
+        self.overflows = 0  # write() calls that did not fit
+        self.dropped_samples = 0  # samples lost to overflows
+        self.underruns = 0  # read() calls with not enough data
+
+    @property
+    def available(self) -> int:
+        """Сколько сэмплов ждёт чтения"""
+        return self._write_pos - self._read_pos
+
+    @property
+    def free(self) -> int:
+        """Сколько сэмплов можно записать без потерь"""
+        return self.capacity - self.history - self.available
+
+    @property
+    def total_written(self) -> int:
+        """Абсолютная позиция писателя (сэмплов с момента создания)"""
+        return self._write_pos
+
+    @property
+    def total_read(self) -> int:
+        """Абсолютная позиция читателя"""
+        return self._read_pos
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        Скопировать сэмплы в буфер (вызывается из audio callback).
+
+        Если читатель отстаёт и места не хватает, лишние сэмплы
+        отбрасываются и учитываются в счётчике переполнений.
+
+        Returns:
+            Количество записанных сэмплов
+        """
+        n = len(samples)
+        free = self.free
+        if n > free:
+            self.overflows += 1
+            self.dropped_samples += n - free
+            n = free
+        if n <= 0:
+            return 0
+
+        start = self._write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:n]
+
+        # Publish only after the data is in place
+        self._write_pos += n
+        return n
+
+    def read(self, n: int, out: np.ndarray = None) -> np.ndarray | None:
+        """
+        Прочитать ровно n сэмплов.
+
+        Args:
+            n: Количество сэмплов
+            out: Необязательный массив для результата (без аллокации)
+
+        Returns:
+            Массив из n сэмплов или None, если данных недостаточно
+        """
+        if self.available < n:
+            self.underruns += 1
+            return None
+
+        if out is None:
+            out = np.empty(n, dtype=self._data.dtype)
+        self._copy_out(self._read_pos, n, out)
+
+        self._read_pos += n
+        return out
+
+    def tail(self, n: int) -> np.ndarray:
+        """
+        Копия последних n уже прочитанных сэмплов (не больше history).
+        Используется для pre-roll перед началом записи.
+        """
+        n = min(n, self.history, self._read_pos)
+        out = np.empty(n, dtype=self._data.dtype)
+        if n:
+            self._copy_out(self._read_pos - n, n, out)
+        return out
+
+    def clear(self):
+        """Отбросить непрочитанные данные (вызывать со стороны читателя)"""
+        self._read_pos = self._write_pos
+
+    def get_stats(self) -> dict:
+        """Счётчики для диагностики отставания"""
+        return {
+            "available": self.available,
+            "overflows": self.overflows,
+            "dropped_samples": self.dropped_samples,
+            "underruns": self.underruns,
+        }
+
+    def _copy_out(self, pos: int, n: int, out: np.ndarray):
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        if first < n:
+            out[first:n] = self._data[:n - first]
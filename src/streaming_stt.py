@@ -0,0 +1,175 @@
+"""
+Alyosha Streaming STT
+Распознавание растущей записи во время LISTENING
+"""
+import logging
+import re
+import threading
+import time
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_PUNCT = re.compile(r"[^\w]+")
+_HOP = 160  # Whisper log-mel hop, samples
+
+
+def _norm(word: str) -> str:
+    return _PUNCT.sub("", word.lower().replace("ё", "е"))
+
+
+class StreamingTranscriber:
+    """
+    Потоковая транскрибация со стабилизацией префикса (LocalAgreement-2).
+
+    Рабочий поток раз в STREAMING_STT_INTERVAL секунд нового аудио
+    распознаёт окно от последнего подтверждённого слова до конца записи.
+    Слова, на которых совпали две последние гипотезы, фиксируются, и
+    окно сдвигается за них: на конце фразы остаётся распознать только
+    хвост после последнего зафиксированного слова.
+    """
+
+    def __init__(self, stt, source, on_partial=None):
+        """
+        Args:
+            stt: STT (transcribe_words)
+            source: Объект с audio_buffer (растущая запись, int16 SAMPLE_RATE)
+            on_partial: Вызывается с текущим текстом (зафиксированное + гипотеза)
+        """
+        self.stt = stt
+        self.source = source
+        self.on_partial = on_partial
+        self.sample_rate = config.SAMPLE_RATE
+        self._interval = int(config.STREAMING_STT_INTERVAL * self.sample_rate)
+        self._min_audio = int(config.STREAMING_STT_MIN_AUDIO * self.sample_rate)
+        self._margin = config.STREAMING_STT_MARGIN
+
+        self.committed = []  # [(start, end, word)], seconds from recording start
+        self._hypothesis = []  # uncommitted words of the last window
+        self._decoded_until = 0  # samples covered by the last window
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Stats
+        self.window_decodes = 0
+        self.window_seconds = 0.0  # audio decoded by streaming windows
+        self.final_window = 0.0  # audio left for the final decode, seconds
+
+    @property
+    def committed_end(self) -> float:
+        """Конец последнего зафиксированного слова, сек"""
+        return self.committed[-1][1] if self.committed else 0.0
+
+    @property
+    def text(self) -> str:
+        """Зафиксированный текст"""
+        return "".join(word for _, _, word in self.committed).strip()
+
+    def start(self):
+        """Запустить рабочий поток"""
+        self._thread = threading.Thread(target=self._loop, name="StreamingSTT", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Остановить без финального распознавания"""
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(0.05):
+            length = len(self.source.audio_buffer)
+            if length < self._min_audio or length - self._decoded_until < self._interval:
+                continue
+            try:
+                self._decode_window(self.source.audio_buffer[:length].copy())
+            except Exception as e:
+                logger.error(f"Streaming STT error: {e}")
+                return
+
+    def _window_start(self) -> float:
+        """Начало окна, сек; кратно шагу кадра log-mel, чтобы подошли готовые признаки"""
+        if not self.committed:
+            return 0.0
+        start = int(max(0.0, self.committed_end - self._margin) * self.sample_rate)
+        return start // _HOP * _HOP / self.sample_rate
+
+    def _transcribe(self, audio: np.ndarray, features: np.ndarray = None) -> list[tuple]:
+        """Распознать окно от _window_start до конца audio, без уже зафиксированного"""
+        start = self._window_start()
+        offset = round(start * self.sample_rate)
+        window = audio[offset:]
+        if features is not None:
+            features = features[:, offset // _HOP:]
+        prompt = self.text[-200:]
+        words = self.stt.transcribe_words(window, prompt=prompt, features=features)
+
+        committed_end = self.committed_end
+        result = []
+        for w_start, w_end, word in words:
+            w_start += start
+            w_end += start
+            # The margin re-decodes the tail of the last committed word
+            if self.committed and (w_start + w_end) / 2 < committed_end:
+                continue
+            result.append((w_start, w_end, word))
+        return result
+
+    def _decode_window(self, audio: np.ndarray):
+        started = time.perf_counter()
+        words = self._transcribe(audio)
+        self._decoded_until = len(audio)
+        self.window_decodes += 1
+        self.window_seconds += len(audio) / self.sample_rate - self._window_start()
+        if self._stop.is_set():
+            return
+
+        # LocalAgreement-2: commit the common prefix of the last two hypotheses
+        agreed = 0
+        for previous, current in zip(self._hypothesis, words):
+            if _norm(previous[2]) != _norm(current[2]):
+                break
+            agreed += 1
+        if agreed:
+            self.committed.extend(words[:agreed])
+        self._hypothesis = words[agreed:]
+
+        logger.debug(
+            f"Streaming window {len(audio) / self.sample_rate:.1f}s in "
+            f"{time.perf_counter() - started:.2f}s: +{agreed} committed"
+        )
+        if self.on_partial:
+            tail = "".join(word for _, _, word in self._hypothesis)
+            self.on_partial((self.text + tail).strip())
+
+    def finish(self, audio: np.ndarray, features: np.ndarray = None) -> str:
+        """
+        Остановить поток и распознать остаток записи
+
+        Args:
+            audio: Полная запись (результат stop_recording)
+            features: log-mel всей записи (AudioRecorder.take_features)
+
+        Returns:
+            Полный текст
+        """
+        self._stop.set()
+        if self._thread:
+            # An in-flight window holds the model; the final decode waits for it anyway
+            self._thread.join()
+
+        if not self.committed:
+            # Nothing stable yet (short phrase): plain full decode
+            self.final_window = len(audio) / self.sample_rate
+            return self.stt.transcribe(audio, features=features)
+
+        start = self._window_start()
+        self.final_window = max(0.0, len(audio) / self.sample_rate - start)
+        words = self._transcribe(audio, features)
+        text = (self.text + "".join(word for _, _, word in words)).strip()
+        logger.info(
+            f"Streaming STT: {len(self.committed)} words committed early, "
+            f"final window {self.final_window:.1f}s of {len(audio) / self.sample_rate:.1f}s"
+        )
+        return text
@@ -2,55 +2,159 @@
 Alyosha Speech-to-Text
 Распознавание речи с помощью Whisper
 """
+import logging
+import threading
+import time
 import numpy as np
 from faster_whisper import WhisperModel
 import tempfile
 import wave
 import config
+from .features import speech_bounds, whisper_normalize
+from .stt_autotune import SttAutotuner, load_tuning
+
+logger = logging.getLogger(__name__)
+
+
+class _PreparedFeatures:
+    """
+    Обёртка над FeatureExtractor модели: если перед transcribe() признаки
+    уже посчитаны (во время записи), отдаёт их вместо пересчёта.
+    """
+    
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.pending = None  # normalized features for the next call
+    
+    def __call__(self, waveform, padding=160, chunk_length=None):
+        features, self.pending = self.pending, None
+        if (
+            features is not None and padding == 160 and chunk_length is None
+            and features.shape == (len(self.extractor.mel_filters), len(waveform) // self.extractor.hop_length + 1)
+        ):
+            return features
+        return self.extractor(waveform, padding=padding, chunk_length=chunk_length)
+    
+    def __getattr__(self, name):
+        return getattr(self.extractor, name)
 
 
 class STT:
-    """Speech-to-Text с использованием faster-whisper"""
+    """
+    Speech-to-Text с использованием faster-whisper
+    
+    Каскад: сначала быстрый черновой Whisper (WHISPER_DRAFT_MODEL_SIZE),
+    основная модель перераспознаёт, только если черновик не уверен
+    (avg_logprob / no_speech_prob сегментов за порогом). Обе модели
+    держатся в памяти.
+    """
+    
+    # SPEED-OPTIMIZED settings for 2026 (shared by full and streaming decodes)
+    DECODE_OPTIONS = dict(
+        beam_size=1,  # Was 5 — greedy decoding is much faster
+        language="ru",
+        vad_filter=False,  # Rely on assistant.py silence detection
+        condition_on_previous_text=False,
+        temperature=0.0,
+        compression_ratio_threshold=2.4,  # Skip bad segments faster
+        log_prob_threshold=-1.0,  # Accept all reasonable transcriptions
+        no_speech_threshold=0.6,  # Higher = faster detection of silence
+    )
     
     def __init__(self):
         self.model = None
+        self.draft_model = None  # fast first pass, None = no cascade
+        self.tuning = None  # stt_autotune result the models were loaded with
         self.is_loaded = False
+        # One decode at a time: streaming windows and the final decode share the models
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per calling thread: last_no_speech_prob
+        # Set while the assistant has no request in flight; background calibration waits for it
+        self.idle = threading.Event()
+        self.idle.set()
+        
+        # Stats
+        self.prepared_decodes = 0  # decodes that reused features from the recording
+        self.trimmed_seconds = 0.0  # leading/trailing silence cut before encoding
+        self.draft_decodes = 0
+        self.draft_accepted = 0
+        self.draft_rejected = {"empty": 0, "no_speech": 0, "logprob": 0}
+        self.main_decodes = 0
+        self.draft_time = 0.0
+        self.main_time = 0.0
     
     def load(self) -> bool:
-        """Загрузить модель Whisper"""
+        """Загрузить модели Whisper (основную и черновую)"""
         try:
             # Use configurable model size (default: small for better accuracy)
             model_size = config.WHISPER_MODEL_SIZE
-            print(f"[STT] Loading Whisper model: {model_size}")
-            
-            self.model = WhisperModel(
-                model_size,
-                device="cpu",
-                compute_type="int8"
-            )
+            options = {"compute_type": "int8"}
+            self.tuning = load_tuning() if config.STT_AUTOTUNE else None
+            if self.tuning:
+                options = {
+                    key: self.tuning[key] for key in ("compute_type", "cpu_threads")
+                }
+                if not config.WHISPER_MODEL_SIZE_PINNED:
+                    model_size = self.tuning["model_size"]
+            self.model = self._load_model(model_size, **options)
             self.is_loaded = True
-            print(f"[STT] Whisper {model_size} loaded successfully")
-            
-            # Warmup: transcribe a short silent sample to pre-compile
-            try:
-                warmup_audio = np.zeros(16000, dtype=np.float32)  # 1 second of silence
-                list(self.model.transcribe(warmup_audio, language="ru", vad_filter=True))
-                print("[STT] Model warmup complete")
-            except Exception:
-                pass  # Warmup is optional
-            
-            return True
         except Exception as e:
             print(f"Failed to load Whisper model: {e}")
             return False
+        
+        draft_size = config.WHISPER_DRAFT_MODEL_SIZE
+        if draft_size and draft_size != model_size:
+            try:
+                self.draft_model = self._load_model(draft_size, **options)
+                print(f"[STT] Cascade: {draft_size} draft, {model_size} re-decodes unsure results")
+            except Exception as e:
+                print(f"[STT] Draft model {draft_size} unavailable, using {model_size} only: {e}")
+        
+        if config.STT_AUTOTUNE and self.tuning is None:
+            # Never in the way of the first command: default options now, tuned ones next start
+            logger.info("No STT tuning for this machine yet, calibrating in background")
+            threading.Thread(target=self._calibrate, name="SttAutotune", daemon=True).start()
+        return True
+    
+    def _calibrate(self):
+        """Калибровка под эту машину; результат применится при следующей загрузке"""
+        try:
+            tuning = SttAutotuner(progress=logger.info, idle=self.idle).run()
+        except Exception as e:
+            logger.error(f"STT calibration failed: {e}")
+            return
+        if tuning:
+            logger.info("STT tuning saved, applied on next start")
+    
+    def _load_model(self, model_size: str, **options) -> WhisperModel:
+        print(f"[STT] Loading Whisper model: {model_size} {options}")
+        model = WhisperModel(
+            model_size,
+            device="cpu",
+            **options
+        )
+        model.feature_extractor = _PreparedFeatures(model.feature_extractor)
+        print(f"[STT] Whisper {model_size} loaded successfully")
+        
+        # Warmup: transcribe a short silent sample to pre-compile
+        try:
+            warmup_audio = np.zeros(16000, dtype=np.float32)  # 1 second of silence
+            list(model.transcribe(warmup_audio, language="ru", vad_filter=True))
+            print("[STT] Model warmup complete")
+        except Exception:
+            pass  # Warmup is optional
+        return model
     
-    def transcribe(self, audio: np.ndarray, sample_rate: int = None) -> str:
+    def transcribe(self, audio: np.ndarray, sample_rate: int = None, features: np.ndarray = None) -> str:
         """
         Преобразовать аудио в текст
         
         Args:
             audio: Аудио данные (int16 или float32)
             sample_rate: Частота дискретизации
+            features: log-mel этой записи из WhisperLogMel.finish(); тогда
+                модель не пересчитывает спектрограмму, а тишина по краям
+                отрезается до энкодера
         
         Returns:
             Распознанный текст
@@ -61,29 +165,12 @@ class STT:
         sr = sample_rate or config.SAMPLE_RATE
         
         try:
-            # Convert to float32 if needed
-            if audio.dtype == np.int16:
-                audio_float = audio.astype(np.float32) / 32768.0
-            else:
-                audio_float = audio.astype(np.float32)
-            
-            # Save to temporary WAV file
             print("[STT] Starting transcription...")
             
-            # Transcribe with SPEED-OPTIMIZED settings for 2026
-            segments, info = self.model.transcribe(
-                audio_float, 
-                beam_size=1,  # Was 5 — greedy decoding is much faster
-                language="ru",
-                vad_filter=False,  # Rely on assistant.py silence detection
-                condition_on_previous_text=False,
-                temperature=0.0,
-                compression_ratio_threshold=2.4,  # Skip bad segments faster
-                log_prob_threshold=-1.0,  # Accept all reasonable transcriptions
-                no_speech_threshold=0.6,  # Higher = faster detection of silence
-            )
+            if features is not None:
+                audio, features = self._trim(audio, whisper_normalize(features))
             
-            # Combine segments
+            segments = self._cascade(audio, features)
             text = " ".join([segment.text for segment in segments]).strip()
             if text:
                 print(f"[STT] Transcribed: '{text}'")
@@ -96,6 +183,138 @@ class STT:
             print(f"STT Error: {e}")
             return ""
     
+    def transcribe_words(self, audio: np.ndarray, prompt: str = None, features: np.ndarray = None) -> list[tuple]:
+        """
+        Распознать окно с пословными метками времени (для потокового STT)
+        
+        Args:
+            audio: Аудио данные (int16 или float32) в SAMPLE_RATE
+            prompt: Уже распознанный текст перед окном (initial_prompt)
+            features: log-mel окна из WhisperLogMel (без нормализации)
+        
+        Returns:
+            [(start, end, word), ...] — секунды от начала окна; слово
+            с ведущим пробелом, как его выдаёт Whisper
+        """
+        if not self.is_loaded or len(audio) == 0:
+            return []
+        
+        segments = self._cascade(
+            audio,
+            None if features is None else whisper_normalize(features),
+            word_timestamps=True,
+            initial_prompt=prompt or None,
+        )
+        return [
+            (word.start, word.end, word.word)
+            for segment in segments
+            for word in (segment.words or ())
+        ]
+    
+    def _cascade(self, audio: np.ndarray, features: np.ndarray = None, **options) -> list:
+        """Черновая модель, при неуверенности — основная"""
+        if self.draft_model is not None:
+            started = time.perf_counter()
+            segments = self._decode(self.draft_model, audio, features, **options)
+            self.draft_time += time.perf_counter() - started
+            self.draft_decodes += 1
+            reason = self._draft_rejection(segments)
+            if reason is None:
+                self.draft_accepted += 1
+                return segments
+            self.draft_rejected[reason] += 1
+            print(
+                f"[STT] Draft rejected ({reason}), re-decoding "
+                f"({self.draft_decodes - self.draft_accepted}/{self.draft_decodes} fallbacks)"
+            )
+        
+        started = time.perf_counter()
+        segments = self._decode(self.model, audio, features, **options)
+        self.main_time += time.perf_counter() - started
+        self.main_decodes += 1
+        return segments
+    
+    def _decode(self, model: WhisperModel, audio: np.ndarray, features: np.ndarray = None, **options) -> list:
+        with self._lock:
+            self._prepare(model, audio, features)
+            segments, info = model.transcribe(
+                self._to_float32(audio), **self.DECODE_OPTIONS, **options
+            )
+            # Decoding happens while iterating
+            segments = list(segments)
+            # Silence only if every segment looks like silence
+            self._local.no_speech_prob = min((s.no_speech_prob for s in segments), default=None)
+        return segments
+    
+    @property
+    def last_no_speech_prob(self) -> float | None:
+        """
+        Наименьший no_speech_prob сегментов последнего распознавания
+        этого потока: окна потокового STT в своём потоке его не затирают
+        """
+        return getattr(self._local, "no_speech_prob", None)
+    
+    @staticmethod
+    def _draft_rejection(segments: list) -> str | None:
+        """Почему результат черновой модели не годится (None — годится)"""
+        if not "".join(segment.text for segment in segments).strip():
+            return "empty"
+        for segment in segments:
+            if segment.no_speech_prob > config.STT_DRAFT_MAX_NO_SPEECH:
+                return "no_speech"
+            if segment.avg_logprob < config.STT_DRAFT_MIN_LOGPROB:
+                return "logprob"
+        return None
+    
+    def _prepare(self, model: WhisperModel, audio: np.ndarray, features: np.ndarray = None):
+        """Отдать готовые признаки следующему вызову model.transcribe (под _lock)"""
+        extractor = model.feature_extractor
+        if features is None or not isinstance(extractor, _PreparedFeatures):
+            return
+        if features.shape != (len(extractor.mel_filters), len(audio) // extractor.hop_length + 1):
+            return  # not this audio or another mel layout (large-v3): let the model compute its own
+        extractor.pending = features
+        self.prepared_decodes += 1
+    
+    def _trim(self, audio: np.ndarray, features: np.ndarray) -> tuple:
+        """Отрезать тишину в начале и конце записи вместе с её кадрами"""
+        if not config.WHISPER_TRIM_SILENCE:
+            return audio, features
+        hop = 160  # WhisperLogMel hop
+        margin = int(config.WHISPER_TRIM_MARGIN * config.SAMPLE_RATE / hop)
+        first, last = speech_bounds(features, config.WHISPER_TRIM_DB, margin)
+        if first == 0 and last == features.shape[1]:
+            return audio, features
+        # Keep whole frames: the kept audio has exactly last - first frames
+        trimmed = audio[first * hop:(last - 1) * hop]
+        if len(trimmed) < config.SAMPLE_RATE // 2:
+            return audio, features
+        self.trimmed_seconds += (len(audio) - len(trimmed)) / config.SAMPLE_RATE
+        return trimmed, features[:, first:last]
+    
+    def get_stats(self) -> dict:
+        """Счётчики распознавания"""
+        return {
+            "prepared_decodes": self.prepared_decodes,
+            "trimmed_seconds": round(self.trimmed_seconds, 2),
+            "draft_decodes": self.draft_decodes,
+            "draft_accepted": self.draft_accepted,
+            "draft_rejected": dict(self.draft_rejected),
+            "fallback_rate": (
+                (self.draft_decodes - self.draft_accepted) / self.draft_decodes
+                if self.draft_decodes else None
+            ),
+            "main_decodes": self.main_decodes,
+            "draft_time": round(self.draft_time, 2),
+            "main_time": round(self.main_time, 2),
+        }
+    
+    @staticmethod
+    def _to_float32(audio: np.ndarray) -> np.ndarray:
+        if audio.dtype == np.int16:
+            return np.multiply(audio, 1.0 / 32768.0, dtype=np.float32)
+        return audio.astype(np.float32, copy=False)
+    
     def _save_wav(self, path: str, audio: np.ndarray, sample_rate: int):
         """Сохранить аудио в WAV файл"""
         # Convert to int16
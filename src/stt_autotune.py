@@ -0,0 +1,272 @@
+"""
+Alyosha STT Autotune
+Подбор размера Whisper, cpu_threads и compute_type под машину
+"""
+import json
+import logging
+import os
+import threading
+import time
+import wave
+from datetime import datetime
+
+import numpy as np
+
+import config
+from .resample import resample
+from .wake_matcher import edit_distance, normalize
+
+logger = logging.getLogger(__name__)
+
+# Spoken once by Piper into STT_TUNING_CLIP when the user has no clip of their own
+REFERENCE_TEXT = (
+    "Алёша, включи, пожалуйста, музыку погромче и напомни мне через "
+    "двадцать минут проверить почту. Какая завтра погода в Москве?"
+)
+
+# Accuracy prior: bigger model, then the float32 accumulator
+SIZE_RANK = {"tiny": 0, "base": 1, "small": 2, "medium": 3, "large-v3-turbo": 4, "large-v3": 5}
+COMPUTE_RANK = {"int8": 0, "int8_float32": 1}
+
+TUNING_VERSION = 2  # 2: num_workers no longer tuned
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """WER по нормализованным словам"""
+    ref = normalize(reference).split()
+    hyp = normalize(hypothesis).split()
+    if not ref:
+        return float(bool(hyp))
+    return edit_distance(ref, hyp) / len(ref)
+
+
+def load_tuning() -> dict | None:
+    """
+    Сохранённый результат калибровки
+
+    Returns:
+        dict или None, если калибровки нет или она сделана на другой машине
+    """
+    try:
+        tuning = json.loads(config.STT_TUNING_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if tuning.get("version") != TUNING_VERSION or tuning.get("cpu_count") != os.cpu_count():
+        logger.info("STT tuning is stale (other machine or format), recalibration needed")
+        return None
+    return tuning
+
+
+def save_tuning(tuning: dict):
+    """Записать результат в STT_TUNING_FILE"""
+    config.STT_TUNING_FILE.parent.mkdir(parents=True, exist_ok=True)
+    config.STT_TUNING_FILE.write_text(json.dumps(tuning, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def describe(tuning: dict | None) -> str:
+    """Короткое описание для UI"""
+    if not tuning:
+        return "Не откалибровано — используются настройки по умолчанию"
+    return (
+        f"{tuning['model_size']} · {tuning['compute_type']} · {tuning['cpu_threads']} потоков · "
+        f"RTF {tuning['rtf']:.2f} (цель {tuning['target_rtf']:.2f}) · {tuning['calibrated_at'][:10]}"
+    )
+
+
+def reference_clip() -> tuple[np.ndarray | None, str | None]:
+    """
+    Эталонная запись для калибровки
+
+    STT_TUNING_CLIP (16-bit WAV, рядом .txt с текстом — необязательно);
+    если её нет, она один раз синтезируется Piper из REFERENCE_TEXT.
+
+    Returns:
+        (float32 в SAMPLE_RATE, текст или None) или (None, None)
+    """
+    path = config.STT_TUNING_CLIP
+    if not path.exists():
+        from .tts import PiperTTS
+
+        piper = PiperTTS()
+        wav = piper.synthesize(REFERENCE_TEXT) if piper.load() else None
+        if not wav:
+            return None, None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(wav)
+        path.with_suffix(".txt").write_text(REFERENCE_TEXT, encoding="utf-8")
+
+    with wave.open(str(path), "rb") as wf:
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1)
+    audio = (pcm / 32768.0).astype(np.float32)
+    if rate != config.SAMPLE_RATE:
+        audio = resample(audio, rate, config.SAMPLE_RATE)
+
+    text_path = path.with_suffix(".txt")
+    text = text_path.read_text(encoding="utf-8").strip() if text_path.exists() else None
+    return audio, text
+
+
+def model_available(model_size: str) -> bool:
+    """Модель уже скачана (калибровка ничего не загружает из сети)"""
+    from faster_whisper.utils import download_model
+
+    try:
+        download_model(model_size, local_files_only=True)
+        return True
+    except Exception:
+        return False
+
+
+class SttAutotuner:
+    """
+    Калибровка faster-whisper на эталонной записи.
+
+    Размеры перебираются от меньшего к большему; для каждого размера и
+    compute_type подбирается cpu_threads. Как только лучший RTF размера
+    выходит за цель, большие размеры не проверяются. Из конфигураций в
+    пределах цели выбирается самая точная: меньший WER (если текст записи
+    известен), затем больший размер и compute_type, затем меньший RTF.
+
+    num_workers не подбирается: он ускоряет только параллельные
+    распознавания, а ассистент распознаёт по одному (STT._lock).
+
+    С idle калибровка идёт только пока ассистент простаивает: перед
+    каждым замером ждёт idle, а прогон, к концу которого ассистент занят,
+    отбрасывается и повторяется. Ожидание не входит в STT_TUNING_MAX_SECONDS.
+    """
+
+    def __init__(self, target_rtf: float = None, progress=None, idle: threading.Event = None):
+        """
+        Args:
+            target_rtf: Допустимое время распознавания / длительность записи
+            progress: Вызывается со строкой о ходе калибровки
+            idle: Установлен, пока ассистент простаивает (None — не ждать)
+        """
+        self.target_rtf = target_rtf or config.STT_TUNING_TARGET_RTF
+        self.progress = progress or (lambda message: None)
+        self.idle = idle
+        self.candidates = []  # every measured configuration
+        self._paused = 0.0  # seconds spent waiting for idle
+
+    def thread_options(self) -> list[int]:
+        cores = os.cpu_count() or 1
+        return sorted({n for n in (1, 2, 4, 8, cores) if n <= cores})
+
+    def run(self) -> dict | None:
+        """
+        Откалибровать, сохранить и вернуть лучшую конфигурацию
+
+        Returns:
+            dict (model_size, compute_type, cpu_threads, rtf, ...)
+            или None, если нет эталонной записи или ни одной модели
+        """
+        audio, text = reference_clip()
+        if audio is None:
+            logger.warning("STT tuning skipped: no reference clip and Piper is unavailable")
+            return None
+
+        duration = len(audio) / config.SAMPLE_RATE
+        deadline = time.monotonic() + config.STT_TUNING_MAX_SECONDS
+        sizes = [
+            size for size in config.STT_TUNING_SIZES
+            if size == config.WHISPER_MODEL_SIZE or model_available(size)
+        ]
+        if config.WHISPER_MODEL_SIZE_PINNED:
+            sizes = [config.WHISPER_MODEL_SIZE]
+        sizes.sort(key=lambda size: SIZE_RANK.get(size, 0))
+        logger.info(f"STT tuning on {duration:.1f}s clip, sizes {sizes}, target RTF {self.target_rtf}")
+
+        for size in sizes:
+            best_rtf = None
+            for compute_type in config.STT_TUNING_COMPUTE_TYPES:
+                results = []
+                for threads in self.thread_options():
+                    if self._expired(deadline):
+                        break
+                    results.append(self._measure(audio, text, size, compute_type, threads))
+                results = [r for r in results if r]
+                if not results:
+                    continue
+                fastest = min(r["rtf"] for r in results)
+                best_rtf = fastest if best_rtf is None else min(best_rtf, fastest)
+            if best_rtf is None or best_rtf > self.target_rtf or self._expired(deadline):
+                # Larger models are only slower
+                break
+
+        if not self.candidates:
+            return None
+        within = [c for c in self.candidates if c["rtf"] <= self.target_rtf]
+        pool = within or [min(self.candidates, key=lambda c: c["rtf"])]
+        best = min(pool, key=lambda c: (
+            round(c["wer"], 2) if c["wer"] is not None else 0.0,
+            -SIZE_RANK.get(c["model_size"], 0),
+            -COMPUTE_RANK.get(c["compute_type"], 0),
+            c["rtf"],
+        ))
+
+        tuning = {
+            "version": TUNING_VERSION,
+            **{key: best[key] for key in ("model_size", "compute_type", "cpu_threads", "rtf", "wer")},
+            "target_rtf": self.target_rtf,
+            "met_target": bool(within),
+            "clip_seconds": round(duration, 2),
+            "cpu_count": os.cpu_count(),
+            "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+            "candidates": self.candidates,
+        }
+        save_tuning(tuning)
+        logger.info(f"STT tuning: {describe(tuning)}")
+        self.progress(describe(tuning))
+        return tuning
+
+    def _wait_idle(self):
+        """Дождаться простоя ассистента"""
+        if self.idle is None or self.idle.is_set():
+            return
+        logger.info("STT tuning paused while the assistant is busy")
+        started = time.monotonic()
+        self.idle.wait()
+        self._paused += time.monotonic() - started
+
+    def _expired(self, deadline: float) -> bool:
+        return time.monotonic() - self._paused > deadline
+
+    def _measure(self, audio, text, model_size, compute_type, cpu_threads) -> dict | None:
+        """Загрузить конфигурацию и замерить лучший из двух прогонов (после прогрева)"""
+        from faster_whisper import WhisperModel
+        from .stt import STT
+
+        label = f"{model_size}/{compute_type}/{cpu_threads}t"
+        self.progress(f"Калибровка: {label}")
+        try:
+            self._wait_idle()
+            model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+            list(model.transcribe(audio[: config.SAMPLE_RATE], **STT.DECODE_OPTIONS)[0])  # warmup
+            timings = []
+            while len(timings) < 2:
+                self._wait_idle()
+                started = time.perf_counter()
+                hypothesis = " ".join(s.text for s in model.transcribe(audio, **STT.DECODE_OPTIONS)[0])
+                elapsed = time.perf_counter() - started
+                if self.idle is not None and not self.idle.is_set():
+                    # Shared the CPU with a request: the timing says nothing about the machine
+                    logger.info(f"STT tuning: {label} run overlapped a request, repeating")
+                    continue
+                timings.append(elapsed)
+        except Exception as e:
+            logger.warning(f"STT tuning: {label} failed: {e}")
+            return None
+
+        result = {
+            "model_size": model_size,
+            "compute_type": compute_type,
+            "cpu_threads": cpu_threads,
+            "rtf": round(min(timings) / (len(audio) / config.SAMPLE_RATE), 3),
+            "wer": round(word_error_rate(text, hypothesis), 3) if text else None,
+        }
+        logger.info(f"STT tuning: {label} RTF {result['rtf']} WER {result['wer']}")
+        self.candidates.append(result)
+        return result
@@ -0,0 +1,99 @@
+"""
+Alyosha Transcript Filter
+Отсев галлюцинаций Whisper до запроса к LLM
+"""
+import logging
+import re
+
+import config
+from .wake_matcher import normalize
+
+logger = logging.getLogger(__name__)
+
+# Whisper trained on subtitled video: on silence and noise it "hears" credits
+# and outros. Matched against whole normalized sentences
+HALLUCINATION_PATTERNS = (
+    r"продолжение следует",
+    r"субтитры (сделал|создавал|создал|подготовил|делал)\w* .*",
+    r"(редактор|корректор) субтитров .*",
+    r"корректор \w\.? ?\w+",
+    r"спасибо за просмотр\w*",
+    r"подписывайтесь на (наш |мой )?канал\w*",
+    r"(ставьте|ставим) лайки?\w*.*",
+)
+
+# Untagged sound words are also real one-word requests ("музыка", "тишина"):
+# dropped only when Whisper leans towards silence as well
+SOUND_WORD_PATTERNS = (
+    r"(динамичная |спокойная |грустная |веселая )?музыка",
+    r"аплодисменты|смех|тишина|шум",
+)
+
+# Sound tags: [музыка], (смех), *аплодисменты*, ♪
+_TAG = re.compile(r"\[[^\]]*\]|\([^)]*\)|\*[^*]*\*|♪+")
+_SENTENCES = re.compile(r"(?<=[.!?…])\s+")
+
+
+class TranscriptFilter:
+    """
+    Проверка текста STT перед отправкой в LLM.
+
+    Звуковые теги и предложения, целиком совпадающие с известными
+    галлюцинациями, вырезаются; голые звуковые слова («музыка») — только
+    при no_speech_prob выше TRANSCRIPT_SOUND_WORD_NO_SPEECH, иначе это
+    команда. Если после этого не осталось слов или no_speech_prob выше
+    TRANSCRIPT_MAX_NO_SPEECH, запрос отбрасывается.
+    """
+
+    def __init__(self, patterns=HALLUCINATION_PATTERNS, max_no_speech: float = None,
+                 sound_words=SOUND_WORD_PATTERNS, sound_word_no_speech: float = None):
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in patterns))
+        self.sound_pattern = re.compile("|".join(f"(?:{p})" for p in sound_words))
+        self.max_no_speech = config.TRANSCRIPT_MAX_NO_SPEECH if max_no_speech is None else max_no_speech
+        self.sound_word_no_speech = (
+            config.TRANSCRIPT_SOUND_WORD_NO_SPEECH if sound_word_no_speech is None else sound_word_no_speech
+        )
+
+        # Stats
+        self.dropped = {"hallucination": 0, "no_speech": 0, "empty": 0}
+        self.stripped = 0  # transcripts kept after cutting junk out of them
+
+    def clean(self, text: str, no_speech_prob: float = None) -> tuple[str, str | None]:
+        """
+        Очистить транскрипт
+
+        Args:
+            text: Текст STT
+            no_speech_prob: Вероятность тишины по сегментам Whisper (если известна)
+
+        Returns:
+            (текст, None) или ("", причина отсева)
+        """
+        if no_speech_prob is not None and no_speech_prob > self.max_no_speech:
+            return self._drop("no_speech", text)
+
+        silent = no_speech_prob is not None and no_speech_prob > self.sound_word_no_speech
+        untagged = _TAG.sub(" ", text)
+        kept = [
+            sentence for sentence in _SENTENCES.split(untagged.strip())
+            if normalize(sentence) and not self._is_junk(normalize(sentence), silent)
+        ]
+        cleaned = " ".join(kept).strip()
+        if not normalize(cleaned):
+            return self._drop("hallucination" if normalize(text) else "empty", text)
+        if normalize(cleaned) != normalize(text):
+            self.stripped += 1
+            logger.info(f"Transcript junk removed: {text!r} -> {cleaned!r}")
+        return cleaned, None
+
+    def _is_junk(self, sentence: str, silent: bool) -> bool:
+        return bool(self.pattern.fullmatch(sentence) or (silent and self.sound_pattern.fullmatch(sentence)))
+
+    def _drop(self, reason: str, text: str) -> tuple[str, str]:
+        self.dropped[reason] += 1
+        logger.info(f"Transcript dropped ({reason}): {text!r}")
+        return "", reason
+
+    def get_stats(self) -> dict:
+        """Счётчики отсева"""
+        return {"dropped": dict(self.dropped), "stripped": self.stripped}
@@ -2,91 +2,102 @@
 Alyosha Text-to-Speech 2026
 Multi-engine TTS: Piper (free/offline) + ElevenLabs (premium)
 """
-import subprocess
-import tempfile
-import os
+import io
 import logging
-from pathlib import Path
+import threading
+import time
+import wave
+
+import numpy as np
+
 import config
 
 logger = logging.getLogger(__name__)
 
 
 class PiperTTS:
-    """Free, offline TTS using Piper (ONNX models)"""
+    """
+    Free, offline TTS using Piper (ONNX models)
+
+    The voice is loaded once through the piper Python API and stays resident:
+    no process spawn, model load or temp file per utterance.
+    """
     
     def __init__(self):
         self.voice = config.PIPER_VOICE
         self.model_path = config.PIPER_MODEL_PATH
+        self.config_path = config.PIPER_CONFIG_PATH
+        self.model = None  # piper.PiperVoice
+        self.sample_rate = None
         self.is_available = False
+        self._lock = threading.Lock()  # one synthesis at a time per voice
         
     def load(self) -> bool:
-        """Check if Piper and model are available"""
-        # Check piper binary
+        """Load the Piper voice into memory"""
         try:
-            result = subprocess.run(
-                ["piper", "--help"],
-                capture_output=True,
-                timeout=5
-            )
-            piper_installed = result.returncode == 0
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            piper_installed = False
-            
-        if not piper_installed:
-            logger.warning("Piper not installed. Run: pip install piper-tts")
+            # AudioChunk streaming API appeared in piper-tts 1.3
+            from piper import AudioChunk, PiperVoice  # noqa: F401
+        except ImportError:
+            logger.warning("Piper not installed or too old. Run: pip install 'piper-tts>=1.3.0'")
             return False
             
         # Check model file
         if not self.model_path.exists():
             logger.warning(f"Piper model not found: {self.model_path}")
-            logger.info("Download with: piper --download-dir models/piper --model ru_RU-dmitri-medium")
+            logger.info("Download with: python -m piper.download_voices --download-dir models/piper ru_RU-dmitri-medium")
+            return False
+        
+        try:
+            started = time.perf_counter()
+            self.model = PiperVoice.load(
+                self.model_path,
+                config_path=self.config_path if self.config_path.exists() else None,
+            )
+        except Exception as e:
+            logger.error(f"Piper voice load failed: {e}")
             return False
             
+        self.sample_rate = self.model.config.sample_rate
         self.is_available = True
-        logger.info(f"Piper TTS loaded: {self.voice}")
+        logger.info(
+            f"Piper TTS loaded: {self.voice} ({self.sample_rate} Hz, "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms)"
+        )
         return True
     
+    def stream(self, text: str):
+        """
+        Synthesize raw PCM, one block per sentence as soon as it is ready
+
+        Yields:
+            float32 mono samples at self.sample_rate
+        """
+        if not self.is_available or not text.strip():
+            return
+        chunks = self.model.synthesize(text)
+        while True:
+            # Not held across yield: a stalled consumer must not block the voice
+            with self._lock:
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk.audio_float_array
+    
     def synthesize(self, text: str) -> bytes | None:
-        """Synthesize speech using Piper"""
+        """Synthesize speech using Piper (16-bit WAV in memory)"""
         if not self.is_available or not text.strip():
             return None
             
         try:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-                output_path = f.name
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(self.sample_rate)
+                for samples in self.stream(text):
+                    wav_file.writeframes((samples * 32767).astype(np.int16).tobytes())
+            return buffer.getvalue()
             
-            # Run piper
-            process = subprocess.run(
-                [
-                    "piper",
-                    "--model", str(self.model_path),
-                    "--output_file", output_path
-                ],
-                input=text.encode('utf-8'),
-                capture_output=True,
-                timeout=30
-            )
-            
-            if process.returncode != 0:
-                logger.error(f"Piper error: {process.stderr.decode()}")
-                return None
-            
-            # Read output and convert to MP3 for consistency
-            with open(output_path, 'rb') as f:
-                wav_data = f.read()
-            
-            # Clean up
-            try:
-                os.unlink(output_path)
-            except OSError:
-                pass
-                
-            return wav_data
-            
-        except subprocess.TimeoutExpired:
-            logger.error("Piper synthesis timeout")
-            return None
         except Exception as e:
             logger.error(f"Piper error: {e}")
             return None
@@ -95,6 +106,8 @@ class PiperTTS:
 class ElevenLabsTTS:
     """Premium TTS using ElevenLabs API"""
     
+    MODEL_ID = "eleven_flash_v2_5"
+    
     def __init__(self):
         self.client = None
         self.voice_id = config.ELEVENLABS_VOICE_ID
@@ -126,7 +139,7 @@ class ElevenLabsTTS:
                 voice_id=self.voice_id,
                 output_format="mp3_44100_128",
                 text=text,
-                model_id="eleven_flash_v2_5",
+                model_id=self.MODEL_ID,
                 voice_settings={
                     "stability": 0.5,
                     "similarity_boost": 0.75,
@@ -213,6 +226,26 @@ class TTS:
         
         return None
     
+    def cache_identity(self) -> tuple | None:
+        """(engine, voice, model) of the active engine: what the audio depends on besides text"""
+        if self.active_engine == "elevenlabs":
+            return ("elevenlabs", self.elevenlabs.voice_id, self.elevenlabs.MODEL_ID)
+        elif self.active_engine == "piper":
+            return ("piper", self.piper.voice, self.piper.model_path.name)
+        return None
+    
+    def synthesize_pcm(self, text: str):
+        """
+        Raw PCM stream of the active engine, if it has one
+
+        Returns:
+            Iterator of (float32 samples, sample_rate) blocks, or None when the
+            engine only returns encoded audio (use synthesize)
+        """
+        if self.active_engine != "piper" or not text.strip():
+            return None
+        return ((samples, self.piper.sample_rate) for samples in self.piper.stream(text))
+    
     def synthesize_stream(self, text: str):
         """
         Stream synthesis (only ElevenLabs supports true streaming)
@@ -228,7 +261,7 @@ class TTS:
                     voice_id=self.elevenlabs.voice_id,
                     output_format="mp3_44100_128",
                     text=text,
-                    model_id="eleven_flash_v2_5"
+                    model_id=self.elevenlabs.MODEL_ID
                 )
                 for chunk in audio_generator:
                     yield chunk
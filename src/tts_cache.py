@@ -0,0 +1,196 @@
+"""
+Alyosha TTS Cache
+Кэш синтезированных фраз: память + диск, адресация по содержимому
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Текст для ключа: NFC и схлопнутые пробелы (регистр и пунктуация влияют на интонацию)"""
+    return _SPACES.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TTSCache:
+    """
+    Двухуровневый LRU синтезированного PCM.
+
+    Ключ — sha256 от движка, голоса, модели, частоты и нормализованного
+    текста. На диске каждая фраза — .npy с float32 на частоте движка
+    воспроизведения; попадание отдаётся через np.memmap, без чтения
+    файла целиком. В памяти держатся только что синтезированные фразы в
+    пределах TTS_CACHE_MEMORY_MB; открытые memmap-представления — отдельно,
+    до TTS_CACHE_MAPPED_ENTRIES штук (их данные в page cache, а не в
+    куче); на диске — в пределах TTS_CACHE_DISK_MB. При переполнении
+    вытесняются давно не звучавшие.
+    """
+
+    def __init__(self, directory=None, memory_bytes: int = None, disk_bytes: int = None,
+                 mapped_entries: int = None):
+        self.directory = directory or config.TTS_CACHE_DIR
+        self.memory_bytes = config.TTS_CACHE_MEMORY_MB * 1024 * 1024 if memory_bytes is None else memory_bytes
+        self.disk_bytes = config.TTS_CACHE_DISK_MB * 1024 * 1024 if disk_bytes is None else disk_bytes
+        self.mapped_entries = config.TTS_CACHE_MAPPED_ENTRIES if mapped_entries is None else mapped_entries
+        self._memory = OrderedDict()  # key -> synthesized samples (heap), oldest first
+        self._memory_size = 0
+        self._mapped = OrderedDict()  # key -> np.memmap of the disk entry, oldest first
+        self._disk = None  # key -> file size, oldest first; scanned on first use
+        self._disk_size = 0
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = {"memory": 0, "mapped": 0, "disk": 0}
+        self.misses = 0
+        self.evictions = {"memory": 0, "mapped": 0, "disk": 0}
+
+    @staticmethod
+    def key(identity: tuple, text: str, sample_rate: int) -> str:
+        """
+        Ключ фразы
+
+        Args:
+            identity: (движок, голос, модель) — TTS.cache_identity()
+            text: Текст фразы
+            sample_rate: Частота хранимого PCM
+        """
+        material = "\x1f".join(map(str, (*identity, sample_rate, normalize_text(text))))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> np.ndarray | None:
+        """PCM фразы (только чтение) или None"""
+        with self._lock:
+            samples = self._memory.get(key)
+            if samples is not None:
+                self._memory.move_to_end(key)
+                self._touch(key)
+                self.hits["memory"] += 1
+                return samples
+
+            samples = self._mapped.get(key)
+            if samples is not None:
+                self._mapped.move_to_end(key)
+                self._touch(key)
+                self.hits["mapped"] += 1
+                return samples
+
+            self._scan()
+            if key in self._disk:
+                try:
+                    samples = np.load(self._path(key), mmap_mode="r")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"TTS cache entry unreadable, dropped: {e}")
+                    self._remove(key)
+                else:
+                    self._touch(key)
+                    self._map(key, samples)
+                    self.hits["disk"] += 1
+                    return samples
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, samples: np.ndarray):
+        """Сохранить PCM фразы (float32)"""
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        if not len(samples):
+            return
+        with self._lock:
+            self._remember(key, samples)
+            self._scan()
+            if key in self._disk:
+                return
+            path = self._path(key)
+            tmp = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp")
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with open(tmp, "wb") as f:
+                    np.save(f, samples)
+                os.replace(tmp, path)
+            except OSError as e:
+                logger.warning(f"TTS cache write failed: {e}")
+                tmp.unlink(missing_ok=True)
+                return
+            size = path.stat().st_size
+            self._disk[key] = size
+            self._disk_size += size
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                self._remove(next(iter(self._disk)))
+                self.evictions["disk"] += 1
+
+    def _remember(self, key: str, samples: np.ndarray):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = samples
+        self._memory_size += samples.nbytes
+        while self._memory_size > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= evicted.nbytes
+            self.evictions["memory"] += 1
+
+    def _map(self, key: str, samples: np.memmap):
+        self._mapped[key] = samples
+        while len(self._mapped) > self.mapped_entries:
+            self._mapped.popitem(last=False)
+            self.evictions["mapped"] += 1
+
+    def _touch(self, key: str):
+        """Отметить использование на диске; mtime сохраняет порядок LRU между запусками"""
+        if self._disk and key in self._disk:
+            self._disk.move_to_end(key)
+            try:
+                os.utime(self._path(key))
+            except OSError:
+                pass
+
+    def _scan(self):
+        """Индекс диска по mtime (однократно)"""
+        if self._disk is not None:
+            return
+        entries = []
+        if self.directory.is_dir():
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npy"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        entries.sort()
+        self._disk = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_size = sum(self._disk.values())
+
+    def _remove(self, key: str):
+        self._disk_size -= self._disk.pop(key, 0)
+        self._mapped.pop(key, None)  # a source still playing keeps its own reference
+        try:
+            self._path(key).unlink(missing_ok=True)
+        except OSError as e:  # Windows: still memory-mapped by a playing source
+            logger.debug(f"TTS cache entry not removed: {e}")
+
+    def _path(self, key: str):
+        return self.directory / f"{key}.npy"
+
+    def get_stats(self) -> dict:
+        """Попадания, промахи и заполненность"""
+        with self._lock:
+            return {
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "evictions": dict(self.evictions),
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_size / 1024 / 1024, 2),
+                "mapped_entries": len(self._mapped),
+                "disk_entries": len(self._disk or ()),
+                "disk_mb": round(self._disk_size / 1024 / 1024, 2),
+            }
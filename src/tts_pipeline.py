@@ -0,0 +1,159 @@
+"""
+Alyosha TTS Pipeline
+Синтез ответа по предложениям: первое играет, пока синтезируются следующие
+"""
+import logging
+import re
+import threading
+import time
+
+import numpy as np
+
+import config
+from .resample import resample
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…;])\s+|\n+")
+_CLAUSE_END = re.compile(r"(?<=[,:—–])\s+")
+
+
+def split_sentences(text: str, first_chars: int = None, max_chars: int = None, min_chars: int = None) -> list[str]:
+    """
+    Разбить ответ на куски для синтеза
+
+    Предложения длиннее лимита режутся по запятым/тире; первый кусок
+    короче остальных (от него зависит время до первого звука), слишком
+    короткие куски («Да.») склеиваются со следующим.
+
+    Args:
+        first_chars: Лимит длины первого куска
+        max_chars: Лимит длины остальных
+        min_chars: Куски короче склеиваются со следующим
+    """
+    first_chars = first_chars or config.TTS_FIRST_CHUNK_CHARS
+    max_chars = max_chars or config.TTS_CHUNK_CHARS
+    min_chars = config.TTS_MIN_CHUNK_CHARS if min_chars is None else min_chars
+
+    chunks = []
+    current = ""  # a short fragment is carried into the next sentence
+    for sentence in filter(None, (s.strip() for s in _SENTENCE_END.split(text))):
+        fits = len(current) + 1 + len(sentence) <= (max_chars if chunks else first_chars)
+        for clause in [sentence] if fits else _CLAUSE_END.split(sentence):
+            limit = max_chars if chunks else first_chars
+            if len(current) >= min_chars and len(current) + 1 + len(clause) > limit:
+                chunks.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}".strip()
+        if len(current) >= min_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        if chunks and len(current) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {current}"
+        else:
+            chunks.append(current)
+    return chunks
+
+
+class SpeechPipeline:
+    """
+    Конвейер синтеза: поток-производитель по порядку синтезирует куски
+    ответа и дописывает их в один потоковый PcmSource движка
+    воспроизведения — звук начинается с первого куска, паузы между
+    кусками нет, если синтез успевает за воспроизведением. stop()
+    источника (barge-in) отменяет все ещё не синтезированные куски.
+    Куски, уже звучавшие раньше, берутся из TTSCache без синтеза.
+    """
+
+    def __init__(self, tts, engine, cache=None):
+        """
+        Args:
+            tts: TTS (synthesize_pcm, иначе synthesize + output_format)
+            engine: PlaybackEngine
+            cache: TTSCache или None
+        """
+        self.tts = tts
+        self.engine = engine
+        self.cache = cache
+        # {"chunks", "spoken", "cached", "first_audio", "synthesis", "cancelled"}
+        self.last_stats = None
+
+    def start(self, text: str):
+        """
+        Начать озвучку (не блокирует)
+
+        Returns:
+            Источник воспроизведения (wait/stop) или None, если говорить нечего
+        """
+        chunks = split_sentences(text) if config.TTS_PIPELINE else [text.strip()]
+        chunks = [chunk for chunk in chunks if chunk]
+        if not chunks:
+            return None
+        source = self.engine.open_source(name="tts")
+        self.last_stats = {
+            "chunks": len(chunks), "spoken": 0, "cached": 0, "first_audio": None,
+            "synthesis": 0.0, "cancelled": False,
+        }
+        threading.Thread(
+            target=self._produce, args=(chunks, source, time.perf_counter()),
+            name="TTSPipeline", daemon=True,
+        ).start()
+        return source
+
+    def _synthesize(self, chunk: str):
+        """PCM куска на частоте движка: из кэша или блоками по мере синтеза"""
+        from .audio import decode_audio  # sounddevice; keeps split_sentences importable without it
+
+        sample_rate = self.engine.sample_rate
+        identity = self.tts.cache_identity() if self.cache is not None else None
+        key = self.cache.key(identity, chunk, sample_rate) if identity else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.last_stats["cached"] += 1
+                yield cached
+                return
+
+        blocks = self.tts.synthesize_pcm(chunk)
+        if blocks is None:
+            audio_bytes = self.tts.synthesize(chunk)
+            blocks = [(decode_audio(audio_bytes, self.tts.output_format, sample_rate), sample_rate)] if audio_bytes else []
+        parts = []
+        for samples, rate in blocks:
+            if rate != sample_rate:
+                samples = resample(samples, rate, sample_rate)
+            parts.append(samples)
+            yield samples
+        # Not reached when playback was stopped mid-chunk: partial audio is never cached
+        if key and parts:
+            self.cache.put(key, np.concatenate(parts))
+
+    def _produce(self, chunks: list[str], source, started: float):
+        stats = self.last_stats
+        try:
+            for chunk in chunks:
+                if source.stopped:
+                    break
+                synth_start = time.perf_counter()
+                written = False
+                for samples in self._synthesize(chunk):
+                    if source.stopped:
+                        break
+                    stats["synthesis"] += time.perf_counter() - synth_start
+                    source.write(samples)
+                    written = True
+                    if stats["first_audio"] is None:
+                        stats["first_audio"] = time.perf_counter() - started
+                        logger.info(
+                            f"TTS first audio in {stats['first_audio'] * 1000:.0f} ms "
+                            f"(chunk 1/{len(chunks)}, {len(chunk)} chars)"
+                        )
+                    synth_start = time.perf_counter()
+                stats["spoken"] += written
+        except Exception as e:
+            logger.error(f"TTS pipeline error: {e}")
+        finally:
+            stats["cancelled"] = source.stopped
+            source.close()
@@ -5,71 +5,187 @@ Robust speech detection using WebRTC VAD
 import webrtcvad
 import numpy as np
 import logging
+import config
+from .audio_frame import AudioFrame
 
 logger = logging.getLogger(__name__)
 
+class VadDecision:
+    """
+    Результат VAD для одного блока захвата.
+
+    Считается один раз на блок и публикуется всем потребителям
+    (wake word, barge-in, endpointing, Live) через AudioFrame.vad.
+    """
+
+    __slots__ = ("mask", "raw", "ratio", "frame_ms")
+
+    def __init__(self, mask: list[bool], frame_ms: int, raw: list[bool] = None):
+        """
+        Args:
+            mask: Сглаженное решение по каждому VAD-кадру блока
+            frame_ms: Длительность VAD-кадра в мс
+            raw: Решения WebRTC до сглаживания и hangover
+        """
+        self.mask = mask
+        self.raw = mask if raw is None else raw
+        self.frame_ms = frame_ms
+        self.ratio = sum(mask) / len(mask) if mask else 0.0
+
+    @property
+    def is_speech(self) -> bool:
+        """Есть ли речь хотя бы в одном кадре блока"""
+        return self.ratio > 0.0
+
+
 class VoiceActivityDetector:
     """
     Detects human speech in audio stream using WebRTC VAD.
     Unlike simple energy threshold, this detects voice characteristics.
+
+    Frames the incoming int16 samples in place through a byte memoryview;
+    only the tail of an incomplete frame is copied into a small
+    preallocated carry buffer.
     """
+
+    FRAME_SIZES_MS = (10, 20, 30)
     
-    def __init__(self, sample_rate=16000, aggressiveness=1):
+    def __init__(
+        self,
+        sample_rate=16000,
+        aggressiveness=1,
+        frame_ms=None,
+        onset_frames=None,
+        hangover_ms=None,
+    ):
         """
         Initialize VAD.
         
         Args:
             sample_rate: Audio sample rate (must be 8000, 16000, 32000, or 48000)
             aggressiveness: 0 (least aggressive) to 3 (most aggressive filtering of non-speech)
+            frame_ms: VAD frame size, 10, 20 or 30 ms
+            onset_frames: Consecutive speech frames needed to enter speech (smoothing)
+            hangover_ms: How long speech is held after the last speech frame
         """
+        frame_ms = frame_ms or config.VAD_FRAME_MS
+        if frame_ms not in self.FRAME_SIZES_MS:
+            raise ValueError(f"VAD frame must be one of {self.FRAME_SIZES_MS} ms")
+
         self.vad = webrtcvad.Vad(aggressiveness)
         self.sample_rate = sample_rate
-        self.frame_duration_ms = 30
+        self.frame_duration_ms = frame_ms
         self.samples_per_frame = int(sample_rate * self.frame_duration_ms / 1000)
+
+        # Smoothing: onset debounce + hangover
+        self.onset_frames = max(1, onset_frames or config.VAD_ONSET_FRAMES)
+        if hangover_ms is None:
+            hangover_ms = config.VAD_HANGOVER_MS
+        self.hangover_frames = int(hangover_ms // frame_ms)
+        self._speech_run = 0
+        self._hangover_left = 0
+        self._in_speech = False
         
-        # Buffer for incomplete frames
-        self.buffer = b""
-        
-    def is_speech(self, audio_chunk: np.ndarray) -> bool:
+        # Carry buffer for an incomplete frame between calls
+        self._carry = np.zeros(self.samples_per_frame, dtype=np.int16)
+        self._carry_view = memoryview(self._carry).cast("B")
+        self._carry_len = 0
+
+    def process(self, audio_chunk: AudioFrame | np.ndarray) -> VadDecision:
         """
-        Check if audio chunk contains speech.
+        Classify every complete frame of the chunk.
+        
+        Call exactly once per captured block: leftover samples are carried
+        over to the next call, so feeding the same audio twice breaks
+        frame alignment.
         
         Args:
-            audio_chunk: Numpy array of int16 samples
+            audio_chunk: AudioFrame or numpy array of int16 samples
         
         Returns:
-            True if speech detected
+            VadDecision with the per-frame speech mask
         """
+        samples = audio_chunk.samples if isinstance(audio_chunk, AudioFrame) else audio_chunk
+        if samples.dtype != np.int16:
+            samples = (samples * 32768).astype(np.int16)
+        elif not samples.flags.c_contiguous:
+            samples = np.ascontiguousarray(samples)
+
+        spf = self.samples_per_frame
+        n_frames = (self._carry_len + len(samples)) // spf
+        raw = []
+
         try:
-            # Ensure correct type
-            if audio_chunk.dtype != np.int16:
-                audio_chunk = (audio_chunk * 32768).astype(np.int16)
-                
-            audio_bytes = audio_chunk.tobytes()
-            self.buffer += audio_bytes
-            
-            # Process complete frames
-            frame_size_bytes = self.samples_per_frame * 2  # 16-bit = 2 bytes per sample
-            is_speech_frame = False
-            
-            while len(self.buffer) >= frame_size_bytes:
-                frame = self.buffer[:frame_size_bytes]
-                self.buffer = self.buffer[frame_size_bytes:]
-                
-                if self.vad.is_speech(frame, self.sample_rate):
-                    is_speech_frame = True
-                    # Optimization: detecting one frame of speech in chunk is usually enough
-                    # but we continue to flush buffer
-            
-            if is_speech_frame:
-                # logger.debug("VAD: Speech detected") # Very spammy
-                pass
-                
-            return is_speech_frame
-            
+            offset = 0  # cursor into samples
+
+            # Complete the frame left over from the previous call
+            if self._carry_len:
+                need = spf - self._carry_len
+                if len(samples) < need:
+                    self._carry[self._carry_len:self._carry_len + len(samples)] = samples
+                    self._carry_len += len(samples)
+                    return VadDecision([], self.frame_duration_ms)
+                self._carry[self._carry_len:] = samples[:need]
+                raw.append(self.vad.is_speech(self._carry_view, self.sample_rate))
+                offset = need
+                self._carry_len = 0
+
+            # Remaining full frames straight from the caller's buffer
+            view = memoryview(samples).cast("B")
+            frame_bytes = spf * 2  # 16-bit = 2 bytes per sample
+            start = offset * 2
+            for _ in range(n_frames - len(raw)):
+                raw.append(
+                    self.vad.is_speech(view[start:start + frame_bytes], self.sample_rate)
+                )
+                start += frame_bytes
+            offset = start // 2
+
+            rest = len(samples) - offset
+            if rest:
+                self._carry[:rest] = samples[offset:]
+            self._carry_len = rest
+
         except Exception as e:
             logger.error(f"VAD Error: {e}")
-            return False
+            self._carry_len = 0
+            raw = [False] * n_frames
+
+        return VadDecision(self._smooth(raw), self.frame_duration_ms, raw)
+
+    def _smooth(self, raw: list[bool]) -> list[bool]:
+        """Onset debounce and hangover over the raw per-frame decisions"""
+        mask = []
+        for speech in raw:
+            if speech:
+                self._speech_run += 1
+                if self._speech_run >= self.onset_frames:
+                    self._in_speech = True
+                    self._hangover_left = self.hangover_frames
+            else:
+                self._speech_run = 0
+                if self._in_speech:
+                    if self._hangover_left > 0:
+                        self._hangover_left -= 1
+                    else:
+                        self._in_speech = False
+            mask.append(self._in_speech)
+        return mask
+        
+    def is_speech(self, audio_chunk: AudioFrame | np.ndarray) -> bool:
+        """
+        Check if audio chunk contains speech.
+        
+        Args:
+            audio_chunk: AudioFrame or numpy array of int16 samples
+        
+        Returns:
+            True if speech detected
+        """
+        return self.process(audio_chunk).is_speech
 
     def reset(self):
-        self.buffer = b""
+        self._carry_len = 0
+        self._speech_run = 0
+        self._hangover_left = 0
+        self._in_speech = False
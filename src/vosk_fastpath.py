@@ -0,0 +1,143 @@
+"""
+Alyosha Vosk Fast Path
+Короткая команда, уверенно распознанная Vosk, без прохода Whisper
+"""
+import json
+import logging
+import threading
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class VoskCommand:
+    """Результат Vosk по записи команды"""
+
+    __slots__ = ("text", "words", "min_conf", "reason")
+
+    def __init__(self, text: str, words: list, min_conf: float, reason: str = None):
+        self.text = text
+        self.words = words  # [{"word", "conf", "start", "end"}]
+        self.min_conf = min_conf
+        self.reason = reason  # why Whisper is still needed, None = accepted
+
+    @property
+    def accepted(self) -> bool:
+        return self.reason is None
+
+    def __repr__(self):
+        return f"VoskCommand({self.text!r}, min_conf={self.min_conf:.2f}, reason={self.reason})"
+
+
+class VoskFastPath:
+    """
+    Открытый (без грамматики) распознаватель Vosk поверх модели wake word.
+
+    Получает то же аудио, что AudioRecorder, пока идёт LISTENING; на
+    конце фразы finish() решает, годится ли результат без Whisper:
+    от VOSK_FAST_MIN_WORDS до VOSK_FAST_MAX_WORDS слов, у каждого
+    conf не ниже VOSK_FAST_MIN_CONF.
+    """
+
+    def __init__(self):
+        self.recognizer = None  # active while a command is being recorded
+        self._recognizer = None  # kept between commands, Reset() instead of rebuilding
+        self._model = None
+        self._parts = []  # results Vosk finalized on pauses inside the command
+        self._pending = bytearray()  # batched to VOSK_FEED_MS like the wake recognizer
+        self._feed_bytes = int(config.SAMPLE_RATE * config.VOSK_FEED_MS / 1000) * 2
+        self._lock = threading.Lock()  # feed (audio thread) vs finish (UI or audio thread)
+
+        # Stats
+        self.accepted = 0
+        self.rejected = {"disabled": 0, "empty": 0, "too_long": 0, "low_conf": 0}
+
+    def start(self, model, audio: np.ndarray = None):
+        """
+        Начать новую команду
+
+        Args:
+            model: vosk.Model детектора wake word (None — путь выключен)
+            audio: Уже записанное начало (carry или pre-roll)
+        """
+        with self._lock:
+            self.recognizer = None
+            self._parts = []
+            self._pending.clear()
+            if not config.VOSK_FAST_PATH or model is None:
+                return
+            if self._recognizer is None or self._model is not model:
+                from vosk import KaldiRecognizer
+
+                self._recognizer = KaldiRecognizer(model, config.SAMPLE_RATE)
+                self._recognizer.SetWords(True)
+                self._model = model
+            else:
+                self._recognizer.Reset()
+            self.recognizer = self._recognizer
+        if audio is not None and len(audio):
+            self.feed(audio)
+
+    def feed(self, samples: np.ndarray):
+        """Добавить аудио записи (int16); в распознаватель уходит блоками VOSK_FEED_MS"""
+        with self._lock:
+            if self.recognizer is None:
+                return
+            self._pending += samples.astype(np.int16, copy=False).tobytes()
+            if len(self._pending) >= self._feed_bytes:
+                self._flush(self.recognizer)
+
+    def _flush(self, recognizer):
+        """Отдать накопленное аудио Vosk (под _lock)"""
+        if self._pending:
+            if recognizer.AcceptWaveform(bytes(self._pending)):
+                self._parts.append(json.loads(recognizer.Result()))
+            self._pending.clear()
+
+    def cancel(self):
+        """Сбросить без результата"""
+        with self._lock:
+            self.recognizer = None
+            self._pending.clear()
+
+    def finish(self) -> VoskCommand:
+        """Конец фразы: итог Vosk и решение, нужен ли Whisper"""
+        with self._lock:
+            recognizer, self.recognizer = self.recognizer, None
+            if recognizer is None:
+                command = VoskCommand("", [], 0.0, "disabled")
+            else:
+                self._flush(recognizer)
+                parts = self._parts + [json.loads(recognizer.FinalResult())]
+                command = self.evaluate({
+                    "text": " ".join(part.get("text", "") for part in parts).strip(),
+                    "result": [word for part in parts for word in part.get("result", ())],
+                })
+        if command.accepted:
+            self.accepted += 1
+        else:
+            self.rejected[command.reason] += 1
+        return command
+
+    @staticmethod
+    def evaluate(result: dict) -> VoskCommand:
+        """Проверить итоговый результат Vosk по порогам"""
+        words = result.get("result", [])
+        text = result.get("text", "").strip()
+        min_conf = min((float(word.get("conf", 0.0)) for word in words), default=0.0)
+        if not text or len(words) < config.VOSK_FAST_MIN_WORDS:
+            reason = "empty"
+        elif len(words) > config.VOSK_FAST_MAX_WORDS:
+            reason = "too_long"
+        elif min_conf < config.VOSK_FAST_MIN_CONF:
+            reason = "low_conf"
+        else:
+            reason = None
+        return VoskCommand(text, words, min_conf, reason)
+
+    def get_stats(self) -> dict:
+        """Счётчики выбора пути"""
+        return {"accepted": self.accepted, "rejected": dict(self.rejected)}
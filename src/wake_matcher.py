@@ -0,0 +1,168 @@
+"""
+Alyosha Wake Word Matcher
+Сопоставление текста Vosk с wake word: регулярка + фонетическая оценка
+"""
+import re
+from functools import lru_cache
+
+import config
+
+# Множество вариаций (Vosk может криво распознать)
+WAKE_VARIANTS = (
+    # Точные
+    "алёша", "алеша", "алёш", "алеш", "лёша", "леша",
+    # Частые ошибки распознавания
+    "алёшь", "алешь", "алёж", "алеж",
+    "алёще", "алеще", "лёше", "леше",
+    "олёша", "олеша", "алюша", "алиша",
+    "а лёша", "а леша",  # С пробелом
+    # Очень короткие
+    "лёш", "леш", "ёша", "еша",
+)
+
+_NON_LETTERS = re.compile(r"[^а-яa-z\s]+")
+_SPACES = re.compile(r"\s+")
+
+# Phonetic key: unstressed vowels reduce, final/cluster devoicing,
+# soft/hard signs are silent. Coarse on purpose: it only has to rank
+# near-misses of one short word.
+_PHONETIC = str.maketrans({
+    "о": "а", "я": "а",
+    "е": "и", "э": "и", "ы": "и", "ю": "у",
+    "б": "п", "в": "ф", "г": "к", "д": "т", "з": "с",
+    "ж": "ш", "щ": "ш",
+    "ь": None, "ъ": None,
+})
+
+
+def normalize(text: str) -> str:
+    """Нижний регистр, ё -> е, без пунктуации, одиночные пробелы"""
+    text = _NON_LETTERS.sub(" ", text.lower().replace("ё", "е"))
+    return _SPACES.sub(" ", text).strip()
+
+
+def phonetic_key(word: str) -> str:
+    """Грубый фонетический ключ нормализованного слова"""
+    return word.translate(_PHONETIC)
+
+
+def edit_distance(a: str | list[str], b: str | list[str]) -> int:
+    """Расстояние Левенштейна между строками (или списками слов)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def _variant_pattern(variant: str) -> str:
+    """Регулярка для нормализованной вариации: е/ё и любые пробелы"""
+    return "".join(
+        "[её]" if ch == "е" else r"\s+" if ch == " " else re.escape(ch)
+        for ch in variant
+    )
+
+
+class WakeMatch:
+    """Результат сопоставления"""
+
+    __slots__ = ("keyword", "score", "threshold", "exact")
+
+    def __init__(self, keyword: str, score: float, threshold: float, exact: bool):
+        self.keyword = keyword  # matched text (normalized)
+        self.score = score  # 0..1, 1.0 for a listed variant
+        self.threshold = threshold
+        self.exact = exact  # listed variant (regex) vs fuzzy
+
+    @property
+    def accepted(self) -> bool:
+        return self.score >= self.threshold
+
+    def __repr__(self):
+        kind = "exact" if self.exact else "fuzzy"
+        return f"WakeMatch('{self.keyword}', {self.score:.2f}/{self.threshold:.2f}, {kind})"
+
+
+class WakeWordMatcher:
+    """
+    Precompiled wake word matcher.
+
+    Listed variants are found with one regex over the normalized text,
+    anchored at word starts: inflections like "алёшенька" still match,
+    "решать" no longer matches "еша". Other words are scored by edit
+    distance between phonetic keys against the wake word, so near-misses
+    can be accepted or rejected with a threshold instead of growing the
+    variant list.
+    """
+
+    def __init__(self, wake_word: str = None, variants=WAKE_VARIANTS, threshold: float = None):
+        """
+        Args:
+            wake_word: Слово, с которым сравниваются неточные совпадения
+            variants: Известные вариации (совпадение = score 1.0)
+            threshold: Минимальный score для срабатывания
+        """
+        self.wake_word = normalize(wake_word or config.WAKE_WORD)
+        self.threshold = threshold if threshold is not None else config.WAKE_MATCH_THRESHOLD
+        self.variants = tuple(dict.fromkeys(normalize(v) for v in variants))
+
+        # One pass over the raw text: ё/е folding and spacing live in the
+        # pattern, longest first so "а леша" wins over "леша"
+        alternatives = "|".join(
+            _variant_pattern(v) for v in sorted(self.variants, key=len, reverse=True)
+        )
+        self._regex = re.compile(rf"(?<!\w)(?:{alternatives})", re.IGNORECASE)
+        self._target_key = phonetic_key(self.wake_word)
+        # Per-matcher cache: Vosk vocabulary is small and repeats a lot
+        self.word_score = lru_cache(maxsize=4096)(self._word_score)
+
+    def _word_score(self, word: str) -> float:
+        """Фонетическая близость слова к wake word, 0..1"""
+        key = phonetic_key(normalize(word))
+        target = self._target_key
+        longest = max(len(key), len(target))
+        if not longest or 1 - abs(len(key) - len(target)) / longest < self.threshold:
+            # Length difference alone rules it out; inflected forms
+            # ("алёшенька") are still compared by their prefix
+            if len(key) <= len(target):
+                return 0.0
+            key = key[:len(target)]
+            longest = len(target)
+        return 1 - edit_distance(key, target) / longest
+
+    def match(self, text: str) -> WakeMatch | None:
+        """
+        Найти wake word в тексте (partial или final результат Vosk).
+
+        Returns:
+            WakeMatch с лучшим score (может быть ниже порога) или None
+        """
+        if not text:
+            return None
+
+        # Every listed variant has a hushing consonant: cheap C-level
+        # prefilter before the regex
+        if "ш" in text or "ж" in text or "щ" in text or "Ш" in text or "Ж" in text:
+            hit = self._regex.search(text)
+            if hit:
+                return WakeMatch(normalize(hit.group()), 1.0, self.threshold, True)
+        return self.match_words(text.split())
+
+    def match_words(self, words) -> WakeMatch | None:
+        """Лучшее неточное совпадение среди слов (оценки кэшируются по слову)"""
+        best_word, best_score = None, 0.0
+        for word in words:
+            score = self.word_score(word)
+            if score > best_score:
+                best_word, best_score = word, score
+        if best_word is None:
+            return None
+        return WakeMatch(normalize(best_word), best_score, self.threshold, False)
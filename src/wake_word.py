@@ -3,41 +3,93 @@ Alyosha Wake Word Detection
 Детекция слова "Алёша" с помощью Vosk
 """
 import json
+import logging
+from collections import deque
 import numpy as np
-import subprocess
 from vosk import Model, KaldiRecognizer
 import config
+from .audio_frame import AudioFrame
+from .wake_matcher import WAKE_VARIANTS, WakeWordMatcher
+
+logger = logging.getLogger(__name__)
 
 
 class WakeWordDetector:
     """Детекция wake word 'Алёша' с помощью Vosk"""
     
-    def __init__(self):
+    name = "Vosk"
+    MODES = ("grammar", "open")
+    
+    def __init__(self, mode: str = None):
+        """
+        Args:
+            mode: "grammar" (только вариации wake word + [unk]) или
+                  "open" (полный словарь); по умолчанию config.WAKE_MODE
+        """
         self.model = None
         self.recognizer = None
         self.wake_word = config.WAKE_WORD.lower()
+        self.mode = (mode or config.WAKE_MODE).lower()
+        if self.mode not in self.MODES:
+            logger.warning("Unknown WAKE_MODE '%s', using 'grammar'", self.mode)
+            self.mode = "grammar"
         self.is_loaded = False
         self.partial_buffer = ""
+        self.matcher = WakeWordMatcher(self.wake_word)
+        # {"keyword", "score", "threshold", "confidence", "source", "end_position"}
+        self.last_detection = None
+        self._pending = bytearray()
+        self._feed_bytes = int(config.SAMPLE_RATE * config.VOSK_FEED_MS / 1000) * 2
+        self._partial_bytes = int(config.SAMPLE_RATE * config.WAKE_PARTIAL_INTERVAL_MS / 1000) * 2
+        self._since_partial = 0  # bytes fed since the last partial check
+        self._in_speech = False
+        # Vosk word times count audio fed to the recognizer since it was
+        # created (Reset() does not restart the clock); map them back to
+        # stream positions (AudioFrame.position) to find the keyword end
+        self._fed = 0  # samples fed since the recognizer was created
+        self._pending_frames = []  # (stream position, length) of the audio in _pending
+        self._feed_map = deque(maxlen=512)  # (fed offset, stream position, length)
+        # Counters (get_stats)
+        self.frames = 0
+        self.decoder_calls = 0
+        self.partial_checks = 0
+        self.resets = 0
+        self.errors = 0  # exceptions swallowed by detect(): a benchmark with errors is invalid
     
     def load(self) -> bool:
         """Загрузить модель Vosk"""
         try:
             model_path = str(config.VOSK_MODEL_PATH)
             self.model = Model(model_path)
-            self.recognizer = KaldiRecognizer(self.model, config.SAMPLE_RATE)
-            self.recognizer.SetWords(True)
+            self.recognizer = self._create_recognizer()
+            self._fed = 0
+            self._feed_map.clear()
             self.is_loaded = True
             return True
         except Exception as e:
             print(f"Failed to load Vosk model: {e}")
             return False
     
-    def detect(self, audio_chunk: np.ndarray) -> bool:
+    def _create_recognizer(self) -> KaldiRecognizer:
+        """Распознаватель для текущего режима"""
+        if self.mode == "grammar":
+            # Decoding graph limited to the wake variants; everything else
+            # collapses into [unk]. Variants missing from the model's
+            # vocabulary are skipped by Vosk with a warning.
+            grammar = json.dumps(list(WAKE_VARIANTS) + ["[unk]"], ensure_ascii=False)
+            recognizer = KaldiRecognizer(self.model, config.SAMPLE_RATE, grammar)
+        else:
+            recognizer = KaldiRecognizer(self.model, config.SAMPLE_RATE)
+            recognizer.SetPartialWords(True)  # word timings for partial wakes
+        recognizer.SetWords(True)
+        return recognizer
+    
+    def detect(self, audio_chunk: AudioFrame | np.ndarray) -> bool:
         """
         Проверить наличие wake word в аудио чанке
         
         Args:
-            audio_chunk: Аудио данные (int16)
+            audio_chunk: AudioFrame или аудио данные (int16)
         
         Returns:
             True если wake word обнаружен
@@ -46,115 +98,211 @@ class WakeWordDetector:
             return False
         
         try:
-            # Convert to bytes
-            audio_bytes = audio_chunk.tobytes()
-            
-            # Debug counter
-            if not hasattr(self, '_detect_count'):
-                self._detect_count = 0
-                self._loud_chunks = 0
-            self._detect_count += 1
+            self.frames += 1
             
             # VAD Check (WebRTC)
-            # Only process if human voice is detected
-            if not getattr(self, 'vad', None):
-                from src.vad import VoiceActivityDetector
-                self.vad = VoiceActivityDetector()
+            # Only process if human voice is detected. The audio consumer
+            # publishes one decision per frame; own VAD only for raw arrays.
+            decision = getattr(audio_chunk, "vad", None)
+            if decision is None:
+                if not getattr(self, 'vad', None):
+                    from .vad import VoiceActivityDetector
+                    self.vad = VoiceActivityDetector()
+                decision = self.vad.process(audio_chunk)
             
-            if not self.vad.is_speech(audio_chunk):
-                # No speech -> skip Vosk
+            if not decision.is_speech:
+                # No speech -> skip Vosk; a speech segment just ended ->
+                # finalize it so the word confidences are available now
+                if self._in_speech:
+                    self._in_speech = False
+                    return self._flush()
+                return False
+            self._in_speech = True
+            
+            # Small capture blocks are aggregated: Vosk per-call overhead
+            # only pays off on ~100 ms of audio. Bytes are only built for
+            # speech (shared with other consumers for AudioFrame).
+            if isinstance(audio_chunk, AudioFrame):
+                self._pending_frames.append((audio_chunk.position, len(audio_chunk)))
+                self._pending += audio_chunk.bytes
+            else:
+                self._pending_frames.append((None, len(audio_chunk)))
+                self._pending += audio_chunk.tobytes()
+            if len(self._pending) < self._feed_bytes:
                 return False
             
-            # Debug heartbeat
-            print(".", end="", flush=True)
-
             # Основной метод: Vosk
-            has_result = self.recognizer.AcceptWaveform(audio_bytes)
+            fed_bytes = len(self._pending)
+            has_result = self._feed_pending()
             
             if has_result:
                 try:
                     result = json.loads(self.recognizer.Result())
-                    text = result.get("text", "").lower()
-                    
-                    if text:
-                        print(f"[VOSK] Распознано: {text}")
-                    
-                    if self._contains_wake_word(text):
-                        print(f"[WAKE] Wake word обнаружен!")
-                        self._play_beep()
-                        self.reset()
-                        return True
+                    return self._check_result(result, "final")
                 except json.JSONDecodeError:
                     pass
-            else:
-                # Check partial results
+            elif self.mode == "open":
+                # Check partial results. In grammar mode partials are biased
+                # towards the keyword and carry no confidence: final only.
+                # PartialResult() + json.loads are throttled to
+                # WAKE_PARTIAL_INTERVAL_MS of audio.
+                self._since_partial += fed_bytes
+                if self._since_partial < self._partial_bytes:
+                    return False
+                self._since_partial = 0
+                self.partial_checks += 1
                 try:
                     partial = json.loads(self.recognizer.PartialResult())
                     partial_text = partial.get("partial", "").lower()
                     
-                    if partial_text:
-                         # Debug only: print partials to see if it hears anything
-                         if self._detect_count % 10 == 0:
-                             print(f"[VOSK] Partial: '{partial_text}'")
-                    
-                    if self._contains_wake_word(partial_text):
-                        print(f"[WAKE] Wake word обнаружен (partial)!")
-                        self._play_beep()
+                    match = self.matcher.match(partial_text)
+                    if match and match.accepted:
+                        logger.info("Wake word detected (partial): %r", match)
+                        self.last_detection = {
+                            "keyword": match.keyword, "score": match.score,
+                            "threshold": match.threshold, "confidence": None,
+                            "source": "partial",
+                            "end_position": self._keyword_end(partial.get("partial_result", ())),
+                        }
                         self.reset()
                         return True
                 except json.JSONDecodeError:
                     pass
         except Exception as e:
-            print(f"Wake word detection error: {e}")
+            self.errors += 1
+            logger.error("Wake word detection error: %s", e)
         
         return False
     
-    def _contains_wake_word(self, text: str) -> bool:
-        """Проверить наличие wake word в тексте"""
-        if not text:
+    def _feed_pending(self) -> bool:
+        """
+        Отдать накопленное аудио Vosk
+
+        Позиции кадров попадают в _feed_map только здесь, когда аудио
+        действительно скормлено: отброшенное reset() не сдвигает отсчёт.
+        """
+        offset = self._fed
+        for position, length in self._pending_frames:
+            if position is not None:
+                self._feed_map.append((offset, position, length))
+            offset += length
+        self._pending_frames.clear()
+        audio_bytes = bytes(self._pending)
+        self._pending.clear()
+        self.decoder_calls += 1
+        self._fed += len(audio_bytes) // 2
+        return self.recognizer.AcceptWaveform(audio_bytes)
+    
+    def _flush(self) -> bool:
+        """Дослать накопленное аудио и завершить фразу (конец речи по VAD)"""
+        if self._pending:
+            self._feed_pending()
+        try:
+            result = json.loads(self.recognizer.FinalResult())
+        except json.JSONDecodeError:
+            return False
+        return self._check_result(result, "final")
+    
+    def _check_result(self, result: dict, source: str) -> bool:
+        """Проверить финальный результат Vosk (текст + уверенность по словам)"""
+        self._since_partial = 0
+        text = result.get("text", "").lower()
+        if text:
+            logger.debug("Vosk: %s", text)
+        
+        match = self.matcher.match(text)
+        if not match or not match.accepted:
             return False
-            
-        # Множество вариаций (Vosk может криво распознать)
-        variations = [
-            # Точные
-            "алёша", "алеша", "алёш", "алеш", "лёша", "леша",
-            # Частые ошибки распознавания
-            "алёшь", "алешь", "алёж", "алеж",
-            "алёще", "алеще", "лёше", "леше",
-            "олёша", "олеша", "алюша", "алиша",
-            "а лёша", "а леша",  # С пробелом
-            # Очень короткие
-            "лёш", "леш", "ёша", "еша",
-        ]
         
-        for variant in variations:
-            if variant in text:
-                print(f"[WAKE] Найдено: '{variant}' в '{text}'")
-                return True
+        keyword, confidence = self.keyword_confidence(result)
+        if self.mode == "grammar" and confidence < config.WAKE_MIN_CONFIDENCE:
+            logger.debug("Wake word rejected: '%s' conf=%.2f", keyword, confidence)
+            return False
         
-        return False
+        logger.info("Wake word detected: %r conf=%.2f", match, confidence)
+        self.last_detection = {
+            "keyword": match.keyword, "score": match.score, "threshold": match.threshold,
+            "confidence": confidence, "source": source,
+            "end_position": self._keyword_end(result.get("result", ())),
+        }
+        self.reset()
+        return True
+    
+    def keyword_confidence(self, result: dict) -> tuple:
+        """
+        Уверенность по ключевому слову из пословного результата Vosk
+        
+        Returns:
+            (слово, conf) — лучшее совпадение с вариациями wake word,
+            ("", 0.0) если пословных данных нет
+        """
+        best_word, best_conf = "", 0.0
+        for word in result.get("result", ()):
+            text = word.get("word", "").lower()
+            conf = float(word.get("conf", 0.0))
+            if conf > best_conf:
+                match = self.matcher.match(text)
+                if match and match.accepted:
+                    best_word, best_conf = text, conf
+        return best_word, best_conf
+    
+    def _keyword_end(self, words) -> int | None:
+        """
+        Позиция в потоке (сэмплы SAMPLE_RATE) конца последнего wake word
+
+        Returns:
+            AudioFrame.position-совместимый индекс или None, если нет
+            пословных времён или позиций кадров
+        """
+        end = None
+        for word in words:
+            match = self.matcher.match(word.get("word", ""))
+            if match and match.accepted and "end" in word:
+                end = word["end"]
+        if end is None:
+            return None
+
+        # Word end in samples fed since creation: exact through the feed map
+        fed = round(end * config.SAMPLE_RATE)
+        for offset, position, length in reversed(self._feed_map):
+            if offset <= fed <= offset + length:
+                return position + (fed - offset)
+        return None
+    
+    def get_stats(self) -> dict:
+        """Счётчики нагрузки на распознаватель"""
+        return {
+            "engine": self.name,
+            "mode": self.mode,
+            "frames": self.frames,
+            "decoder_calls": self.decoder_calls,
+            "partial_checks": self.partial_checks,
+            "resets": self.resets,
+            "errors": self.errors,
+        }
     
     def reset(self):
-        """Сбросить состояние распознавателя"""
+        """Сбросить состояние распознавателя (без пересоздания)"""
+        self._pending.clear()
+        self._pending_frames.clear()
+        self._since_partial = 0
+        self._in_speech = False
+        self.resets += 1
         if self.recognizer:
-            self.recognizer = KaldiRecognizer(self.model, config.SAMPLE_RATE)
-            self.recognizer.SetWords(True)
+            # Reset() drops the decoder state but keeps the compiled
+            # graph/grammar; rebuilding cost a full graph setup per wake
+            self.recognizer.Reset()
 
-    def _play_beep(self):
-        """Воспроизвести звук активации"""
-        try:
-            # Try paplay (PulseAudio) first, then aplay (ALSA)
-            subprocess.Popen(
-                ["paplay", str(config.BEEP_SOUND)],
-                stderr=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL
-            )
-        except FileNotFoundError:
-            try:
-                subprocess.Popen(
-                    ["aplay", str(config.BEEP_SOUND)],
-                    stderr=subprocess.DEVNULL,
-                    stdout=subprocess.DEVNULL
-                )
-            except Exception:
-                pass
+
+def create_wake_detector(engine: str = None):
+    """
+    Детектор wake word по config.WAKE_ENGINE
+
+    "onnx" — нейросетевой KWS, Vosk остаётся запасным, если модель
+    не загрузится; "vosk" — только Vosk.
+    """
+    engine = (engine or config.WAKE_ENGINE).lower()
+    if engine == "onnx":
+        from .kws import OnnxWakeWordDetector
+        return OnnxWakeWordDetector(fallback=WakeWordDetector())
+    return WakeWordDetector()
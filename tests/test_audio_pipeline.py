@@ -0,0 +1,909 @@
+import unittest
+import io
+import json
+import sys
+import os
+import tempfile
+import threading
+import wave
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+import config
+from src.ring_buffer import AudioRingBuffer
+from src.audio_frame import AudioFrame
+from src.vad import VoiceActivityDetector, VadDecision
+from src.endpointer import Endpointer, EndpointEvent
+from src.resample import PolyphaseResampler, resample
+from src.wake_word import WakeWordDetector, create_wake_detector
+from src.wake_matcher import WakeWordMatcher, normalize
+from src.features import LogMelFrontend, WhisperLogMel, mel_filters, speech_bounds, whisper_normalize
+from src.kws import OnnxWakeWordDetector
+from src.streaming_stt import StreamingTranscriber
+from src.stt import STT
+from src import stt_autotune
+from src.vosk_fastpath import VoskFastPath
+from src.transcript_filter import TranscriptFilter
+from src.tts import PiperTTS
+from src.tts_cache import TTSCache
+from src.tts_pipeline import split_sentences
+
+try:
+    from src import audio
+except OSError:  # sounddevice without PortAudio: playback/recorder tests are skipped
+    audio = None
+
+
+class TestAudioRingBuffer(unittest.TestCase):
+
+    def test_write_read_wraparound(self):
+        """Data survives wrapping around the end of the buffer"""
+        ring = AudioRingBuffer(10)
+        ring.write(np.arange(6, dtype=np.int16))
+        np.testing.assert_array_equal(ring.read(4), [0, 1, 2, 3])
+        ring.write(np.arange(6, 12, dtype=np.int16))
+        np.testing.assert_array_equal(ring.read(8), np.arange(4, 12))
+        self.assertEqual(ring.available, 0)
+
+    def test_overflow_and_underrun_counters(self):
+        """Falling behind is counted instead of corrupting data"""
+        ring = AudioRingBuffer(8)
+        self.assertEqual(ring.write(np.ones(12, dtype=np.int16)), 8)
+        self.assertEqual(ring.overflows, 1)
+        self.assertEqual(ring.dropped_samples, 4)
+
+        self.assertIsNone(ring.read(9))
+        self.assertEqual(ring.underruns, 1)
+
+    def test_history_is_protected(self):
+        """Consumed samples reserved as history are not overwritten"""
+        ring = AudioRingBuffer(10, history=4)
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.read(6)
+        self.assertEqual(ring.write(np.arange(6, 20, dtype=np.int16)), 6)
+        np.testing.assert_array_equal(ring.tail(4), [2, 3, 4, 5])
+
+
+class TestAudioFrame(unittest.TestCase):
+
+    def test_views_are_cached(self):
+        """float32/bytes views are built once and agree with the samples"""
+        samples = np.array([16384, -16384, 0, 32767], dtype=np.int16)
+        frame = AudioFrame(samples, 0.0, 0, 16000)
+
+        self.assertIs(frame.float32, frame.float32)
+        self.assertIs(frame.bytes, frame.bytes)
+        self.assertEqual(frame.float32.dtype, np.float32)
+        self.assertAlmostEqual(float(frame.float32[0]), 0.5)
+        self.assertEqual(frame.bytes, samples.tobytes())
+
+    def test_rms_matches_float_computation(self):
+        """Precomputed RMS matches the float reference"""
+        samples = (np.sin(np.arange(1600) / 5) * 12000).astype(np.int16)
+        frame = AudioFrame(samples, 0.0, 0, 16000)
+        expected = np.sqrt(np.mean(samples.astype(np.float64) ** 2)) / 32768.0
+        self.assertAlmostEqual(frame.rms, expected, places=6)
+
+
+class TestVoiceActivityDetector(unittest.TestCase):
+
+    def test_frames_carry_over_between_blocks(self):
+        """Incomplete frames are completed by the next block"""
+        vad = VoiceActivityDetector(frame_ms=30)
+        silence = np.zeros(1000, dtype=np.int16)
+        counts = [len(vad.process(silence).raw) for _ in range(3)]
+        # 3000 samples = 6 full 480-sample frames, spread as 2 + 2 + 2
+        self.assertEqual(counts, [2, 2, 2])
+        self.assertFalse(vad.process(silence).is_speech)
+
+    def test_onset_and_hangover(self):
+        """Speech needs onset frames and is held for the hangover"""
+        vad = VoiceActivityDetector(frame_ms=30, onset_frames=2, hangover_ms=60)
+        raw = [True, False, True, True, False, False, False, True]
+        self.assertEqual(
+            vad._smooth(raw),
+            [False, False, False, True, True, True, False, False],
+        )
+
+
+class TestEndpointer(unittest.TestCase):
+
+    def _feed(self, endpointer, mask):
+        for i in range(0, len(mask), 8):
+            event = endpointer.process(VadDecision(mask[i:i + 8], 30))
+            if event:
+                return event
+        return None
+
+    def test_trailing_silence_ends_utterance(self):
+        """Speech followed by the trailing silence yields a frame-accurate event"""
+        endpointer = Endpointer(trailing_silence=0.3, min_speech=0.09)
+        mask = [False] * 10 + [True] * 20 + [False] * 20
+        event = self._feed(endpointer, mask)
+        self.assertEqual(event.reason, EndpointEvent.SPEECH_END)
+        self.assertAlmostEqual(event.speech_start, 0.3)
+        self.assertAlmostEqual(event.speech_end, 0.9)
+        self.assertAlmostEqual(event.detected_at, 1.2)
+
+    def test_leading_timeout_without_speech(self):
+        """Clicks shorter than min_speech do not start an utterance"""
+        endpointer = Endpointer(leading_timeout=1.5, min_speech=0.09)
+        mask = ([True] + [False] * 9) * 10
+        event = self._feed(endpointer, mask)
+        self.assertEqual(event.reason, EndpointEvent.NO_SPEECH)
+        self.assertIsNone(event.speech_start)
+
+    def test_max_utterance(self):
+        """Continuous speech is cut at the maximum length"""
+        endpointer = Endpointer(max_utterance=1.5)
+        event = self._feed(endpointer, [True] * 100)
+        self.assertEqual(event.reason, EndpointEvent.MAX_LENGTH)
+        self.assertAlmostEqual(event.detected_at, 1.5)
+
+
+class TestPolyphaseResampler(unittest.TestCase):
+
+    def _tone(self, rate, freq=1000, seconds=1.0):
+        t = np.arange(int(rate * seconds)) / rate
+        return (np.sin(2 * np.pi * freq * t) * 10000).astype(np.int16)
+
+    def test_streaming_matches_one_shot(self):
+        """Block-by-block output equals resampling the whole signal"""
+        x = self._tone(44100)
+        resampler = PolyphaseResampler(44100, 16000)
+        blocks = [resampler.process(x[i:i + 1323]) for i in range(0, len(x), 1323)]
+        np.testing.assert_array_equal(np.concatenate(blocks), resample(x, 44100, 16000))
+        self.assertEqual(sum(len(b) for b in blocks), 16000)
+
+    def test_tone_preserved_and_alias_removed(self):
+        """In-band tone keeps its level, out-of-band tone is filtered"""
+        y = resample(self._tone(48000), 48000, 16000)
+        self.assertGreater(np.abs(y[1000:]).max(), 9500)
+
+        alias = resample(self._tone(48000, freq=10000), 48000, 16000)
+        self.assertLess(np.abs(alias[1000:]).max(), 50)
+
+
+@unittest.skipUnless(audio, "PortAudio not available")
+class TestAudioRecorder(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(config, "WHISPER_STREAM_FEATURES", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # 0.1 s at 16 kHz + 0.05 s pre-roll = 2400 samples
+        self.recorder = audio.AudioRecorder(max_duration=0.1, pre_roll=0.05)
+
+    def test_truncated_at_cap(self):
+        recorder = self.recorder
+        recorder.start_recording()
+        recorder.add_chunk(np.ones(2000, dtype=np.int16))
+        self.assertFalse(recorder.is_full)
+        recorder.add_chunk(np.full(1000, 2, dtype=np.int16))
+        self.assertTrue(recorder.is_full)
+        recorded = recorder.stop_recording()
+        self.assertEqual(len(recorded), recorder.max_samples)
+        self.assertEqual(int(recorded[-1]), 2)
+        recorder.add_chunk(np.ones(10, dtype=np.int16))  # ignored once stopped
+        self.assertEqual(len(recorder.audio_buffer), 2400)
+
+    def test_pre_roll_tail_and_carry_prepended(self):
+        recorder = self.recorder
+        recorder.start_recording(pre_roll=np.arange(2000, dtype=np.int16))
+        recorder.add_chunk(np.full(3, -1, dtype=np.int16))
+        recorded = recorder.stop_recording()
+        np.testing.assert_array_equal(recorded[:800], np.arange(1200, 2000))  # last 0.05 s only
+        np.testing.assert_array_equal(recorded[800:], [-1, -1, -1])
+
+        carry = np.arange(1000, dtype=np.int16)  # taken whole, instead of pre-roll
+        recorder.start_recording(pre_roll=np.zeros(2000, dtype=np.int16), carry=carry)
+        np.testing.assert_array_equal(recorder.stop_recording(), carry)
+
+    def test_result_survives_next_recording(self):
+        recorder = self.recorder
+        recorder.start_recording()
+        recorder.add_chunk(np.full(500, 7, dtype=np.int16))
+        first = recorder.stop_recording()
+
+        recorder.start_recording()
+        recorder.add_chunk(np.full(900, 9, dtype=np.int16))
+        self.assertEqual(len(first), 500)
+        self.assertTrue((first == 7).all())
+        self.assertTrue((recorder.stop_recording() == 9).all())
+
+
+@unittest.skipUnless(audio, "PortAudio not available")
+class TestPcmSource(unittest.TestCase):
+
+    def test_sources_mix_and_finish(self):
+        out = np.zeros(4, dtype=np.float32)
+        buffered = audio.PcmSource(np.full(6, 0.25, dtype=np.float32))
+        stream = audio.PcmSource()
+        stream.write(np.full(2, 0.5, dtype=np.float32))
+
+        self.assertFalse(buffered.mix_into(out))
+        self.assertFalse(stream.mix_into(out))  # open stream waits for more data
+        np.testing.assert_allclose(out, [0.75, 0.75, 0.25, 0.25])
+
+        out.fill(0.0)
+        self.assertTrue(buffered.mix_into(out))
+        np.testing.assert_allclose(out, [0.25, 0.25, 0.0, 0.0])
+        self.assertTrue(buffered.done.is_set())
+
+        stream.close()
+        stream.write(np.ones(2, dtype=np.float32))  # ignored after close
+        self.assertTrue(stream.mix_into(out))
+        self.assertTrue(stream.done.is_set())
+
+    def test_stop_silences_immediately(self):
+        source = audio.PcmSource(np.ones(100, dtype=np.float32))
+        source.stop()
+        out = np.zeros(10, dtype=np.float32)
+        self.assertTrue(source.mix_into(out))
+        self.assertFalse(out.any())
+        self.assertTrue(source.wait(0))
+
+    def test_pcm_stream_resamples_and_keeps_odd_byte(self):
+        stream = audio.PcmStream(16000, 16000)
+        pcm = np.array([16384, -16384, 8192], dtype=np.int16).tobytes()
+        stream.write_pcm(pcm[:3])
+        stream.write_pcm(pcm[3:])
+        stream.close()
+        out = np.zeros(4, dtype=np.float32)
+        self.assertTrue(stream.mix_into(out))
+        np.testing.assert_allclose(out, [0.5, -0.5, 0.25, 0.0])
+
+    def test_decode_wav_in_memory(self):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(8000)
+            wf.writeframes(np.array([16384, 0] * 800, dtype=np.int16).tobytes())
+        decoded = audio.decode_audio(buffer.getvalue(), "wav", 16000)
+        self.assertEqual(decoded.dtype, np.float32)
+        self.assertEqual(len(decoded), 1600)
+        self.assertAlmostEqual(float(decoded[400:1200].mean()), 0.25, places=2)  # stereo averaged
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(1)
+            wf.setframerate(8000)
+            wf.writeframes(bytes(80))
+        with self.assertRaises(ValueError):  # only 16-bit PCM
+            audio.decode_audio(buffer.getvalue(), "wav", 16000)
+
+
+@unittest.skipUnless(audio, "PortAudio not available")
+class TestPlaybackEngine(unittest.TestCase):
+
+    class CallbackStream:
+        """OutputStream whose stop() waits for an in-flight callback, like PortAudio"""
+
+        def __init__(self, callback=None, **kwargs):
+            self.callback = callback
+            self.callback_finished = None
+
+        def start(self):
+            pass
+
+        def stop(self):
+            block = np.zeros((4, 1), dtype=np.float32)
+            worker = threading.Thread(target=self.callback, args=(block, 4, None, None), daemon=True)
+            worker.start()
+            worker.join(timeout=2.0)
+            self.callback_finished = not worker.is_alive()
+
+        def close(self):
+            pass
+
+    def test_close_does_not_deadlock_with_callback(self):
+        with mock.patch.object(audio.sd, "OutputStream", self.CallbackStream):
+            engine = audio.PlaybackEngine(sample_rate=16000, blocksize=4)
+            source = engine.play(np.ones(100, dtype=np.float32))
+            stream = engine.stream
+            engine.close()
+        self.assertTrue(stream.callback_finished)
+        self.assertTrue(source.done.is_set())
+        self.assertIsNone(engine.stream)
+
+    def test_finished_sources_are_pruned_on_add(self):
+        with mock.patch.object(audio.sd, "OutputStream", self.CallbackStream):
+            engine = audio.PlaybackEngine(sample_rate=16000, blocksize=4)
+            first = engine.play(np.ones(2, dtype=np.float32))
+            out = np.zeros((4, 1), dtype=np.float32)
+            engine._callback(out, 4, None, None)
+            self.assertTrue(first.done.is_set())
+            self.assertFalse(engine.is_active)
+            second = engine.open_source()
+        self.assertEqual(engine._sources, [second])
+
+
+class TestWakeWordDetector(unittest.TestCase):
+
+    def _result(self, word, conf):
+        return {"text": word, "result": [{"word": word, "conf": conf, "start": 0.1, "end": 0.5}]}
+
+    def test_keyword_confidence_from_word_results(self):
+        """Confidence is taken from the best matching word"""
+        detector = WakeWordDetector(mode="grammar")
+        result = {"text": "[unk] алёша", "result": [
+            {"word": "[unk]", "conf": 0.99}, {"word": "алёша", "conf": 0.82},
+        ]}
+        self.assertEqual(detector.keyword_confidence(result), ("алёша", 0.82))
+
+    def test_grammar_mode_gates_on_confidence(self):
+        """Low-confidence keywords are rejected only in grammar mode"""
+        grammar = WakeWordDetector(mode="grammar")
+        self.assertFalse(grammar._check_result(self._result("алёша", 0.3), "final"))
+        self.assertTrue(grammar._check_result(self._result("алёша", 0.9), "final"))
+        self.assertEqual(grammar.last_detection["confidence"], 0.9)
+
+        open_mode = WakeWordDetector(mode="open")
+        self.assertTrue(open_mode._check_result(self._result("алёша", 0.3), "final"))
+
+    def test_keyword_end_maps_to_stream_position(self):
+        """Vosk word times (fed audio only) map back to stream positions"""
+        detector = WakeWordDetector(mode="grammar")
+        # Two VAD-gated speech segments fed back to back: stream 16000.. and 64000..
+        detector._feed_map.extend([(0, 16000, 8000), (8000, 64000, 8000)])
+        detector._fed = 16000
+        words = [{"word": "[unk]", "end": 0.2}, {"word": "алёша", "start": 0.6, "end": 0.75}]
+        self.assertEqual(detector._keyword_end(words), 64000 + 12000 - 8000)
+        self.assertIsNone(detector._keyword_end([{"word": "привет", "end": 0.3}]))
+
+    def test_open_mode_partial_result_fires_wake(self):
+        """Past the partial interval the open-mode detector checks PartialResult()"""
+        detector = WakeWordDetector(mode="open")
+        detector.recognizer = mock.Mock()
+        detector.recognizer.AcceptWaveform.return_value = False
+        detector.recognizer.PartialResult.return_value = json.dumps({
+            "partial": "алёша",
+            "partial_result": [{"word": "алёша", "start": 0.0, "end": 0.05}],
+        })
+        detector.is_loaded = True
+        speech = mock.Mock(is_speech=True)
+
+        fired = False
+        with self.assertNoLogs("src.wake_word", level="ERROR"):
+            for i in range(200):  # 6 s of 30 ms frames
+                frame = AudioFrame(np.zeros(480, dtype=np.int16), 0.0, i, 16000, position=i * 480)
+                frame.vad = speech
+                if detector.detect(frame):
+                    fired = True
+                    break
+        self.assertTrue(fired)
+        self.assertEqual(detector.partial_checks, 1)
+        detector.recognizer.PartialResult.assert_called_once()
+        self.assertEqual(detector.last_detection["source"], "partial")
+        self.assertEqual(detector.last_detection["end_position"], 800)
+
+    def test_keyword_end_ignores_audio_dropped_by_reset(self):
+        """Audio discarded from _pending by reset() never shifts the fed offsets"""
+        detector = WakeWordDetector(mode="grammar")
+        detector.recognizer = mock.Mock()
+        detector.recognizer.AcceptWaveform.return_value = False
+        detector.is_loaded = True
+        speech = mock.Mock(is_speech=True)
+
+        def feed(position, count):
+            for i in range(count):
+                frame = AudioFrame(np.zeros(480, dtype=np.int16), 0.0, 0, 16000, position=position + i * 480)
+                frame.vad = speech
+                detector.detect(frame)
+
+        feed(0, 4)  # 1920 samples: fed as one batch
+        feed(10000, 2)  # still pending when the wake fires
+        detector.reset()
+        feed(50000, 4)  # fed at offsets 1920..3840
+        self.assertEqual(detector._fed, 3840)
+        words = [{"word": "алёша", "end": 3000 / 16000}]
+        self.assertEqual(detector._keyword_end(words), 50000 + 3000 - 1920)
+
+
+class TestWakeWordMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = WakeWordMatcher("алёша", threshold=0.85)
+
+    def test_listed_variants_match_exactly(self):
+        """ё/е, case and spacing are folded; word starts only"""
+        for text in ("привет Алёша", "а  лёша", "алешенька", "[unk] олёша"):
+            match = self.matcher.match(text)
+            self.assertTrue(match.exact and match.accepted, text)
+        self.assertEqual(normalize("  А  Лёша! "), "а леша")
+        self.assertFalse(self.matcher.match("решать задачу").accepted)
+
+    def test_fuzzy_score_against_threshold(self):
+        """Unlisted words get a phonetic score that the threshold gates"""
+        match = self.matcher.match("алиса")
+        self.assertFalse(match.exact)
+        self.assertAlmostEqual(match.score, 0.8)
+        self.assertFalse(match.accepted)
+
+        lenient = WakeWordMatcher("алёша", threshold=0.8)
+        self.assertTrue(lenient.match("алиса").accepted)
+        self.assertIsNone(self.matcher.match(""))
+
+
+class TestLogMelFrontend(unittest.TestCase):
+
+    def test_streaming_matches_one_shot(self):
+        """Frames do not depend on how audio is split into blocks"""
+        x = np.random.default_rng(0).normal(0, 3000, 16000).astype(np.int16)
+        frontend = LogMelFrontend(n_mels=40)
+        whole = frontend.push(x)
+        frontend.reset()
+        blocks = np.concatenate([frontend.push(x[i:i + 333]) for i in range(0, len(x), 333)])
+        self.assertEqual(whole.shape, (98, 40))
+        np.testing.assert_allclose(blocks, whole, atol=1e-4)
+
+    def test_mel_filters_are_area_normalized(self):
+        """Slaney filters: right shape, non-negative, no empty bands"""
+        filters = mel_filters(16000, 400, 80)
+        self.assertEqual(filters.shape, (80, 201))
+        self.assertTrue((filters >= 0).all())
+        self.assertTrue((filters.sum(axis=1) > 0).all())
+
+
+class TestWhisperLogMel(unittest.TestCase):
+
+    def test_matches_faster_whisper_extractor(self):
+        """Block-by-block features equal FeatureExtractor on the whole recording"""
+        from faster_whisper.feature_extractor import FeatureExtractor
+
+        x = np.random.default_rng(1).normal(0, 2000, 16037).astype(np.int16)
+        mel = WhisperLogMel(32000)
+        for i in range(0, len(x), 333):
+            mel.push(x[i:i + 333])
+        features = whisper_normalize(mel.finish())
+        reference = FeatureExtractor()(x.astype(np.float32) / 32768.0)
+        self.assertEqual(features.shape, reference.shape)
+        np.testing.assert_allclose(features, reference, atol=1e-5)
+
+    def test_speech_bounds_trim_silent_edges(self):
+        """Silence before and after the burst is outside the bounds, margin kept"""
+        x = np.zeros(32000, dtype=np.int16)
+        x[12000:20000] = np.random.default_rng(2).normal(0, 3000, 8000).astype(np.int16)
+        mel = WhisperLogMel(32000)
+        mel.push(x)
+        first, last = speech_bounds(whisper_normalize(mel.finish()), 45.0, 10)
+        self.assertTrue(60 <= first <= 75)
+        self.assertTrue(125 <= last <= 140)
+
+
+class ScriptedWhisper:
+    """WhisperModel stand-in: every transcribe() returns the same segments"""
+
+    def __init__(self, *segments):
+        self.segments = [
+            type("Segment", (), dict(text=text, avg_logprob=logprob, no_speech_prob=no_speech, words=None))()
+            for text, logprob, no_speech in segments
+        ]
+        self.feature_extractor = None
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return iter(self.segments), None
+
+
+class TestSTTCascade(unittest.TestCase):
+
+    def make_stt(self, draft, main):
+        stt = STT()
+        stt.model, stt.draft_model, stt.is_loaded = main, draft, True
+        return stt
+
+    def test_confident_draft_skips_main_model(self):
+        """A confident draft is the result, the main model is not run"""
+        main = ScriptedWhisper((" Включи свет", -0.2, 0.01))
+        stt = self.make_stt(ScriptedWhisper((" Включи свет", -0.1, 0.02)), main)
+        self.assertEqual(stt.transcribe(np.zeros(16000, dtype=np.int16)), "Включи свет")
+        self.assertEqual(main.calls, 0)
+        self.assertEqual(stt.get_stats()["fallback_rate"], 0.0)
+
+    def test_unsure_draft_falls_back(self):
+        """Low avg_logprob or high no_speech_prob re-decodes with the main model"""
+        main = ScriptedWhisper((" Включи свет", -0.2, 0.01))
+        stt = self.make_stt(ScriptedWhisper((" Включи цвет", -0.9, 0.02)), main)
+        self.assertEqual(stt.transcribe(np.zeros(16000, dtype=np.int16)), "Включи свет")
+        stt.draft_model = ScriptedWhisper((" Продолжение следует", -0.3, 0.8))
+        stt.transcribe(np.zeros(16000, dtype=np.int16))
+        self.assertEqual(main.calls, 2)
+        self.assertEqual(stt.draft_rejected["logprob"], 1)
+        self.assertEqual(stt.draft_rejected["no_speech"], 1)
+
+    def test_no_speech_prob_not_shared_between_threads(self):
+        """A streaming window decoded in another thread does not overwrite the caller's value"""
+        stt = self.make_stt(None, ScriptedWhisper((" Включи свет", -0.2, 0.05)))
+        stt.transcribe(np.zeros(16000, dtype=np.int16))
+
+        stt.model = ScriptedWhisper((" шум", -0.9, 0.9))
+        window = threading.Thread(target=stt.transcribe_words, args=(np.zeros(16000, dtype=np.int16),))
+        window.start()
+        window.join()
+        self.assertEqual(stt.model.calls, 1)
+        self.assertEqual(stt.last_no_speech_prob, 0.05)
+
+
+class ScriptedTuner(stt_autotune.SttAutotuner):
+    """RTF and WER per size come from a table instead of real models"""
+
+    TABLE = {"tiny": (0.05, 0.30), "base": (0.12, 0.10), "small": (0.28, 0.10), "medium": (0.9, 0.05)}
+
+    def thread_options(self):
+        return [1, 2]
+
+    def _measure(self, audio, text, model_size, compute_type, cpu_threads):
+        rtf, wer = self.TABLE[model_size]
+        result = {
+            "model_size": model_size, "compute_type": compute_type, "cpu_threads": cpu_threads,
+            "rtf": rtf / cpu_threads, "wer": wer,
+        }
+        self.candidates.append(result)
+        return result
+
+
+class TestSttAutotune(unittest.TestCase):
+
+    def test_word_error_rate(self):
+        """WER ignores case, punctuation and ё"""
+        self.assertEqual(stt_autotune.word_error_rate("Включи свет, Алёша!", "включи свет алеша"), 0.0)
+        self.assertAlmostEqual(stt_autotune.word_error_rate("включи свет", "включи цвет"), 0.5)
+
+    def test_picks_most_accurate_within_target(self):
+        """Lowest WER under the target RTF wins, then the bigger model"""
+        with mock.patch.object(stt_autotune, "reference_clip", return_value=(np.zeros(16000), "текст")), \
+                mock.patch.object(stt_autotune, "model_available", return_value=True), \
+                mock.patch.object(stt_autotune, "save_tuning") as save:
+            tuning = ScriptedTuner(target_rtf=0.2).run()
+        self.assertEqual(tuning["model_size"], "small")
+        self.assertEqual(tuning["cpu_threads"], 2)
+        self.assertTrue(tuning["met_target"])
+        save.assert_called_once()
+
+    def test_measurement_waits_for_idle(self):
+        """Nothing runs while a request is in flight; a run that overlapped one is repeated"""
+        idle = threading.Event()
+        transcribes = []
+
+        class FakeWhisper:
+            def __init__(self, *args, **kwargs):
+                transcribes.append("load")
+
+            def transcribe(self, audio, **options):
+                transcribes.append(len(audio))
+                if len(transcribes) == 3:  # first timed run: a request arrives meanwhile
+                    idle.clear()
+                    threading.Timer(0.05, idle.set).start()
+                return [mock.Mock(text=" текст")], None
+
+        tuner = stt_autotune.SttAutotuner(idle=idle)
+        audio = np.zeros(32000, dtype=np.float32)
+        with mock.patch("faster_whisper.WhisperModel", FakeWhisper):
+            measure = threading.Thread(target=tuner._measure, args=(audio, "текст", "tiny", "int8", 1))
+            measure.start()
+            measure.join(0.1)
+            self.assertEqual(transcribes, [])
+            idle.set()
+            measure.join(5)
+        self.assertFalse(measure.is_alive())
+        self.assertEqual(transcribes, ["load", 16000, 32000, 32000, 32000])
+        self.assertEqual(len(tuner.candidates), 1)
+        self.assertGreater(tuner._paused, 0.0)
+
+    def test_first_run_calibrates_in_background(self):
+        """load() returns with default options while calibration is still running"""
+        release = threading.Event()
+        calibrated = threading.Event()
+
+        class SlowTuner:
+            def __init__(self, progress=None, idle=None):
+                self.idle = idle
+
+            def run(self):
+                release.wait(5)
+                calibrated.set()
+
+        stt = STT()
+        with mock.patch("src.stt.load_tuning", return_value=None), \
+                mock.patch("src.stt.SttAutotuner", SlowTuner), \
+                mock.patch.object(config, "STT_AUTOTUNE", True), \
+                mock.patch.object(config, "WHISPER_DRAFT_MODEL_SIZE", ""), \
+                mock.patch.object(STT, "_load_model", return_value=object()) as load_model:
+            self.assertTrue(stt.load())
+            self.assertFalse(calibrated.is_set())
+            release.set()
+            self.assertTrue(calibrated.wait(5))
+        load_model.assert_called_once_with(config.WHISPER_MODEL_SIZE, compute_type="int8")
+        self.assertIsNone(stt.tuning)
+
+
+class TestVoskFastPath(unittest.TestCase):
+
+    @staticmethod
+    def result(*words):
+        return {
+            "text": " ".join(word for word, _ in words),
+            "result": [{"word": word, "conf": conf} for word, conf in words],
+        }
+
+    def test_confident_short_command_is_accepted(self):
+        """Every word above the threshold, within the length limit"""
+        command = VoskFastPath.evaluate(self.result(("выключи", 1.0), ("звук", 0.97)))
+        self.assertTrue(command.accepted)
+        self.assertEqual(command.text, "выключи звук")
+
+    def test_whisper_still_needed(self):
+        """One unsure word, a long request or nothing decoded goes to Whisper"""
+        self.assertEqual(VoskFastPath.evaluate(self.result(("выключи", 1.0), ("свук", 0.5))).reason, "low_conf")
+        long_request = self.result(*[("слово", 1.0)] * 12)
+        self.assertEqual(VoskFastPath.evaluate(long_request).reason, "too_long")
+        self.assertEqual(VoskFastPath.evaluate({"text": ""}).reason, "empty")
+
+    def test_disabled_without_model(self):
+        """No Vosk model (ONNX wake engine): always Whisper"""
+        fast_path = VoskFastPath()
+        fast_path.start(None, np.zeros(1600, dtype=np.int16))
+        self.assertEqual(fast_path.finish().reason, "disabled")
+
+    def test_capture_blocks_are_batched(self):
+        """30 ms capture blocks reach Vosk in VOSK_FEED_MS batches, the tail on finish"""
+        recognizer = mock.Mock()
+        recognizer.AcceptWaveform.return_value = False
+        recognizer.FinalResult.return_value = json.dumps(self.result(("стоп", 1.0)))
+        fast_path = VoskFastPath()
+        fast_path._recognizer, fast_path._model = recognizer, "model"
+        fast_path.start("model")
+
+        block = np.zeros(480, dtype=np.int16)  # 30 ms
+        for _ in range(10):
+            fast_path.feed(block)
+        sizes = [len(call.args[0]) // 2 for call in recognizer.AcceptWaveform.call_args_list]
+        self.assertEqual(sizes, [1920, 1920])  # 100 ms feed -> every 4th block
+
+        command = fast_path.finish()
+        sizes = [len(call.args[0]) // 2 for call in recognizer.AcceptWaveform.call_args_list]
+        self.assertEqual(sum(sizes), 4800)  # nothing lost
+        self.assertTrue(command.accepted)
+
+
+class TestTranscriptFilter(unittest.TestCase):
+
+    def test_drops_known_hallucinations(self):
+        """Whole-transcript outros and sound tags are dropped"""
+        transcript_filter = TranscriptFilter()
+        for junk in ("Продолжение следует...", "Субтитры сделал DimaTorzok", "[Музыка]", "Спасибо за просмотр!"):
+            self.assertEqual(transcript_filter.clean(junk), ("", "hallucination"), junk)
+        self.assertEqual(transcript_filter.dropped["hallucination"], 4)
+
+    def test_keeps_command_and_strips_junk_tail(self):
+        """A real request survives; a trailing credit sentence is cut"""
+        transcript_filter = TranscriptFilter()
+        self.assertEqual(transcript_filter.clean("Включи музыку."), ("Включи музыку.", None))
+        self.assertEqual(
+            transcript_filter.clean("Какая погода завтра? Продолжение следует..."),
+            ("Какая погода завтра?", None),
+        )
+        self.assertEqual(transcript_filter.stripped, 1)
+
+    def test_bare_sound_word_is_a_command(self):
+        """Plain "музыка"/"тишина" pass; dropped only when Whisper also leans to silence"""
+        transcript_filter = TranscriptFilter(max_no_speech=0.8, sound_word_no_speech=0.4)
+        self.assertEqual(transcript_filter.clean("Музыка."), ("Музыка.", None))
+        self.assertEqual(transcript_filter.clean("Тишина!", no_speech_prob=0.1), ("Тишина!", None))
+        self.assertEqual(transcript_filter.clean("Музыка", no_speech_prob=0.6), ("", "hallucination"))
+        self.assertEqual(transcript_filter.clean("(музыка)", no_speech_prob=0.1), ("", "hallucination"))
+
+    def test_high_no_speech_prob(self):
+        """Whisper itself thinks it was silence"""
+        transcript_filter = TranscriptFilter(max_no_speech=0.8)
+        self.assertEqual(transcript_filter.clean("Да.", no_speech_prob=0.95)[1], "no_speech")
+        self.assertEqual(transcript_filter.clean("Да.", no_speech_prob=0.1), ("Да.", None))
+
+
+class TestSplitSentences(unittest.TestCase):
+
+    def test_short_first_chunk_and_merged_fragments(self):
+        """Sentences become chunks, a long first sentence is cut at a comma, "Да." is merged"""
+        text = (
+            "Да. Сейчас в Москве плюс пять, облачно, во второй половине дня возможен "
+            "небольшой дождь. Завтра будет теплее!"
+        )
+        chunks = split_sentences(text, first_chars=40, max_chars=250, min_chars=10)
+        self.assertEqual(chunks[0], "Да. Сейчас в Москве плюс пять, облачно,")
+        self.assertEqual(chunks[-1], "Завтра будет теплее!")
+        self.assertEqual(" ".join(chunks), text)
+
+    def test_empty_reply(self):
+        self.assertEqual(split_sentences("  \n "), [])
+
+
+class ScriptedVoice:
+    """Стаб piper.PiperVoice: один блок на предложение"""
+
+    class config:
+        sample_rate = 22050
+
+    def __init__(self):
+        self.calls = 0
+
+    def synthesize(self, text):
+        self.calls += 1
+        for index, _ in enumerate(filter(None, text.split("."))):
+            yield mock.Mock(audio_float_array=np.full(100, 0.5 / (index + 1), dtype=np.float32))
+
+
+class TestPiperTTS(unittest.TestCase):
+
+    def test_resident_voice_streams_and_writes_wav_in_memory(self):
+        piper = PiperTTS()
+        piper.model, piper.sample_rate, piper.is_available = ScriptedVoice(), 22050, True
+
+        blocks = list(piper.stream("Привет. Пока."))
+        self.assertEqual([len(block) for block in blocks], [100, 100])
+
+        wav = piper.synthesize("Привет. Пока.")
+        with wave.open(io.BytesIO(wav), "rb") as wf:
+            self.assertEqual(wf.getframerate(), 22050)
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        self.assertEqual(len(pcm), 200)
+        self.assertEqual(pcm[0], int(0.5 * 32767))
+        self.assertEqual(piper.model.calls, 2)  # same voice object, no reload
+
+    def test_unavailable_voice_is_silent(self):
+        self.assertIsNone(PiperTTS().synthesize("Привет"))
+        self.assertEqual(list(PiperTTS().stream("Привет")), [])
+
+
+class TestTTSCache(unittest.TestCase):
+
+    IDENTITY = ("piper", "ru_RU-dmitri-medium", "ru_RU-dmitri-medium.onnx")
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_ignores_whitespace_but_not_voice(self):
+        key = TTSCache.key(self.IDENTITY, "Готово.", 48000)
+        self.assertEqual(key, TTSCache.key(self.IDENTITY, "  Готово.\n", 48000))
+        self.assertNotEqual(key, TTSCache.key(("piper", "ru_RU-irina-medium", "x.onnx"), "Готово.", 48000))
+        self.assertNotEqual(key, TTSCache.key(self.IDENTITY, "Готово!", 48000))
+
+    def test_disk_hit_is_memory_mapped_after_restart(self):
+        samples = np.linspace(-1, 1, 1000, dtype=np.float32)
+        key = TTSCache.key(self.IDENTITY, "Готово.", 48000)
+        cache = TTSCache(self.directory, memory_bytes=1 << 20, disk_bytes=1 << 20)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, samples)
+        self.assertIs(cache.get(key), cache._memory[key])
+
+        restarted = TTSCache(self.directory, memory_bytes=1 << 20, disk_bytes=1 << 20)
+        cached = restarted.get(key)
+        self.assertIsInstance(cached, np.memmap)
+        np.testing.assert_array_equal(cached, samples)
+        self.assertIs(restarted.get(key), cached)  # the open mapping is reused
+        self.assertEqual(restarted.get_stats()["hits"], {"memory": 0, "mapped": 1, "disk": 1})
+
+    def test_lru_eviction_keeps_recently_used(self):
+        phrase = np.zeros(1000, dtype=np.float32)  # 4000 bytes (+ .npy header on disk)
+        cache = TTSCache(self.directory, memory_bytes=8000, disk_bytes=9000)
+        keys = [TTSCache.key(self.IDENTITY, f"Фраза {i}", 48000) for i in range(3)]
+        cache.put(keys[0], phrase)
+        cache.put(keys[1], phrase)
+        cache.get(keys[0])  # now most recent
+        cache.put(keys[2], phrase)
+
+        self.assertEqual(list(cache._memory), [keys[0], keys[2]])
+        self.assertEqual(sorted(path.stem for path in self.directory.glob("*.npy")), sorted([keys[0], keys[2]]))
+        stats = cache.get_stats()
+        self.assertEqual(stats["evictions"], {"memory": 1, "mapped": 0, "disk": 1})
+        self.assertEqual(stats["misses"], 0)
+
+    def test_mapped_hits_do_not_evict_synthesized(self):
+        """Disk hits are bounded by their own entry count, not the memory budget"""
+        phrase = np.zeros(1000, dtype=np.float32)
+        writer = TTSCache(self.directory, memory_bytes=1 << 20, disk_bytes=1 << 20)
+        old = [TTSCache.key(self.IDENTITY, f"Старая {i}", 48000) for i in range(3)]
+        for key in old:
+            writer.put(key, phrase)
+
+        cache = TTSCache(self.directory, memory_bytes=4000, disk_bytes=1 << 20, mapped_entries=2)
+        fresh = TTSCache.key(self.IDENTITY, "Новая", 48000)
+        cache.put(fresh, phrase)
+        for key in old:
+            self.assertIsInstance(cache.get(key), np.memmap)
+
+        self.assertEqual(list(cache._memory), [fresh])
+        self.assertEqual(list(cache._mapped), old[1:])
+        self.assertEqual(cache.get_stats()["evictions"], {"memory": 0, "mapped": 1, "disk": 0})
+
+
+class TestWakeEngineFactory(unittest.TestCase):
+
+    def test_onnx_engine_keeps_vosk_fallback(self):
+        """The ONNX engine is created with Vosk behind it"""
+        detector = create_wake_detector("onnx")
+        self.assertIsInstance(detector, OnnxWakeWordDetector)
+        self.assertIsInstance(detector.fallback, WakeWordDetector)
+        self.assertIsInstance(create_wake_detector("vosk"), WakeWordDetector)
+
+    def test_missing_model_without_fallback(self):
+        """No model and no fallback: not loaded, detect is a no-op"""
+        detector = OnnxWakeWordDetector(model_path="/nonexistent/kws.onnx")
+        self.assertFalse(detector.load())
+        self.assertFalse(detector.detect(np.zeros(480, dtype=np.int16)))
+
+    def test_fallback_detection_metadata_is_exposed(self):
+        """With Vosk behind a missing model, last_detection (keyword end) comes from Vosk"""
+        fallback = WakeWordDetector(mode="grammar")
+        detector = OnnxWakeWordDetector(model_path="/nonexistent/kws.onnx", fallback=fallback)
+        with mock.patch.object(fallback, "load", return_value=True):
+            self.assertTrue(detector.load())
+        self.assertTrue(detector.using_fallback)
+
+        fallback._feed_map.append((0, 32000, 16000))
+        result = {"text": "алёша", "result": [{"word": "алёша", "conf": 0.9, "start": 0.1, "end": 0.5}]}
+        self.assertTrue(fallback._check_result(result, "final"))
+        self.assertIs(detector.last_detection, fallback.last_detection)
+        self.assertEqual(detector.last_detection["end_position"], 32000 + 8000)
+
+
+class ScriptedSTT:
+    """transcribe_words returns prepared hypotheses, relative to the window"""
+
+    def __init__(self, hypotheses):
+        self.hypotheses = list(hypotheses)
+        self.windows = []
+
+    def transcribe_words(self, audio, prompt=None, features=None):
+        self.windows.append(len(audio))
+        return self.hypotheses.pop(0)
+
+    def transcribe(self, audio, features=None):
+        return "full decode"
+
+
+class TestStreamingTranscriber(unittest.TestCase):
+
+    def test_local_agreement_commits_common_prefix(self):
+        """Words agreed by two consecutive windows are committed, the window moves past them"""
+        stt = ScriptedSTT([
+            [(0.0, 0.5, " Включи"), (0.5, 0.9, " свет")],
+            [(0.0, 0.5, " Включи"), (0.5, 0.9, " свет"), (0.9, 1.5, " в")],
+            # Window now starts at 0.9 - margin (0.2) = 0.7
+            [(0.0, 0.3, " свет"), (0.3, 0.8, " в"), (0.8, 1.6, " кухне")],
+        ])
+        partials = []
+        source = type("Source", (), {"audio_buffer": np.zeros(0, dtype=np.int16)})()
+        streaming = StreamingTranscriber(stt, source, on_partial=partials.append)
+
+        streaming._decode_window(np.zeros(16000, dtype=np.int16))
+        self.assertEqual(streaming.committed, [])
+        streaming._decode_window(np.zeros(32000, dtype=np.int16))
+        self.assertEqual(streaming.text, "Включи свет")
+        self.assertEqual(partials[-1], "Включи свет в")
+
+        text = streaming.finish(np.zeros(48000, dtype=np.int16))
+        # The re-decoded tail of the committed "свет" is dropped
+        self.assertEqual(text, "Включи свет в кухне")
+        self.assertEqual(stt.windows[-1], 48000 - int(0.7 * 16000))
+
+    def test_short_phrase_falls_back_to_full_decode(self):
+        """Nothing committed: the final decode is the plain transcribe"""
+        source = type("Source", (), {"audio_buffer": np.zeros(0, dtype=np.int16)})()
+        streaming = StreamingTranscriber(ScriptedSTT([]), source)
+        self.assertEqual(streaming.finish(np.zeros(8000, dtype=np.int16)), "full decode")
+
+
+if __name__ == '__main__':
+    unittest.main()
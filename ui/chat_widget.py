@@ -470,6 +470,7 @@ class ChatWidget(QWidget):
         super().__init__(parent)
         
         self.typing_indicator = None
+        self.live_caption = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -604,8 +605,9 @@ class ChatWidget(QWidget):
     
     def add_message(self, text: str, role: str = "user"):
         """Добавить сообщение в чат"""
-        # Remove typing indicator if present
+        # Remove typing indicator and live caption if present
         self._hide_typing_indicator()
+        self.hide_live_caption()
         
         # Track message for session history
         if not hasattr(self, '_messages_data'):
@@ -646,6 +648,39 @@ class ChatWidget(QWidget):
                 parent.deleteLater()
             self.typing_indicator = None
     
+    def show_live_caption(self, text: str):
+        """Показать распознаваемый текст, пока пользователь говорит"""
+        if not text:
+            return
+        if self.live_caption is None:
+            self.live_caption = QLabel(self.messages_widget)
+            self.live_caption.setWordWrap(True)
+            self.live_caption.setStyleSheet(f"""
+                color: {COLORS['dark']['text_muted']};
+                font-size: 14px;
+                font-style: italic;
+                padding: 4px 8px;
+            """)
+            
+            # Right-aligned like the user's bubble
+            container = QWidget()
+            container_layout = QHBoxLayout(container)
+            container_layout.setContentsMargins(0, 4, 46, 4)  # Offset for avatar
+            container_layout.addStretch()
+            container_layout.addWidget(self.live_caption)
+            
+            self.messages_layout.insertWidget(self.messages_layout.count() - 1, container)
+        self.live_caption.setText(text)
+        QTimer.singleShot(20, self._scroll_to_bottom)
+    
+    def hide_live_caption(self):
+        """Скрыть распознаваемый текст"""
+        if self.live_caption:
+            parent = self.live_caption.parent()
+            if parent:
+                parent.deleteLater()
+            self.live_caption = None
+    
     def _send_message(self):
         """Отправить сообщение"""
         text = self.input_field.text().strip()
@@ -431,6 +431,9 @@ class MainWindow(QMainWindow):
         self.assistant.model_changed.connect(self._update_model_badge)
         self.assistant.barge_in_occurred.connect(self._on_barge_in)
         self.assistant.wake_word_detected.connect(self._on_wake_word)
+        self.assistant.model_loaded.connect(self._on_model_loaded)
+        self.assistant.wake_ready.connect(self._on_wake_ready)
+        self.assistant.partial_transcript.connect(self.chat.show_live_caption)
 
         # Start loading in background
         self.status_label.setText("Загрузка...")
@@ -439,6 +442,17 @@ class MainWindow(QMainWindow):
         self.loader_thread.finished.connect(self._on_loading_finished)
         self.loader_thread.start()
 
+    @pyqtSlot(str, float, bool)
+    def _on_model_loaded(self, name: str, seconds: float, success: bool):
+        """Модель загружена (модели грузятся параллельно)"""
+        mark = "✓" if success else "✗"
+        self.status_label.setText(f"{name} {mark} {seconds:.1f}с")
+
+    @pyqtSlot()
+    def _on_wake_ready(self):
+        """Vosk готов: слушаем wake word, пока догружается Whisper"""
+        self.start_assistant()
+
     def _on_loading_finished(self, success, errors):
         """Загрузка завершена"""
         if not success:
@@ -453,7 +467,7 @@ class MainWindow(QMainWindow):
 
     def start_assistant(self):
         """Запустить ассистента"""
-        if self.assistant:
+        if self.assistant and not self.assistant.is_running:
             self.assistant.start()
             self._check_first_run()
             # Start autosave timer (every 30 seconds)
@@ -542,6 +556,9 @@ class MainWindow(QMainWindow):
             self.chat.show_typing_indicator()
         else:
             self.chat._hide_typing_indicator()
+        # Nothing was recognized: drop the live caption
+        if state == AssistantState.IDLE:
+            self.chat.hide_live_caption()
             
         # Update Waveform
         is_active = state in [AssistantState.LISTENING, AssistantState.THINKING, AssistantState.SPEAKING]
@@ -563,8 +580,9 @@ class MainWindow(QMainWindow):
                 self.waveform.hide()
                 self.waveform.stop_animation()
 
-        # Play beep when starting to listen
-        if state == AssistantState.LISTENING:
+        # Play beep when starting to listen (not over a command that
+        # already follows the wake word)
+        if state == AssistantState.LISTENING and self.assistant.beep_on_listen:
             # We need to access audio player, which is in assistant.stream_player?
             # No, stream_player is for TTS. We need a general AudioPlayer or reuse.
             # Let's create a temporary AudioPlayer for beep or access it if available.
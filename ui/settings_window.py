@@ -10,8 +10,11 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QColor
 
+import threading
+
 from .styles import COLORS, get_font_family, get_input_style
 from .icons import IconFactory
+from src.stt_autotune import SttAutotuner, describe, load_tuning
 import config
 
 class ModernInput(QLineEdit):
@@ -83,6 +86,8 @@ class SettingsWindow(QDialog):
     """Modern Frameless Settings Window"""
     
     settings_saved = pyqtSignal()
+    tuning_progress = pyqtSignal(str)  # from the calibration thread
+    tuning_finished = pyqtSignal(object)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -206,6 +211,40 @@ class SettingsWindow(QDialog):
         
         v_layout.addWidget(voice_sec)
         
+        # --- Speech Recognition Section ---
+        stt_sec = SettingsSection("Распознавание речи")
+        
+        self.stt_tuning_label = QLabel()
+        self.stt_tuning_label.setWordWrap(True)
+        self.stt_tuning_label.setStyleSheet(f"""
+            color: {COLORS['dark']['text_primary']};
+            font-size: 13px;
+            font-family: {get_font_family()};
+        """)
+        stt_sec.add_widget("Whisper на этом компьютере", self.stt_tuning_label)
+        
+        self.recalibrate_btn = QPushButton("Перекалибровать")
+        self.recalibrate_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.recalibrate_btn.setStyleSheet(f"""
+            QPushButton {{
+                background: {COLORS['dark']['bg_tertiary']};
+                color: {COLORS['dark']['text_primary']};
+                border: 1px solid {COLORS['dark']['border']};
+                border-radius: 10px;
+                padding: 8px 12px;
+                font-family: {get_font_family()};
+            }}
+            QPushButton:hover {{ border-color: {COLORS['dark']['accent']}; }}
+            QPushButton:disabled {{ color: {COLORS['dark']['text_muted']}; }}
+        """)
+        self.recalibrate_btn.clicked.connect(self._recalibrate_stt)
+        stt_sec.add_widget(None, self.recalibrate_btn,
+                         "Замер скорости моделей на эталонной записи (несколько минут). Применится после перезапуска.")
+        self.tuning_progress.connect(self.stt_tuning_label.setText)
+        self.tuning_finished.connect(self._on_tuning_finished)
+        
+        v_layout.addWidget(stt_sec)
+        
         v_layout.addStretch()
         scroll.setWidget(container)
         self.layout.addWidget(scroll)
@@ -301,6 +340,30 @@ class SettingsWindow(QDialog):
         elif config.TTS_ENGINE == "piper":
             mode = "Piper (Offline)"
         self.voice_engine.setCurrentText(mode)
+        
+        self.stt_tuning_label.setText(describe(load_tuning()))
+    
+    def _recalibrate_stt(self):
+        """Запустить калибровку STT в фоне"""
+        self.recalibrate_btn.setEnabled(False)
+        self.stt_tuning_label.setText("Калибровка...")
+        
+        def run():
+            try:
+                tuning = SttAutotuner(progress=self.tuning_progress.emit).run()
+            except Exception as e:
+                self.tuning_progress.emit(f"Ошибка калибровки: {e}")
+                tuning = None
+            self.tuning_finished.emit(tuning)
+        
+        threading.Thread(target=run, name="SttAutotune", daemon=True).start()
+    
+    def _on_tuning_finished(self, tuning):
+        self.recalibrate_btn.setEnabled(True)
+        if tuning:
+            self.stt_tuning_label.setText(f"{describe(tuning)} — применится после перезапуска")
+        elif not self.stt_tuning_label.text().startswith("Ошибка"):
+            self.stt_tuning_label.setText("Калибровка невозможна: нет эталонной записи и Piper недоступен")
 
     def save_settings(self):
         # Read values